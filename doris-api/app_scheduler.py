@@ -5,6 +5,7 @@ Shared APScheduler lifecycle for the whole application.
 from __future__ import annotations
 
 import logging
+from datetime import datetime
 from typing import Any, Callable, Dict
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -41,6 +42,14 @@ class AppScheduler:
                     id=spec["job_id"],
                     replace_existing=True,
                 )
+            elif spec["kind"] == "date":
+                self._scheduler.add_job(
+                    spec["func"],
+                    "date",
+                    run_date=spec["run_date"],
+                    id=spec["job_id"],
+                    replace_existing=True,
+                )
             else:
                 self._scheduler.add_job(
                     spec["func"],
@@ -105,6 +114,39 @@ class AppScheduler:
             **cron_kwargs,
         )
 
+    def register_date(self, func: Callable[..., Any], run_date: datetime, job_id: str) -> None:
+        """Register (or move) a one-shot job; the spec is dropped once it has fired."""
+
+        def _run_once() -> Any:
+            spec = self._job_specs.get(job_id)
+            if spec is not None and spec.get("run_date") == run_date:
+                self._job_specs.pop(job_id, None)
+            return func()
+
+        self._job_specs[job_id] = {
+            "kind": "date",
+            "func": _run_once,
+            "run_date": run_date,
+            "job_id": job_id,
+        }
+        if self._scheduler is None:
+            self._restore_jobs()
+            return
+        if not self._started:
+            # Before start() APScheduler keeps pending jobs in a list that
+            # replace_existing does not de-duplicate.
+            try:
+                self._scheduler.remove_job(job_id)
+            except Exception:
+                pass
+        self._scheduler.add_job(
+            _run_once,
+            "date",
+            run_date=run_date,
+            id=job_id,
+            replace_existing=True,
+        )
+
     def remove_job(self, job_id: str) -> None:
         self._job_specs.pop(job_id, None)
         if self._scheduler is None:
@@ -3,21 +3,89 @@ Doris API Gateway 配置文件
 """
 
 import os
+from dataclasses import dataclass
+from typing import Optional
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, '1' if default else '0').strip().lower() in ('true', '1', 'yes')
+
+
+@dataclass(frozen=True, slots=True)
+class _Cfg:
+    """启动时一次性读取的环境配置，运行期热路径只做属性访问"""
+
+    # Doris 连接配置
+    doris_host: str = os.getenv('DORIS_HOST', 'localhost')
+    doris_port: int = _env_int('DORIS_PORT', 19030)  # MySQL 协议端口
+    doris_user: str = os.getenv('DORIS_USER', 'root')
+    doris_password: str = os.getenv('DORIS_PASSWORD', '')
+    doris_database: str = os.getenv('DORIS_DATABASE', 'doris_db')
+
+    # Doris Stream Load 配置
+    stream_load_host: str = os.getenv('DORIS_STREAM_LOAD_HOST', 'localhost')
+    stream_load_port: int = _env_int('DORIS_STREAM_LOAD_PORT', 18040)  # BE HTTP 端口
+
+    # 同步与 Stream Load 限制
+    doris_max_columns: int = _env_int('DORIS_MAX_COLUMNS', 1024)
+    sync_base_chunk_rows: int = _env_int('SYNC_BASE_CHUNK_ROWS', 200000)
+    sync_min_chunk_rows: int = _env_int('SYNC_MIN_CHUNK_ROWS', 1000)
+    sync_max_cells: int = _env_int('SYNC_MAX_CELLS', 50000000)
+    stream_load_batch_rows: int = _env_int('STREAM_LOAD_BATCH_ROWS', 50000)
+    stream_load_max_bytes: int = _env_int('STREAM_LOAD_MAX_BYTES', 256 * 1024 * 1024)
+    stream_load_timeout: int = _env_int('STREAM_LOAD_TIMEOUT', 600)
+    stream_load_gzip: bool = _env_bool('STREAM_LOAD_GZIP', False)  # 需要 Doris 2.0+ 的 compress_type 支持
+    sync_parallelism: int = _env_int('SYNC_PARALLELISM', 4)  # 多表同步并发数
+    sync_safety_net_minutes: int = _env_int('SYNC_SAFETY_NET_MINUTES', 15)  # 定时同步兜底轮询间隔
+    sync_retry_backoff_minutes: int = _env_int('SYNC_RETRY_BACKOFF_MINUTES', 5)  # 同步失败后的重试间隔
+    sync_atomic_replace: bool = _env_bool('SYNC_ATOMIC_REPLACE', True)  # 全量同步写入影子表后原子替换
+    thread_pool_size: int = _env_int('THREAD_POOL_SIZE', 64)  # 事件循环默认线程池，按单个 worker 进程计
+    action_cache_ttl: int = _env_int('ACTION_CACHE_TTL', 600)  # LLM action 结果缓存秒数，0 表示关闭
+    action_cache_max_rows: int = _env_int('ACTION_CACHE_MAX_ROWS', 20000)  # LLM action 结果缓存总行数上限
+    api_reload: bool = _env_bool('DEV', False)  # 开发模式：代码变更自动重载 (单进程)
+    api_debug: bool = _env_bool('API_DEBUG', False)  # 500 响应里附带 traceback
+    # 同步/分析调度器和各类缓存都在进程内，多 worker 时会各自运行，默认单 worker
+    uvicorn_workers: int = _env_int('UVICORN_WORKERS', 1)
+    analyze_workers: int = _env_int('ANALYZE_WORKERS', 4)  # 上传/同步后元数据分析的并发 worker 数
+    analyze_queue_size: int = _env_int('ANALYZE_QUEUE_SIZE', 200)  # 待分析表队列上限，满时入队等待
+
+    # 数据库连接超时配置（秒）
+    db_connect_timeout: int = _env_int('DB_CONNECT_TIMEOUT', 60)
+    db_read_timeout: int = _env_int('DB_READ_TIMEOUT', 600)  # 10分钟，支持大表同步
+    db_write_timeout: int = _env_int('DB_WRITE_TIMEOUT', 60)
+
+    # 数据源密码加密密钥
+    encryption_key: Optional[str] = os.getenv('ENCRYPTION_KEY')
+
+    # Analyst Agent (Phase 1)
+    analyst_default_depth: str = os.getenv('ANALYST_DEFAULT_DEPTH', 'standard')
+    analyst_strategist_model: str = os.getenv('ANALYST_STRATEGIST_MODEL', 'deepseek-reasoner')
+    analyst_strategist_base_url: Optional[str] = os.getenv('ANALYST_STRATEGIST_BASE_URL')
+    analyst_strategist_api_key: Optional[str] = os.getenv('ANALYST_STRATEGIST_API_KEY')
+    analyst_max_rounds: int = _env_int('ANALYST_MAX_ROUNDS', 3)
+    analyst_max_reasoning_chars: int = _env_int('ANALYST_MAX_REASONING_CHARS', 5000)
+
+
+CFG = _Cfg()
 
 # Doris 连接配置
 DORIS_CONFIG = {
-    'host': os.getenv('DORIS_HOST', 'localhost'),
-    'port': int(os.getenv('DORIS_PORT', '19030')),  # MySQL 协议端口
-    'user': os.getenv('DORIS_USER', 'root'),
-    'password': os.getenv('DORIS_PASSWORD', ''),
-    'database': os.getenv('DORIS_DATABASE', 'doris_db'),
+    'host': CFG.doris_host,
+    'port': CFG.doris_port,
+    'user': CFG.doris_user,
+    'password': CFG.doris_password,
+    'database': CFG.doris_database,
     'charset': 'utf8mb4'
 }
 
 # Doris Stream Load 配置
 DORIS_STREAM_LOAD = {
-    'host': os.getenv('DORIS_STREAM_LOAD_HOST', 'localhost'),
-    'port': int(os.getenv('DORIS_STREAM_LOAD_PORT', '18040')),  # BE HTTP 端口
+    'host': CFG.stream_load_host,
+    'port': CFG.stream_load_port,
     'user': 'root',
     'password': ''
 }
@@ -28,28 +96,41 @@ DEFAULT_LLM_RESOURCE = 'default_llm'
 # API 配置
 API_HOST = '0.0.0.0'
 API_PORT = 8000
+API_RELOAD = CFG.api_reload
+API_DEBUG = CFG.api_debug
+UVICORN_WORKERS = CFG.uvicorn_workers
 
 # 上传文件限制
 MAX_UPLOAD_SIZE = 1024 * 1024 * 1024  # 1GB
 
 # 同步与 Stream Load 限制
-DORIS_MAX_COLUMNS = int(os.getenv('DORIS_MAX_COLUMNS', '1024'))
-SYNC_BASE_CHUNK_ROWS = int(os.getenv('SYNC_BASE_CHUNK_ROWS', '200000'))
-SYNC_MIN_CHUNK_ROWS = int(os.getenv('SYNC_MIN_CHUNK_ROWS', '1000'))
-SYNC_MAX_CELLS = int(os.getenv('SYNC_MAX_CELLS', '50000000'))
-STREAM_LOAD_BATCH_ROWS = int(os.getenv('STREAM_LOAD_BATCH_ROWS', '50000'))
-STREAM_LOAD_MAX_BYTES = int(os.getenv('STREAM_LOAD_MAX_BYTES', str(256 * 1024 * 1024)))
-STREAM_LOAD_TIMEOUT = int(os.getenv('STREAM_LOAD_TIMEOUT', '600'))
+DORIS_MAX_COLUMNS = CFG.doris_max_columns
+SYNC_BASE_CHUNK_ROWS = CFG.sync_base_chunk_rows
+SYNC_MIN_CHUNK_ROWS = CFG.sync_min_chunk_rows
+SYNC_MAX_CELLS = CFG.sync_max_cells
+STREAM_LOAD_BATCH_ROWS = CFG.stream_load_batch_rows
+STREAM_LOAD_MAX_BYTES = CFG.stream_load_max_bytes
+STREAM_LOAD_TIMEOUT = CFG.stream_load_timeout
+STREAM_LOAD_GZIP = CFG.stream_load_gzip
+SYNC_PARALLELISM = CFG.sync_parallelism
+SYNC_SAFETY_NET_MINUTES = CFG.sync_safety_net_minutes
+SYNC_RETRY_BACKOFF_MINUTES = CFG.sync_retry_backoff_minutes
+SYNC_ATOMIC_REPLACE = CFG.sync_atomic_replace
+THREAD_POOL_SIZE = CFG.thread_pool_size
+ACTION_CACHE_TTL = CFG.action_cache_ttl
+ACTION_CACHE_MAX_ROWS = CFG.action_cache_max_rows
+ANALYZE_WORKERS = CFG.analyze_workers
+ANALYZE_QUEUE_SIZE = CFG.analyze_queue_size
 
 # 数据库连接超时配置（秒）
-DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '60'))
-DB_READ_TIMEOUT = int(os.getenv('DB_READ_TIMEOUT', '600'))  # 10分钟，支持大表同步
-DB_WRITE_TIMEOUT = int(os.getenv('DB_WRITE_TIMEOUT', '60'))
+DB_CONNECT_TIMEOUT = CFG.db_connect_timeout
+DB_READ_TIMEOUT = CFG.db_read_timeout
+DB_WRITE_TIMEOUT = CFG.db_write_timeout
 
 # Analyst Agent (Phase 1)
-ANALYST_DEFAULT_DEPTH = os.getenv('ANALYST_DEFAULT_DEPTH', 'standard')
-ANALYST_STRATEGIST_MODEL = os.getenv('ANALYST_STRATEGIST_MODEL', 'deepseek-reasoner')
-ANALYST_STRATEGIST_BASE_URL = os.getenv('ANALYST_STRATEGIST_BASE_URL')
-ANALYST_STRATEGIST_API_KEY = os.getenv('ANALYST_STRATEGIST_API_KEY')
-ANALYST_MAX_ROUNDS = int(os.getenv('ANALYST_MAX_ROUNDS', '3'))
-ANALYST_MAX_REASONING_CHARS = int(os.getenv('ANALYST_MAX_REASONING_CHARS', '5000'))
+ANALYST_DEFAULT_DEPTH = CFG.analyst_default_depth
+ANALYST_STRATEGIST_MODEL = CFG.analyst_strategist_model
+ANALYST_STRATEGIST_BASE_URL = CFG.analyst_strategist_base_url
+ANALYST_STRATEGIST_API_KEY = CFG.analyst_strategist_api_key
+ANALYST_MAX_ROUNDS = CFG.analyst_max_rounds
+ANALYST_MAX_REASONING_CHARS = CFG.analyst_max_reasoning_chars
@@ -3,18 +3,45 @@
 """
 import pymysql
 import pandas as pd
+import base64
+import calendar
 import json
 import os
 import hashlib
+import logging
 import asyncio
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import groupby
 import time
+import traceback
 import uuid
 import re
-from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache, partial
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
-from config import DB_CONNECT_TIMEOUT, DB_READ_TIMEOUT, DB_WRITE_TIMEOUT
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except Exception:  # pragma: no cover - fallback for minimal envs
+    AESGCM = None
+from config import (
+    CFG,
+    DB_CONNECT_TIMEOUT,
+    DB_READ_TIMEOUT,
+    DB_WRITE_TIMEOUT,
+    STREAM_LOAD_BATCH_ROWS,
+    SYNC_ATOMIC_REPLACE,
+    SYNC_PARALLELISM,
+    SYNC_RETRY_BACKOFF_MINUTES,
+    SYNC_SAFETY_NET_MINUTES,
+)
 from db import doris_client
+from handlers import action_handler
 from data_foundation import (
     build_field_payload,
     build_metadata_payload,
@@ -29,6 +56,287 @@ from data_foundation import (
 )
 from upload_handler import excel_handler
 
+try:
+    from dbutils.pooled_db import PooledDB
+except Exception:  # pragma: no cover - fallback for minimal envs
+    PooledDB = None
+
+try:
+    from cachetools import TTLCache
+except Exception:  # pragma: no cover - fallback for minimal envs
+    class TTLCache(dict):
+        def __init__(self, maxsize: int, ttl: int):
+            super().__init__()
+            self.maxsize = maxsize
+            self.ttl = ttl
+
+
+logger = logging.getLogger(__name__)
+
+# 鏁版嵁婧愰厤缃〃 - 浣跨敤 UNIQUE KEY 浠ユ敮鎸?UPDATE/DELETE
+_SQL_DATASOURCES = """
+CREATE TABLE IF NOT EXISTS `_sys_datasources` (
+    `id` VARCHAR(64),
+    `name` VARCHAR(200),
+    `host` VARCHAR(200),
+    `port` INT,
+    `user` VARCHAR(100),
+    `password_encrypted` VARCHAR(500),
+    `database_name` VARCHAR(200),
+    `created_at` DATETIME,
+    `updated_at` DATETIME
+)
+UNIQUE KEY(`id`)
+DISTRIBUTED BY HASH(`id`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+# 鍚屾浠诲姟琛?- 浣跨敤 UNIQUE KEY 浠ユ敮鎸?UPDATE/DELETE
+_SQL_SYNC_TASKS = """
+CREATE TABLE IF NOT EXISTS `_sys_sync_tasks` (
+    `id` VARCHAR(64),
+    `datasource_id` VARCHAR(64),
+    `source_table` VARCHAR(200),
+    `target_table` VARCHAR(200),
+    `schedule_type` VARCHAR(50),
+    `schedule_minute` INT DEFAULT "0",
+    `schedule_hour` INT DEFAULT "0",
+    `schedule_day_of_week` INT DEFAULT "1",
+    `schedule_day_of_month` INT DEFAULT "1",
+    `schedule_value` VARCHAR(100),
+    `last_sync_at` DATETIME,
+    `next_sync_at` DATETIME,
+    `status` VARCHAR(50),
+    `enabled_for_ai` TINYINT DEFAULT "1",
+    `created_at` DATETIME
+)
+UNIQUE KEY(`id`)
+DISTRIBUTED BY HASH(`id`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+# 琛ㄥ厓鏁版嵁琛?- 浣跨敤 UNIQUE KEY 浠ユ敮鎸?UPDATE/DELETE
+_SQL_METADATA = """
+CREATE TABLE IF NOT EXISTS `_sys_table_metadata` (
+    `table_name` VARCHAR(200),
+    `description` TEXT,
+    `columns_info` TEXT,
+    `sample_queries` TEXT,
+    `analyzed_at` DATETIME,
+    `source_type` VARCHAR(50)
+)
+UNIQUE KEY(`table_name`)
+DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+_SQL_TABLE_REGISTRY = """
+CREATE TABLE IF NOT EXISTS `_sys_table_registry` (
+    `table_name` VARCHAR(200),
+    `display_name` VARCHAR(200),
+    `description` TEXT,
+    `source_type` VARCHAR(50),
+    `created_at` DATETIME,
+    `updated_at` DATETIME
+)
+UNIQUE KEY(`table_name`)
+DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+_SQL_TABLE_SOURCES = """
+CREATE TABLE IF NOT EXISTS `_sys_table_sources` (
+    `table_name` VARCHAR(200),
+    `source_type` VARCHAR(50),
+    `origin_kind` VARCHAR(50),
+    `origin_id` VARCHAR(100),
+    `origin_label` VARCHAR(255),
+    `origin_path` VARCHAR(500),
+    `origin_table` VARCHAR(255),
+    `sync_task_id` VARCHAR(64),
+    `ingest_mode` VARCHAR(50),
+    `last_rows` BIGINT,
+    `analysis_status` VARCHAR(50),
+    `last_ingested_at` DATETIME,
+    `last_analyzed_at` DATETIME,
+    `created_at` DATETIME,
+    `updated_at` DATETIME
+)
+UNIQUE KEY(`table_name`)
+DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+_SQL_METRIC_DEFINITIONS = """
+CREATE TABLE IF NOT EXISTS `_sys_metric_definitions` (
+    `metric_key` VARCHAR(128),
+    `display_name` VARCHAR(255),
+    `description` TEXT,
+    `table_name` VARCHAR(200),
+    `time_field` VARCHAR(255),
+    `value_field` VARCHAR(255),
+    `aggregation_expression` TEXT,
+    `aggregation` VARCHAR(50),
+    `default_grain` VARCHAR(20),
+    `dimensions` TEXT,
+    `created_at` DATETIME,
+    `updated_at` DATETIME
+)
+UNIQUE KEY(`metric_key`)
+DISTRIBUTED BY HASH(`metric_key`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+_SQL_QUERY_HISTORY = """
+CREATE TABLE IF NOT EXISTS `_sys_query_history` (
+    `id` VARCHAR(36),
+    `question` TEXT,
+    `sql` TEXT,
+    `table_names` VARCHAR(1000),
+    `question_hash` VARCHAR(64),
+    `quality_gate` TINYINT DEFAULT "1",
+    `is_empty_result` TINYINT DEFAULT "0",
+    `row_count` INT,
+    `created_at` DATETIME
+)
+UNIQUE KEY(`id`)
+DISTRIBUTED BY HASH(`id`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+_SQL_TABLE_AGENTS = """
+CREATE TABLE IF NOT EXISTS `_sys_table_agents` (
+    `table_name` VARCHAR(255),
+    `agent_config` TEXT,
+    `source_hash` VARCHAR(64),
+    `created_at` DATETIME,
+    `updated_at` DATETIME
+)
+UNIQUE KEY(`table_name`)
+DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+_SQL_FIELD_CATALOG = """
+CREATE TABLE IF NOT EXISTS `_sys_field_catalog` (
+    `table_name` VARCHAR(255),
+    `field_name` VARCHAR(255),
+    `field_type` VARCHAR(50),
+    `enum_values` TEXT,
+    `value_range` VARCHAR(200),
+    `updated_at` DATETIME
+)
+UNIQUE KEY(`table_name`, `field_name`)
+DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+_SQL_RELATIONSHIPS = """
+CREATE TABLE IF NOT EXISTS `_sys_table_relationships` (
+    `id` VARCHAR(36),
+    `table_a` VARCHAR(255),
+    `column_a` VARCHAR(255),
+    `table_b` VARCHAR(255),
+    `column_b` VARCHAR(255),
+    `rel_type` VARCHAR(50),
+    `confidence` FLOAT,
+    `is_manual` TINYINT DEFAULT "0",
+    `created_at` DATETIME
+)
+UNIQUE KEY(`id`)
+DISTRIBUTED BY HASH(`id`) BUCKETS 1
+PROPERTIES ("replication_num" = "1")
+"""
+
+_SYSTEM_TABLE_DDL = (
+    _SQL_DATASOURCES,
+    _SQL_SYNC_TASKS,
+    _SQL_METADATA,
+    _SQL_TABLE_REGISTRY,
+    _SQL_TABLE_SOURCES,
+    _SQL_METRIC_DEFINITIONS,
+    _SQL_QUERY_HISTORY,
+    _SQL_TABLE_AGENTS,
+    _SQL_FIELD_CATALOG,
+    _SQL_RELATIONSHIPS,
+)
+
+@lru_cache(maxsize=4)
+def _password_ciphers(fernet_key: bytes) -> Tuple[Fernet, Any]:
+    """Fernet and AES-GCM ciphers for one key, shared by every handler instance."""
+    aead = None
+    if AESGCM is not None:
+        aead = AESGCM(hashlib.sha256(b"smatrix-datasource-aesgcm:" + fernet_key).digest())
+    return Fernet(fernet_key), aead
+
+
+@lru_cache(maxsize=1)
+def _ephemeral_fernet_key() -> bytes:
+    """Process-wide fallback key when ENCRYPTION_KEY is unset."""
+    logger.warning(
+        "ENCRYPTION_KEY is not set: datasource passwords will be encrypted with a temporary key."
+        "Set ENCRYPTION_KEY in .env for persistent encryption across restarts."
+        "鐢熸垚鍛戒护锛歱ython -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\""
+    )
+    return Fernet.generate_key()
+
+
+def _new_record_id() -> str:
+    """Short id for datasources and sync tasks: 60 random bits, lowercase base32."""
+    return base64.b32encode(os.urandom(8))[:12].decode().lower()
+
+
+# Rows per multi-row INSERT statement; bigger bulk writes are split into batches of this size.
+_BULK_INSERT_BATCH_ROWS = 50
+
+
+@lru_cache(maxsize=64)
+def _multi_row_insert_sql(prefix: str, row_sql: str, row_count: int) -> str:
+    """INSERT ... VALUES text for ``row_count`` rows, built once per distinct batch size."""
+    return prefix + ", ".join([row_sql] * row_count)
+
+
+def _sync_timestamp(value: datetime) -> str:
+    """Schedule times as bound parameters, in the same form _calculate_next_sync_detailed returns."""
+    return value.isoformat(sep=' ', timespec='seconds')
+
+
+@lru_cache(maxsize=128)
+def _scheduled_tasks_done_sql(task_count: int, record_run: bool = True) -> str:
+    """One UPDATE that sets each task's own next_sync_at, stamping last_sync_at when ``record_run``."""
+    cases = " ".join(["WHEN %s THEN %s"] * task_count)
+    placeholders = ", ".join(["%s"] * task_count)
+    stamp = "last_sync_at = %s, " if record_run else ""
+    return (
+        f"UPDATE `_sys_sync_tasks` SET {stamp}"
+        f"next_sync_at = CASE id {cases} END WHERE id IN ({placeholders})"
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_db_executor() -> ThreadPoolExecutor:
+    """Threads for the async wrappers, sized like the Doris pool and kept off the loop's default executor."""
+    workers = max(4, int(os.getenv("DORIS_POOL_SIZE", "10")))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ds-db")
+
+
+# Rollover step per schedule type when the slot for this period has already passed.
+_SCHEDULE_STEP = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+}
+
+# Independent CREATE TABLE statements are sent concurrently to overlap FE round trips.
+_SYSTEM_TABLE_DDL_WORKERS = 4
+
+_SYSTEM_TABLE_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS idx_query_history_hash ON `_sys_query_history` (`question_hash`) USING INVERTED",
+    "CREATE INDEX IF NOT EXISTS idx_query_history_question ON `_sys_query_history` (`question`) USING INVERTED PROPERTIES(\"parser\"=\"chinese\")",
+    # The scheduler's due-task and MIN(next_sync_at) lookups filter on this column. Being
+    # idempotent, it also adds the index to installs whose table predates it.
+    "CREATE INDEX IF NOT EXISTS idx_sync_tasks_next_sync ON `_sys_sync_tasks` (`next_sync_at`) USING INVERTED",
+)
+
 
 class DataSourceHandler:
     """澶栭儴鏁版嵁婧愮鐞嗗拰鍚屾澶勭悊鍣?"""
@@ -37,23 +345,55 @@ class DataSourceHandler:
     _SUPPORTED_METRIC_AGGREGATIONS = {"sum", "avg", "min", "max", "count", "count_distinct"}
     _SUPPORTED_TIME_GRAINS = {"day", "week", "month"}
     _SUPPORTED_SYNC_STRATEGIES = {"full", "incremental"}
+    # numpy dtype.kind -> Doris column type for tables created by a sync.
+    _SYNC_KIND_TO_DORIS_TYPE = {
+        "i": "BIGINT", "u": "BIGINT", "f": "DECIMAL(18,2)", "M": "DATETIME", "b": "TINYINT",
+    }
+    _SYNC_DTYPE_SAMPLE_ROWS = 1000
+    _SYNC_SHADOW_SUFFIX = "__shadow"
+    _SYNC_COLUMN_NAME_TRANSLATION = str.maketrans({" ": "_", "-": "_", ".": "_"})
+    # MySQL information_schema DATA_TYPE -> Doris column type for tables created by a sync.
+    _REMOTE_INTEGER_TYPES = {"tinyint", "smallint", "mediumint", "int", "integer", "bigint", "year"}
+    _REMOTE_DATETIME_TYPES = {"datetime", "timestamp"}
+    _REMOTE_STRING_TYPES = {
+        "char", "varchar", "tinytext", "text", "mediumtext", "longtext", "enum", "set", "json",
+    }
     
     def __init__(self):
         self.db = doris_client
         # 鍔犲瘑瀵嗛挜 - 蹇呴』閫氳繃鐜鍙橀噺 ENCRYPTION_KEY 鎻愪緵
         # 鐢熸垚鏂瑰紡锛歱ython -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
-        key = os.getenv('ENCRYPTION_KEY')
+        key = CFG.encryption_key
         if key:
-            self.cipher = Fernet(key.encode() if isinstance(key, str) else key)
+            fernet_key = key.encode() if isinstance(key, str) else key
         else:
-            import logging as _logging
-            _logging.getLogger(__name__).warning(
-                "ENCRYPTION_KEY is not set: datasource passwords will be encrypted with a temporary key."
-                "Set ENCRYPTION_KEY in .env for persistent encryption across restarts."
-                "鐢熸垚鍛戒护锛歱ython -c \"from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())\""
-            )
-            self.cipher = Fernet(Fernet.generate_key())
+            fernet_key = _ephemeral_fernet_key()
+        # New passwords use AES-GCM keyed from the same secret; Fernet stays for legacy tokens.
+        self.cipher, self._aead = _password_ciphers(fernet_key)
         self._tables_initialized = False
+        self._remote_pools: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
+        self._remote_pools_lock = threading.Lock()
+        # Decrypted datasource records, shared by sync runs and scheduler ticks.
+        self._ds_cache = TTLCache(maxsize=64, ttl=300)
+        self._ds_cache_lock = threading.RLock()
+        # id -> name for every datasource; joined onto sync task listings in Python.
+        self._ds_names_cache = TTLCache(maxsize=1, ttl=30)
+        self._ds_list_cache = TTLCache(maxsize=1, ttl=30)
+        # AI-enabled target tables, read on every AI query; cleared by sync task writes.
+        self._ai_tables_cache = TTLCache(maxsize=1, ttl=10)
+        self._ai_tables_cache_lock = threading.RLock()
+        # Short-lived remote table listings; information_schema scans are slow on big schemas.
+        self._remote_tables_cache = TTLCache(maxsize=16, ttl=30)
+        self._remote_tables_cache_lock = threading.RLock()
+        # (ds_id, source_table, target_table) -> source UPDATE_TIME seen when its last
+        # scheduled sync started; an unchanged value means there is nothing new to copy.
+        self._source_change_marks: Dict[Tuple[str, str, str], datetime] = {}
+        # Targets whose TRUNCATE was rejected once; later full syncs go straight to DELETE.
+        self._truncate_unsupported: Set[str] = set()
+        # target_table -> lock held from clearing/shadow creation through the swap, so a
+        # manual sync and a scheduled one never write the same target at the same time.
+        self._sync_target_locks: Dict[str, threading.Lock] = {}
+        self._sync_target_locks_guard = threading.Lock()
 
     def init_tables(self):
         """鍒濆鍖栫郴缁熻〃锛堝湪鏁版嵁搴撳氨缁悗璋冪敤锛?"""
@@ -66,182 +406,6 @@ class DataSourceHandler:
 
     def _ensure_system_tables(self):
         """纭繚绯荤粺琛ㄥ瓨鍦?"""
-        # 鏁版嵁婧愰厤缃〃 - 浣跨敤 UNIQUE KEY 浠ユ敮鎸?UPDATE/DELETE
-        sql_datasources = """
-        CREATE TABLE IF NOT EXISTS `_sys_datasources` (
-            `id` VARCHAR(64),
-            `name` VARCHAR(200),
-            `host` VARCHAR(200),
-            `port` INT,
-            `user` VARCHAR(100),
-            `password_encrypted` VARCHAR(500),
-            `database_name` VARCHAR(200),
-            `created_at` DATETIME,
-            `updated_at` DATETIME
-        )
-        UNIQUE KEY(`id`)
-        DISTRIBUTED BY HASH(`id`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        # 鍚屾浠诲姟琛?- 浣跨敤 UNIQUE KEY 浠ユ敮鎸?UPDATE/DELETE
-        sql_sync_tasks = """
-        CREATE TABLE IF NOT EXISTS `_sys_sync_tasks` (
-            `id` VARCHAR(64),
-            `datasource_id` VARCHAR(64),
-            `source_table` VARCHAR(200),
-            `target_table` VARCHAR(200),
-            `schedule_type` VARCHAR(50),
-            `schedule_minute` INT DEFAULT "0",
-            `schedule_hour` INT DEFAULT "0",
-            `schedule_day_of_week` INT DEFAULT "1",
-            `schedule_day_of_month` INT DEFAULT "1",
-            `schedule_value` VARCHAR(100),
-            `last_sync_at` DATETIME,
-            `next_sync_at` DATETIME,
-            `status` VARCHAR(50),
-            `enabled_for_ai` TINYINT DEFAULT "1",
-            `created_at` DATETIME
-        )
-        UNIQUE KEY(`id`)
-        DISTRIBUTED BY HASH(`id`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        # 琛ㄥ厓鏁版嵁琛?- 浣跨敤 UNIQUE KEY 浠ユ敮鎸?UPDATE/DELETE
-        sql_metadata = """
-        CREATE TABLE IF NOT EXISTS `_sys_table_metadata` (
-            `table_name` VARCHAR(200),
-            `description` TEXT,
-            `columns_info` TEXT,
-            `sample_queries` TEXT,
-            `analyzed_at` DATETIME,
-            `source_type` VARCHAR(50)
-        )
-        UNIQUE KEY(`table_name`)
-        DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        sql_table_registry = """
-        CREATE TABLE IF NOT EXISTS `_sys_table_registry` (
-            `table_name` VARCHAR(200),
-            `display_name` VARCHAR(200),
-            `description` TEXT,
-            `source_type` VARCHAR(50),
-            `created_at` DATETIME,
-            `updated_at` DATETIME
-        )
-        UNIQUE KEY(`table_name`)
-        DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        sql_table_sources = """
-        CREATE TABLE IF NOT EXISTS `_sys_table_sources` (
-            `table_name` VARCHAR(200),
-            `source_type` VARCHAR(50),
-            `origin_kind` VARCHAR(50),
-            `origin_id` VARCHAR(100),
-            `origin_label` VARCHAR(255),
-            `origin_path` VARCHAR(500),
-            `origin_table` VARCHAR(255),
-            `sync_task_id` VARCHAR(64),
-            `ingest_mode` VARCHAR(50),
-            `last_rows` BIGINT,
-            `analysis_status` VARCHAR(50),
-            `last_ingested_at` DATETIME,
-            `last_analyzed_at` DATETIME,
-            `created_at` DATETIME,
-            `updated_at` DATETIME
-        )
-        UNIQUE KEY(`table_name`)
-        DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        sql_metric_definitions = """
-        CREATE TABLE IF NOT EXISTS `_sys_metric_definitions` (
-            `metric_key` VARCHAR(128),
-            `display_name` VARCHAR(255),
-            `description` TEXT,
-            `table_name` VARCHAR(200),
-            `time_field` VARCHAR(255),
-            `value_field` VARCHAR(255),
-            `aggregation_expression` TEXT,
-            `aggregation` VARCHAR(50),
-            `default_grain` VARCHAR(20),
-            `dimensions` TEXT,
-            `created_at` DATETIME,
-            `updated_at` DATETIME
-        )
-        UNIQUE KEY(`metric_key`)
-        DISTRIBUTED BY HASH(`metric_key`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        sql_query_history = """
-        CREATE TABLE IF NOT EXISTS `_sys_query_history` (
-            `id` VARCHAR(36),
-            `question` TEXT,
-            `sql` TEXT,
-            `table_names` VARCHAR(1000),
-            `question_hash` VARCHAR(64),
-            `quality_gate` TINYINT DEFAULT "1",
-            `is_empty_result` TINYINT DEFAULT "0",
-            `row_count` INT,
-            `created_at` DATETIME
-        )
-        UNIQUE KEY(`id`)
-        DISTRIBUTED BY HASH(`id`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        sql_table_agents = """
-        CREATE TABLE IF NOT EXISTS `_sys_table_agents` (
-            `table_name` VARCHAR(255),
-            `agent_config` TEXT,
-            `source_hash` VARCHAR(64),
-            `created_at` DATETIME,
-            `updated_at` DATETIME
-        )
-        UNIQUE KEY(`table_name`)
-        DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        sql_field_catalog = """
-        CREATE TABLE IF NOT EXISTS `_sys_field_catalog` (
-            `table_name` VARCHAR(255),
-            `field_name` VARCHAR(255),
-            `field_type` VARCHAR(50),
-            `enum_values` TEXT,
-            `value_range` VARCHAR(200),
-            `updated_at` DATETIME
-        )
-        UNIQUE KEY(`table_name`, `field_name`)
-        DISTRIBUTED BY HASH(`table_name`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        sql_relationships = """
-        CREATE TABLE IF NOT EXISTS `_sys_table_relationships` (
-            `id` VARCHAR(36),
-            `table_a` VARCHAR(255),
-            `column_a` VARCHAR(255),
-            `table_b` VARCHAR(255),
-            `column_b` VARCHAR(255),
-            `rel_type` VARCHAR(50),
-            `confidence` FLOAT,
-            `is_manual` TINYINT DEFAULT "0",
-            `created_at` DATETIME
-        )
-        UNIQUE KEY(`id`)
-        DISTRIBUTED BY HASH(`id`) BUCKETS 1
-        PROPERTIES ("replication_num" = "1")
-        """
-
-        import time
         max_retries = 10
         retryable_markers = (
             "available backend num is 0",
@@ -253,21 +417,18 @@ class DataSourceHandler:
         )
         for attempt in range(max_retries):
             try:
-                self.db.execute_update(sql_datasources)
-                self.db.execute_update(sql_sync_tasks)
-                self.db.execute_update(sql_metadata)
-                self.db.execute_update(sql_table_registry)
-                self.db.execute_update(sql_table_sources)
-                self.db.execute_update(sql_metric_definitions)
-                self.db.execute_update(sql_query_history)
-                self.db.execute_update(sql_table_agents)
-                self.db.execute_update(sql_field_catalog)
-                self.db.execute_update(sql_relationships)
-
-                for index_sql in (
-                    "CREATE INDEX IF NOT EXISTS idx_query_history_hash ON `_sys_query_history` (`question_hash`) USING INVERTED",
-                    "CREATE INDEX IF NOT EXISTS idx_query_history_question ON `_sys_query_history` (`question`) USING INVERTED PROPERTIES(\"parser\"=\"chinese\")",
-                ):
+                # The first CREATE doubles as a readiness probe: while backends are still
+                # coming up it fails alone instead of alongside every other statement.
+                self.db.execute_update(_SYSTEM_TABLE_DDL[0])
+                with ThreadPoolExecutor(
+                    max_workers=_SYSTEM_TABLE_DDL_WORKERS,
+                    thread_name_prefix="sys-ddl",
+                ) as executor:
+                    futures = [executor.submit(self.db.execute_update, ddl) for ddl in _SYSTEM_TABLE_DDL[1:]]
+                    for future in as_completed(futures):
+                        future.result()
+
+                for index_sql in _SYSTEM_TABLE_INDEX_DDL:
                     try:
                         self.db.execute_update(index_sql)
                     except Exception:
@@ -278,54 +439,102 @@ class DataSourceHandler:
                 except Exception:
                     pass
 
-                print("System tables created")
+                logger.info("System tables created")
                 return True
             except Exception as e:
                 error_msg = str(e)
                 if any(marker in error_msg for marker in retryable_markers) and attempt < max_retries - 1:
-                    print(f"鈴?BE 灏氭湭灏辩华锛岀瓑寰呴噸璇?.. ({attempt + 1}/{max_retries})")
+                    logger.warning("鈴?BE 灏氭湭灏辩华锛岀瓑寰呴噸璇?.. (%s/%s)", attempt + 1, max_retries)
                     time.sleep(5)
                 else:
-                    print(f"Warning: Could not create system tables: {e}")
+                    logger.warning("Warning: Could not create system tables: %s", e)
                     return False
 
         return False
 
+    _TABLE_REGISTRY_EXISTS_SQL = "SELECT table_name FROM `_sys_table_registry` WHERE table_name = %s LIMIT 1"
+    _TABLE_REGISTRY_UPDATE_SQL = """
+    UPDATE `_sys_table_registry`
+    SET source_type = COALESCE(%s, source_type),
+        display_name = COALESCE(%s, display_name),
+        description = COALESCE(%s, description),
+        updated_at = NOW()
+    WHERE table_name = %s
+    """
+    _TABLE_REGISTRY_INSERT_PREFIX = """INSERT INTO `_sys_table_registry`
+    (`table_name`, `display_name`, `description`, `source_type`, `created_at`, `updated_at`)
+    VALUES """
+    _TABLE_REGISTRY_VALUES_ROW = "(%s, %s, %s, %s, NOW(), NOW())"
+
     def ensure_table_registry(self, table_name: str, source_type: str,
                               display_name: Optional[str] = None,
                               description: Optional[str] = None) -> Dict[str, Any]:
         """纭繚琛ㄦ敞鍐屽瓨鍦?(鍚屾)"""
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        exists_sql = "SELECT table_name FROM `_sys_table_registry` WHERE table_name = %s LIMIT 1"
-        exists = self.db.execute_query(exists_sql, (table_name,))
+        exists = self.db.execute_query(self._TABLE_REGISTRY_EXISTS_SQL, (table_name,))
 
         if exists:
-            update_sql = """
-            UPDATE `_sys_table_registry`
-            SET source_type = COALESCE(%s, source_type),
-                display_name = COALESCE(%s, display_name),
-                description = COALESCE(%s, description),
-                updated_at = %s
-            WHERE table_name = %s
-            """
-            self.db.execute_update(update_sql, (source_type, display_name, description, now, table_name))
+            self.db.execute_update(
+                self._TABLE_REGISTRY_UPDATE_SQL, (source_type, display_name, description, table_name)
+            )
             return {'success': True, 'message': '琛ㄦ敞鍐屽凡鏇存柊', 'table_name': table_name}
 
-        insert_sql = """
-        INSERT INTO `_sys_table_registry`
-        (`table_name`, `display_name`, `description`, `source_type`, `created_at`, `updated_at`)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        self.db.execute_update(insert_sql, (
-            table_name,
-            display_name if display_name is not None else '',
-            description if description is not None else '',
-            source_type,
-            now,
-            now
-        ))
+        self.db.execute_update(
+            _multi_row_insert_sql(self._TABLE_REGISTRY_INSERT_PREFIX, self._TABLE_REGISTRY_VALUES_ROW, 1),
+            (
+                table_name,
+                display_name if display_name is not None else '',
+                description if description is not None else '',
+                source_type,
+            ),
+        )
         return {'success': True, 'message': '琛ㄦ敞鍐屽凡鍒涘缓', 'table_name': table_name}
 
+    def bulk_ensure_table_registry(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """ensure_table_registry for many tables: one lookup, one UPDATE batch, one multi-row INSERT."""
+        by_name: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            table_name = (entry.get("table_name") or "").strip()
+            if table_name:
+                by_name[table_name] = entry
+        if not by_name:
+            return {"success": True, "created": [], "updated": []}
+
+        # The lookup, the UPDATE batch and the INSERT batches share one Doris connection.
+        with self._db_session():
+            names = list(by_name)
+            placeholders = ", ".join(["%s"] * len(names))
+            existing = {
+                row["table_name"]
+                for row in self.db.execute_query(
+                    f"SELECT table_name FROM `_sys_table_registry` WHERE table_name IN ({placeholders})",
+                    tuple(names),
+                )
+            }
+            updated = [name for name in names if name in existing]
+            created = [name for name in names if name not in existing]
+
+            if updated:
+                self.db.execute_many(self._TABLE_REGISTRY_UPDATE_SQL, [
+                    (
+                        by_name[name].get("source_type"),
+                        by_name[name].get("display_name"),
+                        by_name[name].get("description"),
+                        name,
+                    )
+                    for name in updated
+                ])
+            if created:
+                self._insert_rows(self._TABLE_REGISTRY_INSERT_PREFIX, self._TABLE_REGISTRY_VALUES_ROW, [
+                    (
+                        name,
+                        by_name[name].get("display_name") if by_name[name].get("display_name") is not None else "",
+                        by_name[name].get("description") if by_name[name].get("description") is not None else "",
+                        by_name[name].get("source_type"),
+                    )
+                    for name in created
+                ])
+        return {"success": True, "created": created, "updated": updated}
+
     def upsert_table_source(
         self,
         table_name: str,
@@ -342,7 +551,6 @@ class DataSourceHandler:
         analysis_status: str = "pending",
     ) -> Dict[str, Any]:
         """鍐欏叆鎴栨洿鏂拌〃鏉ユ簮鐘舵€併€?"""
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         exists_sql = "SELECT table_name FROM `_sys_table_sources` WHERE table_name = %s LIMIT 1"
         exists = self.db.execute_query(exists_sql, (table_name,))
 
@@ -359,8 +567,8 @@ class DataSourceHandler:
                 ingest_mode = COALESCE(%s, ingest_mode),
                 last_rows = COALESCE(%s, last_rows),
                 analysis_status = %s,
-                last_ingested_at = %s,
-                updated_at = %s
+                last_ingested_at = NOW(),
+                updated_at = NOW()
             WHERE table_name = %s
             """
             self.db.execute_update(
@@ -376,8 +584,6 @@ class DataSourceHandler:
                     ingest_mode,
                     last_rows,
                     analysis_status,
-                    now,
-                    now,
                     table_name,
                 ),
             )
@@ -387,7 +593,7 @@ class DataSourceHandler:
             (`table_name`, `source_type`, `origin_kind`, `origin_id`, `origin_label`,
              `origin_path`, `origin_table`, `sync_task_id`, `ingest_mode`, `last_rows`,
              `analysis_status`, `last_ingested_at`, `last_analyzed_at`, `created_at`, `updated_at`)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NULL, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NULL, NOW(), NOW())
             """
             self.db.execute_update(
                 insert_sql,
@@ -403,9 +609,6 @@ class DataSourceHandler:
                     ingest_mode or "",
                     last_rows,
                     analysis_status,
-                    now,
-                    now,
-                    now,
                 ),
             )
 
@@ -427,7 +630,6 @@ class DataSourceHandler:
         if not safe_table_name:
             return {"success": False, "error": "table_name is required"}
 
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         exists = self.db.execute_query(
             "SELECT table_name FROM `_sys_table_sources` WHERE table_name = %s LIMIT 1",
             (safe_table_name,),
@@ -440,18 +642,18 @@ class DataSourceHandler:
             UPDATE `_sys_table_sources`
             SET analysis_status = %s,
                 last_analyzed_at = %s,
-                updated_at = %s
+                updated_at = NOW()
             WHERE table_name = %s
             """
-            params = (status, analyzed_at, now, safe_table_name)
+            params = (status, analyzed_at, safe_table_name)
         else:
             sql = """
             UPDATE `_sys_table_sources`
             SET analysis_status = %s,
-                updated_at = %s
+                updated_at = NOW()
             WHERE table_name = %s
             """
-            params = (status, now, safe_table_name)
+            params = (status, safe_table_name)
 
         self.db.execute_update(sql, params)
         return {"success": True, "table_name": safe_table_name, "analysis_status": status}
@@ -660,6 +862,138 @@ class DataSourceHandler:
             raise ValueError(f"invalid remote identifier: {identifier}")
         return f"`{candidate}`"
 
+    def _get_remote_pool(self, host, port, user, password, database):
+        """Return the lazily built connection pool for one remote datasource."""
+        key = (host, int(port), user, password, database)
+        evicted = None
+        with self._remote_pools_lock:
+            pool = self._remote_pools.get(key)
+            if pool is not None:
+                self._remote_pools.move_to_end(key)
+                return pool
+            pool = PooledDB(
+                creator=pymysql,
+                mincached=1,
+                maxcached=5,
+                maxconnections=10,
+                blocking=True,
+                ping=1,
+                host=host,
+                port=int(port),
+                user=user,
+                password=password,
+                database=database,
+                connect_timeout=DB_CONNECT_TIMEOUT,
+                read_timeout=DB_READ_TIMEOUT,
+                write_timeout=DB_WRITE_TIMEOUT,
+            )
+            self._remote_pools[key] = pool
+            if len(self._remote_pools) > self._REMOTE_POOL_LIMIT:
+                _, evicted = self._remote_pools.popitem(last=False)
+        if evicted is not None:
+            self._close_pool_quietly(evicted)
+        return pool
+
+    def _get_remote_connection(self, host, port, user, password, database):
+        if PooledDB is None:
+            return pymysql.connect(
+                host=host, port=int(port), user=user, password=password, database=database,
+                connect_timeout=DB_CONNECT_TIMEOUT,
+                read_timeout=DB_READ_TIMEOUT,
+                write_timeout=DB_WRITE_TIMEOUT,
+            )
+        return self._get_remote_pool(host, port, user, password, database).connection()
+
+    def _get_conn(self, ds: Dict[str, Any]):
+        """Check out a pooled connection for a saved datasource record."""
+        return self._get_remote_connection(
+            ds['host'], ds['port'], ds['user'], ds['password'], ds['database_name']
+        )
+
+    def _invalidate_remote_pool(self, ds: Optional[Dict[str, Any]]) -> None:
+        if not ds:
+            return
+        key = (ds.get('host'), int(ds.get('port') or 0), ds.get('user'), ds.get('password'), ds.get('database_name'))
+        with self._remote_pools_lock:
+            pool = self._remote_pools.pop(key, None)
+        if pool is not None:
+            self._close_pool_quietly(pool)
+
+    def close_remote_pools(self) -> None:
+        """Close every cached remote pool (application shutdown)."""
+        with self._remote_pools_lock:
+            pools = list(self._remote_pools.values())
+            self._remote_pools.clear()
+        for pool in pools:
+            self._close_pool_quietly(pool)
+
+    @staticmethod
+    def _close_pool_quietly(pool) -> None:
+        try:
+            pool.close()
+        except Exception:
+            pass
+
+    def _db_session(self):
+        """Pin one Doris connection for several statements in a row (no-op for db objects without sessions)."""
+        session = getattr(self.db, "session", None)
+        return session() if callable(session) else nullcontext()
+
+    def _insert_rows(self, prefix: str, row_sql: str, rows: List[tuple]) -> None:
+        """Write ``rows`` as multi-row INSERTs of at most ``_BULK_INSERT_BATCH_ROWS`` rows each."""
+        batch = _BULK_INSERT_BATCH_ROWS
+        full = len(rows) - len(rows) % batch
+        with self._db_session():
+            if full:
+                # Full batches share one statement text, so they go over a single executemany.
+                self.db.execute_many(
+                    _multi_row_insert_sql(prefix, row_sql, batch),
+                    [tuple(value for row in rows[i:i + batch] for value in row) for i in range(0, full, batch)],
+                )
+            if full < len(rows):
+                tail = rows[full:]
+                self.db.execute_update(
+                    _multi_row_insert_sql(prefix, row_sql, len(tail)),
+                    tuple(value for row in tail for value in row),
+                )
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking DB call on the shared datasource executor."""
+        loop = asyncio.get_running_loop()
+        if kwargs:
+            func = partial(func, *args, **kwargs)
+            args = ()
+        return await loop.run_in_executor(_get_db_executor(), func, *args)
+
+    # ER_CHECK_NOT_IMPLEMENTED / ER_NOT_SUPPORTED_YET; Doris reports most as 1105 with a message.
+    _TRUNCATE_UNSUPPORTED_ERRNOS = {1178, 1235}
+    _TRUNCATE_UNSUPPORTED_RE = re.compile(r"not\s+(?:yet\s+)?support|unsupported", re.IGNORECASE)
+
+    @classmethod
+    def _is_truncate_unsupported(cls, exc: BaseException) -> bool:
+        errno = exc.args[0] if exc.args and isinstance(exc.args[0], int) else None
+        return errno in cls._TRUNCATE_UNSUPPORTED_ERRNOS or bool(cls._TRUNCATE_UNSUPPORTED_RE.search(str(exc)))
+
+    def _sync_target_lock(self, target_table: str) -> threading.Lock:
+        with self._sync_target_locks_guard:
+            return self._sync_target_locks.setdefault(target_table, threading.Lock())
+
+    def _clear_target_table(self, target_table: str, safe_target: str) -> None:
+        """Empty a sync target, remembering targets that do not support TRUNCATE."""
+        if target_table not in self._truncate_unsupported:
+            try:
+                self.db.execute_update(f"TRUNCATE TABLE {safe_target}")
+                return
+            except Exception as e:
+                # Only a "not supported" answer is permanent; lock waits, timeouts and the
+                # like fall back to DELETE this once and TRUNCATE is tried again next sync.
+                if self._is_truncate_unsupported(e):
+                    logger.info("TRUNCATE not supported for %s, using DELETE from now on: %s", target_table, e)
+                    self._truncate_unsupported.add(target_table)
+                else:
+                    logger.warning("TRUNCATE failed for %s, falling back to DELETE: %s", target_table, e)
+        self.db.execute_update(f"DELETE FROM {safe_target} WHERE 1=1")
+
     def _normalize_sync_strategy(self, strategy: Optional[str]) -> str:
         normalized = str(strategy or "full").strip().lower()
         if normalized not in self._SUPPORTED_SYNC_STRATEGIES:
@@ -858,12 +1192,11 @@ class DataSourceHandler:
             "forecast_ready": forecast_ready,
             "blocking_reasons": blocking_reasons,
             "warnings": warnings,
-            "checked_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "checked_at": datetime.now().isoformat(sep=' ', timespec='seconds'),
         }
 
     def upsert_metric_definition(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         metric = self._normalize_metric_definition_input(payload)
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         exists = self.db.execute_query(
             "SELECT metric_key FROM `_sys_metric_definitions` WHERE metric_key = %s LIMIT 1",
             (metric["metric_key"],),
@@ -881,7 +1214,7 @@ class DataSourceHandler:
                 aggregation = %s,
                 default_grain = %s,
                 dimensions = %s,
-                updated_at = %s
+                updated_at = NOW()
             WHERE metric_key = %s
             """
             self.db.execute_update(
@@ -896,7 +1229,6 @@ class DataSourceHandler:
                     metric["aggregation"],
                     metric["default_grain"],
                     json.dumps(metric["dimensions"], ensure_ascii=False),
-                    now,
                     metric["metric_key"],
                 ),
             )
@@ -907,7 +1239,7 @@ class DataSourceHandler:
             (`metric_key`, `display_name`, `description`, `table_name`, `time_field`,
              `value_field`, `aggregation_expression`, `aggregation`, `default_grain`,
              `dimensions`, `created_at`, `updated_at`)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
             """
             self.db.execute_update(
                 insert_sql,
@@ -922,8 +1254,6 @@ class DataSourceHandler:
                     metric["aggregation"],
                     metric["default_grain"],
                     json.dumps(metric["dimensions"], ensure_ascii=False),
-                    now,
-                    now,
                 ),
             )
             action = "created"
@@ -1189,6 +1519,80 @@ class DataSourceHandler:
             if row.get("column_name")
         }
 
+    @staticmethod
+    def _remote_table_change_mark(conn, database_name: str, source_table: str) -> Optional[Tuple[Any, Any]]:
+        """(UPDATE_TIME, server NOW()) for a source table, or None if it cannot be read."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT UPDATE_TIME, NOW()
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+                """,
+                (database_name, source_table),
+            )
+            row = cursor.fetchone()
+        except Exception as e:
+            logger.debug("could not read UPDATE_TIME for %s.%s: %s", database_name, source_table, e)
+            return None
+        finally:
+            cursor.close()
+        return tuple(row) if row else None
+
+    def _fetch_remote_schema(
+        self,
+        conn,
+        database_name: str,
+        source_table: str,
+    ) -> List[Tuple[str, str, Optional[int], Optional[int], Optional[int]]]:
+        """Return (name, data_type, precision, scale, char_length) per source column, in order."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """
+                SELECT COLUMN_NAME, DATA_TYPE, NUMERIC_PRECISION, NUMERIC_SCALE, CHARACTER_MAXIMUM_LENGTH
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+                ORDER BY ORDINAL_POSITION
+                """,
+                (database_name, source_table),
+            )
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        return [
+            (str(name), str(data_type or "").lower(), precision, scale, char_length)
+            for name, data_type, precision, scale, char_length in rows
+            if name
+        ]
+
+    def _remote_column_to_doris_type(
+        self,
+        data_type: str,
+        precision: Optional[int],
+        scale: Optional[int],
+        char_length: Optional[int],
+    ) -> str:
+        if data_type in self._REMOTE_INTEGER_TYPES:
+            return "BIGINT"
+        if data_type in ("decimal", "numeric"):
+            if precision is None:
+                return "DECIMAL(18,2)"
+            doris_precision = min(int(precision), 38)
+            doris_scale = min(int(scale or 0), doris_precision)
+            return f"DECIMAL({doris_precision},{doris_scale})"
+        if data_type in ("float", "double", "real"):
+            return "DECIMAL(18,2)"
+        if data_type in self._REMOTE_DATETIME_TYPES:
+            return "DATETIME"
+        if data_type == "date":
+            return "DATE"
+        if data_type in self._REMOTE_STRING_TYPES and char_length:
+            # Doris VARCHAR length counts bytes; MySQL counts characters (up to 4 bytes in utf8mb4).
+            return f"VARCHAR({min(int(char_length) * 4, 65533)})"
+        return "VARCHAR(500)"
+
     def _resolve_sync_execution_plan(
         self,
         *,
@@ -1286,11 +1690,14 @@ class DataSourceHandler:
         sync_task_id: Optional[str] = None,
         ingest_mode: Optional[str] = None,
         last_rows: Optional[int] = None,
+        ensure_registry: bool = True,
     ) -> Dict[str, Any]:
         """缁熶竴鏀跺彛钀借〃鍚庣殑 registry/source/analysis 璧勪骇銆?"""
         safe_table_name = (table_name or "").strip()
         if not safe_table_name:
             raise ValueError("table_name is required")
+        # The table's rows just changed, so cached LLM results for it are stale.
+        action_handler.invalidate_table(safe_table_name)
 
         assets_reset = False
         if replace_existing:
@@ -1300,12 +1707,13 @@ class DataSourceHandler:
             )
             assets_reset = True
 
+        # Batch callers pass ensure_registry=False and use bulk_ensure_table_registry.
         registry_result = self.ensure_table_registry(
             safe_table_name,
             source_type,
             display_name=display_name,
             description=description,
-        )
+        ) if ensure_registry else {}
         source_result = self.upsert_table_source(
             safe_table_name,
             source_type,
@@ -1339,7 +1747,7 @@ class DataSourceHandler:
         return self.db.execute_query(sql, (limit,))
 
     async def list_query_history_async(self, limit: int = 100) -> List[Dict[str, Any]]:
-        return await asyncio.to_thread(self.list_query_history, limit)
+        return await self._run_blocking(self.list_query_history, limit)
 
     def update_query_feedback(self, query_id: str, quality_gate: int) -> Dict[str, Any]:
         sql = """
@@ -1351,7 +1759,7 @@ class DataSourceHandler:
         return {"success": True, "id": query_id, "quality_gate": quality_gate}
 
     async def update_query_feedback_async(self, query_id: str, quality_gate: int) -> Dict[str, Any]:
-        return await asyncio.to_thread(self.update_query_feedback, query_id, quality_gate)
+        return await self._run_blocking(self.update_query_feedback, query_id, quality_gate)
 
     def create_relationship(
         self,
@@ -1364,15 +1772,14 @@ class DataSourceHandler:
         is_manual: bool = True,
     ) -> Dict[str, Any]:
         rel_id = str(uuid.uuid4())
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         sql = """
         INSERT INTO `_sys_table_relationships`
         (`id`, `table_a`, `column_a`, `table_b`, `column_b`, `rel_type`, `confidence`, `is_manual`, `created_at`)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
         """
         self.db.execute_update(
             sql,
-            (rel_id, table_a, column_a, table_b, column_b, rel_type, confidence, is_manual, now),
+            (rel_id, table_a, column_a, table_b, column_b, rel_type, confidence, is_manual),
         )
         return {
             "success": True,
@@ -1389,7 +1796,7 @@ class DataSourceHandler:
         }
 
     async def create_relationship_async(self, **kwargs) -> Dict[str, Any]:
-        return await asyncio.to_thread(self.create_relationship, **kwargs)
+        return await self._run_blocking(self.create_relationship, **kwargs)
 
     def list_relationships(self, tables: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         if tables:
@@ -1403,523 +1810,74 @@ class DataSourceHandler:
             return self.db.execute_query(sql, params)
         sql = """
         SELECT * FROM `_sys_table_relationships`
-        ORDER BY `is_manual` DESC, `confidence` DESC, `created_at` DESC
-        """
-        return self.db.execute_query(sql)
-
-    async def list_relationships_async(self, tables: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-        return await asyncio.to_thread(self.list_relationships, tables)
-
-    def ensure_query_history_vector_support(self, dimension: int = 512) -> Dict[str, Any]:
-        statements = [
-            "ALTER TABLE `_sys_query_history` ADD COLUMN `question_embedding` ARRAY<FLOAT>",
-            f"""
-            CREATE INDEX IF NOT EXISTS idx_query_history_embedding
-            ON `_sys_query_history` (`question_embedding`)
-            USING ANN PROPERTIES(
-                "index_type"="hnsw",
-                "metric_type"="inner_product",
-                "dim"="{dimension}"
-            )
-            """,
-        ]
-
-        executed = []
-        for statement in statements:
-            try:
-                self.db.execute_update(statement)
-                executed.append(statement.strip())
-            except Exception:
-                # Doris may reject duplicate ALTER/INDEX creation or ANN on UNIQUE KEY tables.
-                pass
-
-        return {"success": True, "dimension": dimension, "statements": executed}
-    
-    def _encrypt_password(self, password: str) -> str:
-        """鍔犲瘑瀵嗙爜"""
-        return self.cipher.encrypt(password.encode()).decode()
-    
-    def _decrypt_password(self, encrypted: str) -> str:
-        """瑙ｅ瘑瀵嗙爜"""
-        return self.cipher.decrypt(encrypted.encode()).decode()
-    
-    def test_connection(self, host: str, port: int, user: str, 
-                       password: str, database: str = None) -> Dict[str, Any]:
-        """娴嬭瘯鏁版嵁搴撹繛鎺?"""
-        try:
-            conn_params = {
-                'host': host,
-                'port': port,
-                'user': user,
-                'password': password,
-                'connect_timeout': 30,
-                'read_timeout': 30
-            }
-            if database:
-                conn_params['database'] = database
-                
-            conn = pymysql.connect(**conn_params)
-            cursor = conn.cursor()
-            
-            # 鑾峰彇鏁版嵁搴撳垪琛?
-            cursor.execute("SHOW DATABASES")
-            databases = [row[0] for row in cursor.fetchall()]
-            
-            cursor.close()
-            conn.close()
-            
-            return {
-                'success': True,
-                'message': '杩炴帴鎴愬姛',
-                'databases': databases
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'message': f'杩炴帴澶辫触: {str(e)}',
-                'databases': []
-            }
-    
-    def get_remote_tables(self, host: str, port: int, user: str,
-                         password: str, database: str) -> Dict[str, Any]:
-        """鑾峰彇杩滅▼鏁版嵁搴撶殑琛ㄥ垪琛?"""
-        try:
-            conn = pymysql.connect(
-                host=host, port=port, user=user,
-                password=password, database=database,
-                connect_timeout=30,
-                read_timeout=60
-            )
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            
-            # 鑾峰彇琛ㄥ垪琛ㄥ拰鍩烘湰淇℃伅
-            cursor.execute("""
-                SELECT 
-                    TABLE_NAME as name,
-                    TABLE_ROWS as row_count,
-                    TABLE_COMMENT as comment
-                FROM information_schema.TABLES 
-                WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
-            """, (database,))
-            tables = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            return {
-                'success': True,
-                'tables': tables,
-                'count': len(tables)
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e),
-                'tables': []
-            }
-
-    def preview_remote_table(self, host: str, port: int, user: str,
-                              password: str, database: str, table_name: str,
-                              limit: int = 100) -> Dict[str, Any]:
-        """棰勮杩滅▼琛ㄧ殑缁撴瀯鍜屾暟鎹?"""
-        try:
-            conn = pymysql.connect(
-                host=host, port=port, user=user,
-                password=password, database=database,
-                connect_timeout=10
-            )
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-
-            # 鑾峰彇琛ㄧ粨鏋?
-            cursor.execute(f"""
-                SELECT
-                    COLUMN_NAME as name,
-                    DATA_TYPE as type,
-                    COLUMN_TYPE as full_type,
-                    IS_NULLABLE as nullable,
-                    COLUMN_COMMENT as comment
-                FROM information_schema.COLUMNS
-                WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-                ORDER BY ORDINAL_POSITION
-            """, (database, table_name))
-            columns = cursor.fetchall()
-
-            # 鑾峰彇鍓?00琛屾暟鎹?
-            cursor.execute(f"SELECT * FROM `{table_name}` LIMIT %s", (limit,))
-            data = cursor.fetchall()
-
-            # 鑾峰彇鎬昏鏁?
-            cursor.execute(f"SELECT COUNT(*) as total FROM `{table_name}`")
-            total = cursor.fetchone()['total']
-
-            cursor.close()
-            conn.close()
-
-            return {
-                'success': True,
-                'table_name': table_name,
-                'columns': columns,
-                'data': data,
-                'total_rows': total,
-                'preview_rows': len(data)
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
-
-    def save_datasource(self, name: str, host: str, port: int,
-                       user: str, password: str, database: str) -> Dict[str, Any]:
-        """淇濆瓨鏁版嵁婧愰厤缃?"""
-        import uuid
-
-        ds_id = str(uuid.uuid4())[:8]
-        encrypted_pwd = self._encrypt_password(password)
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        sql = """
-        INSERT INTO `_sys_datasources`
-        (`id`, `name`, `host`, `port`, `user`, `password_encrypted`,
-         `database_name`, `created_at`, `updated_at`)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        self.db.execute_update(sql, (
-            ds_id, name, host, port, user, encrypted_pwd,
-            database, now, now
-        ))
-
-        return {
-            'success': True,
-            'id': ds_id,
-            'message': f'鏁版嵁婧?"{name}" 淇濆瓨鎴愬姛'
-        }
-
-    def list_datasources(self) -> List[Dict[str, Any]]:
-        """鑾峰彇鎵€鏈夋暟鎹簮"""
-        sql = """
-        SELECT id, name, host, port, user, database_name, created_at
-        FROM `_sys_datasources`
-        ORDER BY created_at DESC
-        """
-        return self.db.execute_query(sql)
-
-    def get_datasource(self, ds_id: str) -> Optional[Dict[str, Any]]:
-        """鑾峰彇鍗曚釜鏁版嵁婧愰厤缃紙鍖呭惈瑙ｅ瘑瀵嗙爜锛?"""
-        sql = "SELECT * FROM `_sys_datasources` WHERE id = %s"
-        results = self.db.execute_query(sql, (ds_id,))
-        if results:
-            ds = results[0]
-            ds['password'] = self._decrypt_password(ds['password_encrypted'])
-            del ds['password_encrypted']
-            return ds
-        return None
-
-    def delete_datasource(self, ds_id: str) -> Dict[str, Any]:
-        """鍒犻櫎鏁版嵁婧?"""
-        sql = "DELETE FROM `_sys_datasources` WHERE id = %s"
-        self.db.execute_update(sql, (ds_id,))
-        return {'success': True, 'message': '鏁版嵁婧愬凡鍒犻櫎'}
-
-    def sync_table(self, ds_id: str, source_table: str,
-                   target_table: str = None) -> Dict[str, Any]:
-        """鍚屾鍗曚釜琛?"""
-        ds = self.get_datasource(ds_id)
-        if not ds:
-            return {'success': False, 'error': '鏁版嵁婧愪笉瀛樺湪'}
-
-        if not target_table:
-            target_table = source_table
-
-        try:
-            # 杩炴帴杩滅▼鏁版嵁搴?(浣跨敤 SSCursor 瀹炵幇娴佸紡璇诲彇)
-            conn = pymysql.connect(
-                host=ds['host'], port=ds['port'],
-                user=ds['user'], password=ds['password'],
-                database=ds['database_name'],
-                connect_timeout=60,  # 澧炲姞杩炴帴瓒呮椂
-                cursorclass=pymysql.cursors.SSCursor  # 鍏抽敭锛氫娇鐢ㄦ湇鍔＄娓告爣
-            )
-
-            # 浣跨敤 chunksize 鍒嗘壒璇诲彇
-            chunk_size = 10000  # 鍑忓皬鍒嗘壒澶у皬锛岄檷浣庡唴瀛樺帇鍔?
-            total_rows_synced = 0
-            table_created_in_this_process = False
-            last_stream_load_result = None
-
-            try:
-                cursor = conn.cursor()
-                source_table_safe = f"`{source_table}`"
-                cursor.execute(f"SELECT * FROM {source_table_safe}")
-                
-                # 鑾峰彇鍒楀悕
-                columns = [col[0] for col in cursor.description]
-                
-                batch_count = 0
-                while True:
-                    rows = cursor.fetchmany(chunk_size)
-                    if not rows:
-                        break
-                    
-                    batch_count += 1
-                    # 杞崲涓?DataFrame 浠ュ鐢ㄧ幇鏈夐€昏緫
-                    df = pd.DataFrame(rows, columns=columns)
-
-                    # 娓呯悊鍒楀悕
-                    df.columns = [col.replace(' ', '_').replace('-', '_') for col in df.columns]
-
-                    # 浠呭湪绗竴鎵规妫€鏌ュ拰鍒涘缓琛?
-                    if batch_count == 1:
-                        # 妫€鏌ョ洰鏍囪〃鏄惁瀛樺湪
-                        table_exists = self.db.table_exists(target_table)
-                        if not table_exists:
-                            # 鑷姩鎺ㄦ柇鍒楃被鍨嬪苟鍒涘缓琛?
-                            column_types = {}
-                            for col in df.columns:
-                                dtype = df[col].dtype
-                                if pd.api.types.is_integer_dtype(dtype):
-                                    column_types[col] = 'BIGINT'
-                                elif pd.api.types.is_float_dtype(dtype):
-                                    column_types[col] = 'DECIMAL(18,2)'
-                                elif pd.api.types.is_datetime64_any_dtype(dtype):
-                                    column_types[col] = 'DATETIME'
-                                else:
-                                    column_types[col] = 'VARCHAR(500)'
-
-                            excel_handler.create_table(target_table, column_types)
-                            table_created_in_this_process = True
-                        else:
-                            safe_target = self.db.validate_identifier(target_table)
-                            try:
-                                self.db.execute_update(f"TRUNCATE TABLE {safe_target}")
-                            except Exception:
-                                self.db.execute_update(f"DELETE FROM {safe_target} WHERE 1=1")
-
-                    # 浣跨敤 Stream Load 瀵煎叆褰撳墠鎵规
-                    print(f"馃攧 Importing batch {batch_count} ({len(df)} rows) into {target_table}...")
-                    last_stream_load_result = excel_handler.stream_load(df, target_table)
-                    total_rows_synced += len(df)
-            
-            finally:
-                conn.close()
-            
-            if total_rows_synced == 0:
-                 return {
-                    'success': True,
-                    'message': '琛ㄤ负绌猴紝鏃犳暟鎹悓姝?',
-                    'rows_synced': 0
-                }
-
-            return {
-                'success': True,
-                'source_table': source_table,
-                'target_table': target_table,
-                'rows_synced': total_rows_synced,
-                'table_created': table_created_in_this_process,
-                'stream_load_result': last_stream_load_result
-            }
-
-        except Exception as e:
-            import traceback
-            return {
-                'success': False,
-                'error': str(e),
-                'traceback': traceback.format_exc()
-            }
-
-    def sync_multiple_tables(self, ds_id: str,
-                            tables: List[Dict[str, str]]) -> Dict[str, Any]:
-        """鍚屾澶氫釜琛?"""
-        print(f"馃摝 寮€濮嬫壒閲忓悓姝?{len(tables)} 寮犺〃, ds_id={ds_id}")
-        print(f"馃搵 tables: {tables}")
-
-        results = []
-        success_count = 0
-        fail_count = 0
-
-        for table_config in tables:
-            source = table_config.get('source_table')
-            target = table_config.get('target_table', source)
-            print(f"馃攧 鍚屾琛? {source} -> {target}")
-
-            result = self.sync_table(ds_id, source, target)
-            print(f"馃搳 鍚屾缁撴灉: {result}")
-
-            results.append({
-                'source_table': source,
-                'target_table': target,
-                **result
-            })
-
-            if result.get('success'):
-                success_count += 1
-            else:
-                fail_count += 1
-
-        print(f"鉁?鎵归噺鍚屾瀹屾垚: 鎴愬姛={success_count}, 澶辫触={fail_count}")
-        print(f"馃攳 璇︾粏缁撴灉: {json.dumps(results, indent=2, default=str)}")
-        
-        response = {
-            'success': fail_count == 0,
-            'total': len(tables),
-            'success_count': success_count,
-            'fail_count': fail_count,
-            'results': results
-        }
-
-        if fail_count > 0:
-            # 鎻愬彇绗竴涓け璐ョ殑閿欒淇℃伅浣滀负涓昏閿欒
-            failed_results = [r for r in results if not r.get('success')]
-            first_error = failed_results[0].get('error', 'Unknown error') if failed_results else 'Unknown error'
-            response['error'] = f"鍚屾瀹屾垚锛屼絾鍦?{fail_count} 寮犺〃涓彂鐢熼敊璇? {first_error}"
-            print(f"鉂?璁剧疆椤跺眰閿欒: {response['error']}")
-            
-        return response
-
-    def save_sync_task(self, ds_id: str, source_table: str,
-                       target_table: str, schedule_type: str,
-                       schedule_minute: int = 0, schedule_hour: int = 0,
-                       schedule_day_of_week: int = 1, schedule_day_of_month: int = 1,
-                       enabled_for_ai: bool = True) -> Dict[str, Any]:
-        """
-        淇濆瓨鍚屾浠诲姟閰嶇疆锛堝寮虹増锛?
-
-        Args:
-            ds_id: 鏁版嵁婧怚D
-            source_table: 婧愯〃鍚?
-            target_table: 鐩爣琛ㄥ悕
-            schedule_type: 璋冨害绫诲瀷 (hourly/daily/weekly/monthly)
-            schedule_minute: 鍒嗛挓 (0-59)
-            schedule_hour: 灏忔椂 (0-23)
-            schedule_day_of_week: 鍛ㄥ嚑 (1-7, 1=鍛ㄤ竴)
-            schedule_day_of_month: 鏃ユ湡 (1-31)
-            enabled_for_ai: 鏄惁鍚敤AI鍒嗘瀽
-        """
-        import uuid
-
-        task_id = str(uuid.uuid4())[:8]
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-        # 璁＄畻涓嬫鍚屾鏃堕棿
-        next_sync = self._calculate_next_sync_detailed(
-            schedule_type, schedule_minute, schedule_hour,
-            schedule_day_of_week, schedule_day_of_month
-        )
-
-        sql = """
-        INSERT INTO `_sys_sync_tasks`
-        (`id`, `datasource_id`, `source_table`, `target_table`,
-         `schedule_type`, `schedule_minute`, `schedule_hour`,
-         `schedule_day_of_week`, `schedule_day_of_month`,
-         `schedule_value`, `last_sync_at`, `next_sync_at`,
-         `status`, `enabled_for_ai`, `created_at`)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        self.db.execute_update(sql, (
-            task_id, ds_id, source_table, target_table or source_table,
-            schedule_type, schedule_minute, schedule_hour,
-            schedule_day_of_week, schedule_day_of_month,
-            '', now, next_sync, 'active', 1 if enabled_for_ai else 0, now
-        ))
-
-        return {
-            'success': True,
-            'task_id': task_id,
-            'next_sync_at': next_sync,
-            'schedule_description': self._get_schedule_description(
-                schedule_type, schedule_minute, schedule_hour,
-                schedule_day_of_week, schedule_day_of_month
-            )
-        }
-
-    def update_sync_task(self, task_id: str, schedule_type: str = None,
-                         schedule_minute: int = None, schedule_hour: int = None,
-                         schedule_day_of_week: int = None, schedule_day_of_month: int = None,
-                         enabled_for_ai: bool = None) -> Dict[str, Any]:
-        """鏇存柊鍚屾浠诲姟閰嶇疆"""
-        updates = []
-        params = []
-
-        if schedule_type is not None:
-            updates.append("schedule_type = %s")
-            params.append(schedule_type)
-        if schedule_minute is not None:
-            updates.append("schedule_minute = %s")
-            params.append(schedule_minute)
-        if schedule_hour is not None:
-            updates.append("schedule_hour = %s")
-            params.append(schedule_hour)
-        if schedule_day_of_week is not None:
-            updates.append("schedule_day_of_week = %s")
-            params.append(schedule_day_of_week)
-        if schedule_day_of_month is not None:
-            updates.append("schedule_day_of_month = %s")
-            params.append(schedule_day_of_month)
-        if enabled_for_ai is not None:
-            updates.append("enabled_for_ai = %s")
-            params.append(1 if enabled_for_ai else 0)
-
-        if not updates:
-            return {'success': False, 'error': '娌℃湁瑕佹洿鏂扮殑瀛楁'}
-
-        params.append(task_id)
-        sql = f"UPDATE `_sys_sync_tasks` SET {', '.join(updates)} WHERE id = %s"
-        self.db.execute_update(sql, tuple(params))
-
-        return {'success': True, 'message': '浠诲姟宸叉洿鏂?'}
+        ORDER BY `is_manual` DESC, `confidence` DESC, `created_at` DESC
+        """
+        return self.db.execute_query(sql)
 
-    def toggle_ai_enabled(self, task_id: str, enabled: bool) -> Dict[str, Any]:
-        """鍒囨崲琛ㄧ殑AI鍒嗘瀽鍚敤鐘舵€?"""
-        sql = "UPDATE `_sys_sync_tasks` SET enabled_for_ai = %s WHERE id = %s"
-        self.db.execute_update(sql, (1 if enabled else 0, task_id))
-        return {
-            'success': True,
-            'enabled_for_ai': enabled,
-            'message': ('ai_enabled' if enabled else 'ai_disabled')
-        }
+    async def list_relationships_async(self, tables: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return await self._run_blocking(self.list_relationships, tables)
 
-    def get_ai_enabled_tables(self) -> List[str]:
-        """鑾峰彇鎵€鏈夊惎鐢ˋI鍒嗘瀽鐨勮〃鍚?"""
-        sql = "SELECT DISTINCT target_table FROM `_sys_sync_tasks` WHERE enabled_for_ai = 1"
-        results = self.db.execute_query(sql)
-        return [r['target_table'] for r in results]
+    def ensure_query_history_vector_support(self, dimension: int = 512) -> Dict[str, Any]:
+        statements = [
+            "ALTER TABLE `_sys_query_history` ADD COLUMN `question_embedding` ARRAY<FLOAT>",
+            f"""
+            CREATE INDEX IF NOT EXISTS idx_query_history_embedding
+            ON `_sys_query_history` (`question_embedding`)
+            USING ANN PROPERTIES(
+                "index_type"="hnsw",
+                "metric_type"="inner_product",
+                "dim"="{dimension}"
+            )
+            """,
+        ]
 
-    def _get_schedule_description(self, schedule_type: str, minute: int, hour: int,
-                                   day_of_week: int, day_of_month: int) -> str:
-        """鐢熸垚璋冨害鎻忚堪"""
-        weekdays = ['', '鍛ㄤ竴', '鍛ㄤ簩', '鍛ㄤ笁', '鍛ㄥ洓', '鍛ㄤ簲', '鍛ㄥ叚', '鍛ㄦ棩']
-        time_str = f"{hour:02d}:{minute:02d}"
+        executed = []
+        for statement in statements:
+            try:
+                self.db.execute_update(statement)
+                executed.append(statement.strip())
+            except Exception:
+                # Doris may reject duplicate ALTER/INDEX creation or ANN on UNIQUE KEY tables.
+                pass
 
-        if schedule_type == 'hourly':
-            return f"every hour at minute {minute:02d}"
-        elif schedule_type == 'daily':
-            return f"daily at {time_str}"
-        elif schedule_type == 'weekly':
-            return f"weekly {weekdays[day_of_week]} {time_str}"
-        elif schedule_type == 'monthly':
-            return f"monthly day {day_of_month} {time_str}"
-        return schedule_type
+        return {"success": True, "dimension": dimension, "statements": executed}
+    
+    _AEAD_TOKEN_PREFIX = "gcm:"
+    # Least-recently-used remote pools beyond this many are closed.
+    _REMOTE_POOL_LIMIT = 32
 
+    def _encrypt_password(self, password: str) -> str:
+        """鍔犲瘑瀵嗙爜"""
+        if self._aead is None:
+            return self.cipher.encrypt(password.encode()).decode()
+        nonce = os.urandom(12)
+        sealed = self._aead.encrypt(nonce, password.encode(), None)
+        return self._AEAD_TOKEN_PREFIX + base64.urlsafe_b64encode(nonce + sealed).decode()
+    
+    def _decrypt_password(self, encrypted: str) -> str:
+        """瑙ｅ瘑瀵嗙爜"""
+        if encrypted.startswith(self._AEAD_TOKEN_PREFIX) and self._aead is not None:
+            raw = base64.urlsafe_b64decode(encrypted[len(self._AEAD_TOKEN_PREFIX):].encode())
+            return self._aead.decrypt(raw[:12], raw[12:], None).decode()
+        return self.cipher.decrypt(encrypted.encode()).decode()
+    
     def _calculate_next_sync_detailed(self, schedule_type: str, minute: int, hour: int,
-                                       day_of_week: int, day_of_month: int) -> str:
+                                       day_of_week: int, day_of_month: int,
+                                       now: Optional[datetime] = None) -> str:
         """璁＄畻涓嬫鍚屾鏃堕棿锛堣缁嗙増锛?"""
-        from datetime import timedelta
-
-        now = datetime.now()
+        now = now or datetime.now()
 
         if schedule_type == 'hourly':
             # 涓嬩竴涓皬鏃剁殑绗琋鍒嗛挓
             next_time = now.replace(minute=minute, second=0, microsecond=0)
             if next_time <= now:
-                next_time += timedelta(hours=1)
+                next_time += _SCHEDULE_STEP['hourly']
 
         elif schedule_type == 'daily':
             # 鏄庡ぉ鐨勬寚瀹氭椂闂?
             next_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
             if next_time <= now:
-                next_time += timedelta(days=1)
+                next_time += _SCHEDULE_STEP['daily']
 
         elif schedule_type == 'weekly':
             # 涓嬩竴涓寚瀹氬懆鍑犵殑鎸囧畾鏃堕棿
@@ -1930,50 +1888,113 @@ class DataSourceHandler:
             next_time += timedelta(days=days_ahead)
 
         elif schedule_type == 'monthly':
-            # 涓嬩釜鏈堢殑鎸囧畾鏃ユ湡鏃堕棿
-            next_time = now.replace(day=min(day_of_month, 28), hour=hour,
-                                     minute=minute, second=0, microsecond=0)
+            next_time = self._monthly_sync_time(now, day_of_month, hour, minute)
             if next_time <= now:
-                # 绉诲埌涓嬩釜鏈?
-                if now.month == 12:
-                    next_time = next_time.replace(year=now.year + 1, month=1)
-                else:
-                    next_time = next_time.replace(month=now.month + 1)
+                next_month = (now.replace(day=28) + timedelta(days=4)).replace(day=1)
+                next_time = self._monthly_sync_time(next_month, day_of_month, hour, minute)
         else:
-            next_time = now + timedelta(days=1)
+            next_time = now + _SCHEDULE_STEP['daily']
 
-        return next_time.strftime('%Y-%m-%d %H:%M:%S')
+        return next_time.isoformat(sep=' ', timespec='seconds')
+
+    @staticmethod
+    def _monthly_sync_time(anchor: datetime, day_of_month: int, hour: int, minute: int) -> datetime:
+        """Run time in ``anchor``'s month; days past the month end fall on its last day."""
+        last_day = calendar.monthrange(anchor.year, anchor.month)[1]
+        return anchor.replace(day=max(1, min(day_of_month, last_day)), hour=hour,
+                              minute=minute, second=0, microsecond=0)
 
-    def _calculate_next_sync(self, schedule_type: str) -> str:
+    def _calculate_next_sync(self, schedule_type: str, now: Optional[datetime] = None) -> str:
         """璁＄畻涓嬫鍚屾鏃堕棿锛堢畝鍖栫増锛屼繚鎸佸悜鍚庡吋瀹癸級"""
-        return self._calculate_next_sync_detailed(schedule_type, 0, 0, 1, 1)
+        return self._calculate_next_sync_detailed(schedule_type, 0, 0, 1, 1, now=now)
+
+    # Every schedule comparison and stamp uses the app's clock, bound as a parameter:
+    # next_sync_at is computed in Python, and the FE clock or time zone may differ.
+    _PENDING_TASKS_SQL = """
+    SELECT * FROM `_sys_sync_tasks`
+    WHERE status = 'active' AND next_sync_at <= %s
+    """
+    _NEXT_SYNC_TIME_SQL = """
+    SELECT MIN(next_sync_at) AS next_sync_at FROM `_sys_sync_tasks`
+    WHERE status = 'active' AND next_sync_at IS NOT NULL
+    """
+    _SCHEDULED_TASK_DONE_SQL = """
+    UPDATE `_sys_sync_tasks`
+    SET last_sync_at = %s, next_sync_at = %s
+    WHERE id = %s
+    """
+
+    def get_pending_tasks(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """鑾峰彇寰呮墽琛岀殑鍚屾浠诲姟"""
+        return self.db.execute_query(self._PENDING_TASKS_SQL, (_sync_timestamp(now or datetime.now()),))
 
-    def list_sync_tasks(self) -> List[Dict[str, Any]]:
-        """鑾峰彇鎵€鏈夊悓姝ヤ换鍔?"""
-        sql = """
-        SELECT t.*, d.name as datasource_name
-        FROM `_sys_sync_tasks` t
-        LEFT JOIN `_sys_datasources` d ON t.datasource_id = d.id
-        ORDER BY t.created_at DESC
-        """
-        return self.db.execute_query(sql)
+    def get_next_sync_time(self) -> Optional[datetime]:
+        """Earliest next_sync_at among active tasks, or None when nothing is scheduled."""
+        rows = self.db.execute_query(self._NEXT_SYNC_TIME_SQL)
+        value = rows[0].get('next_sync_at') if rows else None
+        if value in (None, ''):
+            return None
+        if isinstance(value, datetime):
+            return value
+        try:
+            return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return None
 
-    def delete_sync_task(self, task_id: str) -> Dict[str, Any]:
-        """鍒犻櫎鍚屾浠诲姟"""
-        sql = "DELETE FROM `_sys_sync_tasks` WHERE id = %s"
-        self.db.execute_update(sql, (task_id,))
-        return {'success': True, 'message': '鍚屾浠诲姟宸插垹闄?'}
+    def open_datasource_connection(self, ds_id: str):
+        """Pooled connection to a saved datasource, or None if it cannot be opened."""
+        try:
+            ds = self._get_datasource_sync(ds_id)
+            return self._get_conn(ds) if ds else None
+        except Exception as e:
+            logger.warning("could not open datasource %s: %s", ds_id, e)
+            return None
 
-    def get_pending_tasks(self) -> List[Dict[str, Any]]:
-        """鑾峰彇寰呮墽琛岀殑鍚屾浠诲姟"""
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        sql = """
-        SELECT * FROM `_sys_sync_tasks`
-        WHERE status = 'active' AND next_sync_at <= %s
+    def _next_task_sync(self, task: Dict[str, Any], now: datetime) -> str:
+        """The task's next regular run after ``now``."""
+        return self._calculate_next_sync_detailed(
+            task['schedule_type'], task.get('schedule_minute') or 0, task.get('schedule_hour') or 0,
+            task.get('schedule_day_of_week') or 1, task.get('schedule_day_of_month') or 1, now=now,
+        )
+
+    def _write_next_sync_times(self, schedule: List[Tuple[Any, str]], synced_at: Optional[str] = None) -> None:
+        """Apply (task_id, next_sync_at) pairs in a single UPDATE, stamping last_sync_at when ``synced_at`` is set."""
+        if not schedule:
+            return
+        if synced_at is not None and len(schedule) == 1:
+            task_id, next_sync = schedule[0]
+            self.db.execute_update(self._SCHEDULED_TASK_DONE_SQL, (synced_at, next_sync, task_id))
+            return
+        params = [] if synced_at is None else [synced_at]
+        params.extend(value for pair in schedule for value in pair)
+        params.extend(task_id for task_id, _ in schedule)
+        self.db.execute_update(_scheduled_tasks_done_sql(len(schedule), synced_at is not None), tuple(params))
+
+    def claim_due_tasks(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Fetch the due tasks and move their next_sync_at on before they run.
+
+        A tick that overlaps this one, or follows a crash mid-run, no longer sees
+        the same tasks as due; last_sync_at is only stamped once a run succeeds.
         """
-        return self.db.execute_query(sql, (now,))
+        now = now or datetime.now()
+        tasks = self.get_pending_tasks(now)
+        self._write_next_sync_times([(task['id'], self._next_task_sync(task, now)) for task in tasks])
+        return tasks
+
+    def mark_tasks_synced(self, tasks: List[Dict[str, Any]], now: Optional[datetime] = None) -> None:
+        """Record a run for each task and move its next_sync_at on, in a single UPDATE."""
+        now = now or datetime.now()
+        self._write_next_sync_times(
+            [(task['id'], self._next_task_sync(task, now)) for task in tasks], synced_at=_sync_timestamp(now),
+        )
 
-    def execute_scheduled_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    def defer_failed_tasks(self, tasks: List[Dict[str, Any]], now: Optional[datetime] = None) -> None:
+        """Retry failed tasks after SYNC_RETRY_BACKOFF_MINUTES, or at their next regular run if sooner."""
+        now = now or datetime.now()
+        retry_at = _sync_timestamp(now + timedelta(minutes=SYNC_RETRY_BACKOFF_MINUTES))
+        self._write_next_sync_times([(task['id'], min(self._next_task_sync(task, now), retry_at)) for task in tasks])
+
+    def execute_scheduled_task(self, task: Dict[str, Any], conn=None, record_run: bool = True) -> Dict[str, Any]:
         """鎵ц瀹氭椂浠诲姟"""
         schedule_value = safe_json_loads(task.get("schedule_value"), {})
         sync_strategy = str(schedule_value.get("sync_strategy") or "full")
@@ -1984,18 +2005,13 @@ class DataSourceHandler:
             target_table=task['target_table'],
             sync_strategy=sync_strategy,
             incremental_time_field=incremental_time_field,
+            conn=conn,
+            skip_unchanged=True,
         )
 
         # 鏇存柊浠诲姟鐘舵€?
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        next_sync = self._calculate_next_sync(task['schedule_type'])
-
-        sql = """
-        UPDATE `_sys_sync_tasks`
-        SET last_sync_at = %s, next_sync_at = %s
-        WHERE id = %s
-        """
-        self.db.execute_update(sql, (now, next_sync, task['id']))
+        if record_run:
+            self.mark_tasks_synced([task])
 
         return result
 
@@ -2004,7 +2020,7 @@ class DataSourceHandler:
     async def test_connection(self, host: str, port: int, user: str,
                               password: str, database: str = None) -> Dict[str, Any]:
         """娴嬭瘯鏁版嵁搴撹繛鎺?(寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self._test_connection_sync, host, port, user, password, database
         )
 
@@ -2047,27 +2063,32 @@ class DataSourceHandler:
     async def save_datasource(self, name: str, host: str, port: int,
                               user: str, password: str, database: str) -> Dict[str, Any]:
         """淇濆瓨鏁版嵁婧愰厤缃?(寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self._save_datasource_sync, name, host, port, user, password, database
         )
 
+    async def save_datasources_bulk(self, datasources: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Save several datasource configs in one round trip (async)."""
+        return await self._run_blocking(self._save_datasources_bulk_sync, datasources)
+
     async def list_datasources(self) -> List[Dict[str, Any]]:
         """鑾峰彇鎵€鏈夋暟鎹簮 (寮傛)"""
-        return await asyncio.to_thread(self._list_datasources_sync)
+        return await self._run_blocking(self._list_datasources_sync)
 
     async def get_datasource(self, ds_id: str) -> Optional[Dict[str, Any]]:
         """鑾峰彇鍗曚釜鏁版嵁婧愰厤缃?(寮傛)"""
-        return await asyncio.to_thread(self._get_datasource_sync, ds_id)
+        return await self._run_blocking(self._get_datasource_sync, ds_id)
 
     async def delete_datasource(self, ds_id: str) -> Dict[str, Any]:
         """鍒犻櫎鏁版嵁婧?(寮傛)"""
-        return await asyncio.to_thread(self._delete_datasource_sync, ds_id)
+        return await self._run_blocking(self._delete_datasource_sync, ds_id)
 
     async def get_remote_tables(self, host: str, port: int, user: str,
-                                password: str, database: str) -> Dict[str, Any]:
+                                password: str, database: str,
+                                offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
         """鑾峰彇杩滅▼鏁版嵁搴撶殑琛ㄥ垪琛?(寮傛)"""
-        return await asyncio.to_thread(
-            self._get_remote_tables_sync, host, port, user, password, database
+        return await self._run_blocking(
+            self._get_remote_tables_sync, host, port, user, password, database, offset, limit
         )
 
     async def sync_table(self, ds_id: str, source_table: str,
@@ -2076,7 +2097,7 @@ class DataSourceHandler:
                          incremental_start: Optional[str] = None,
                          incremental_end: Optional[str] = None) -> Dict[str, Any]:
         """鍚屾鍗曚釜琛?(寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self._sync_table_sync_v2,
             ds_id,
             source_table,
@@ -2090,13 +2111,13 @@ class DataSourceHandler:
     async def sync_multiple_tables(self, ds_id: str,
                                    tables: List[Dict[str, Any]]) -> Dict[str, Any]:
         """鍚屾澶氫釜琛?(寮傛)"""
-        return await asyncio.to_thread(self._sync_multiple_tables_sync, ds_id, tables)
+        return await self._run_blocking(self._sync_multiple_tables_sync, ds_id, tables)
 
     async def preview_remote_table(self, host: str, port: int, user: str,
                                    password: str, database: str, table_name: str,
                                    limit: int = 100) -> Dict[str, Any]:
         """棰勮杩滅▼琛ㄧ殑缁撴瀯鍜屾暟鎹?(寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self._preview_remote_table_sync, host, port, user, password, database, table_name, limit
         )
 
@@ -2107,68 +2128,72 @@ class DataSourceHandler:
                              enabled_for_ai: bool = True, sync_strategy: str = "full",
                              incremental_time_field: Optional[str] = None) -> Dict[str, Any]:
         """淇濆瓨鍚屾浠诲姟閰嶇疆 (寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self._save_sync_task_sync, ds_id, source_table, target_table, schedule_type,
             schedule_minute, schedule_hour, schedule_day_of_week, schedule_day_of_month,
             enabled_for_ai, sync_strategy, incremental_time_field
         )
 
+    async def save_sync_tasks_bulk(self, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Save several sync task configs in one round trip (async)."""
+        return await self._run_blocking(self._save_sync_tasks_bulk_sync, tasks)
+
     async def update_sync_task(self, task_id: str, schedule_type: str,
                                schedule_minute: int = 0, schedule_hour: int = 0,
                                schedule_day_of_week: int = 1, schedule_day_of_month: int = 1,
                                enabled_for_ai: bool = True) -> Dict[str, Any]:
         """鏇存柊鍚屾浠诲姟閰嶇疆 (寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self._update_sync_task_sync, task_id, schedule_type,
             schedule_minute, schedule_hour, schedule_day_of_week, schedule_day_of_month, enabled_for_ai
         )
 
     async def toggle_ai_enabled(self, task_id: str, enabled: bool) -> Dict[str, Any]:
         """鍒囨崲浠诲姟鐨凙I鍚敤鐘舵€?(寮傛)"""
-        return await asyncio.to_thread(self._toggle_ai_enabled_sync, task_id, enabled)
+        return await self._run_blocking(self._toggle_ai_enabled_sync, task_id, enabled)
 
     async def list_sync_tasks(self) -> List[Dict[str, Any]]:
         """鑾峰彇鎵€鏈夊悓姝ヤ换鍔?(寮傛)"""
-        return await asyncio.to_thread(self._list_sync_tasks_sync)
+        return await self._run_blocking(self._list_sync_tasks_sync)
 
     async def get_ai_enabled_tables(self) -> List[str]:
         """鑾峰彇鎵€鏈夊惎鐢ˋI鐨勮〃鍚?(寮傛)"""
-        return await asyncio.to_thread(self._get_ai_enabled_tables_sync)
+        return await self._run_blocking(self._get_ai_enabled_tables_sync)
 
     async def delete_sync_task(self, task_id: str) -> Dict[str, Any]:
         """鍒犻櫎鍚屾浠诲姟 (寮傛)"""
-        return await asyncio.to_thread(self._delete_sync_task_sync, task_id)
+        return await self._run_blocking(self._delete_sync_task_sync, task_id)
 
     async def list_table_registry(self, table_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """鑾峰彇琛ㄦ敞鍐屽垪琛?(寮傛)"""
-        return await asyncio.to_thread(self._list_table_registry_sync, table_names)
+        return await self._run_blocking(self._list_table_registry_sync, table_names)
 
     async def list_query_catalog(self) -> List[Dict[str, Any]]:
         """鑾峰彇涓氬姟璇箟鏌ヨ鐩綍 (寮傛)"""
-        return await asyncio.to_thread(self._build_query_catalog_sync)
+        return await self._run_blocking(self._build_query_catalog_sync)
 
     async def list_foundation_tables(
         self,
         table_names: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
         """鑾峰彇绋冲畾鐨勫熀纭€灞傝〃鑱氬悎瑙嗗浘 (寮傛)銆?"""
-        return await asyncio.to_thread(self._list_foundation_tables_sync, table_names)
+        return await self._run_blocking(self._list_foundation_tables_sync, table_names)
 
     async def upsert_metric_definition_async(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """鍒涘缓鎴栨洿鏂版寚鏍囧畾涔?(寮傛)銆?"""
-        return await asyncio.to_thread(self.upsert_metric_definition, payload)
+        return await self._run_blocking(self.upsert_metric_definition, payload)
 
     async def get_metric_definition_async(self, metric_key: str) -> Optional[Dict[str, Any]]:
         """鑾峰彇鎸囨爣瀹氫箟 (寮傛)銆?"""
-        return await asyncio.to_thread(self.get_metric_definition, metric_key)
+        return await self._run_blocking(self.get_metric_definition, metric_key)
 
     async def list_metric_definitions_async(self, only_forecast_ready: bool = False) -> List[Dict[str, Any]]:
         """鑾峰彇鎸囨爣瀹氫箟鍒楄〃 (寮傛)銆?"""
-        return await asyncio.to_thread(self.list_metric_definitions, only_forecast_ready)
+        return await self._run_blocking(self.list_metric_definitions, only_forecast_ready)
 
     async def delete_metric_definition_async(self, metric_key: str) -> Dict[str, Any]:
         """鍒犻櫎鎸囨爣瀹氫箟 (寮傛)銆?"""
-        return await asyncio.to_thread(self.delete_metric_definition, metric_key)
+        return await self._run_blocking(self.delete_metric_definition, metric_key)
 
     async def get_metric_series_async(
         self,
@@ -2181,7 +2206,7 @@ class DataSourceHandler:
         limit: int = 5000,
     ) -> Dict[str, Any]:
         """鎸夋寚鏍囧畾涔夎鍙栨椂闂村簭鍒楃偣鍒?(寮傛)銆?"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self.get_metric_series,
             metric_key,
             start_time=start_time,
@@ -2193,19 +2218,19 @@ class DataSourceHandler:
 
     async def get_table_profile_async(self, table_name: str) -> Optional[Dict[str, Any]]:
         """鑾峰彇鍗曡〃鍩虹灞傜敾鍍?(寮傛)銆?"""
-        return await asyncio.to_thread(self.get_table_profile, table_name)
+        return await self._run_blocking(self.get_table_profile, table_name)
 
     async def list_relationship_models_async(
         self,
         tables: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
         """鑾峰彇绋冲畾鍏崇郴璇诲彇妯″瀷 (寮傛)銆?"""
-        return await asyncio.to_thread(self.list_relationship_models, tables)
+        return await self._run_blocking(self.list_relationship_models, tables)
 
     async def update_table_registry(self, table_name: str, display_name: str = None,
                                     description: str = None) -> Dict[str, Any]:
         """鏇存柊琛ㄦ敞鍐屼俊鎭?(寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self._update_table_registry_sync, table_name, display_name, description
         )
 
@@ -2215,7 +2240,7 @@ class DataSourceHandler:
         clear_relationships: bool = True,
     ) -> Dict[str, Any]:
         """娓呯悊琛ㄧ殑娲剧敓鍒嗘瀽璧勪骇 (寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self._reset_table_analysis_assets_sync,
             table_name,
             clear_relationships,
@@ -2228,7 +2253,7 @@ class DataSourceHandler:
         cleanup_history: bool = True,
     ) -> Dict[str, Any]:
         """鍒犻櫎宸叉敞鍐岃〃鍙婂叾娲剧敓璧勪骇 (寮傛)"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self.delete_registered_table,
             table_name,
             drop_physical,
@@ -2242,7 +2267,7 @@ class DataSourceHandler:
         **kwargs,
     ) -> Dict[str, Any]:
         """缁熶竴鏀跺彛钀借〃鍚庣殑 registry/source/analysis 璧勪骇 (寮傛)銆?"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self.finalize_table_ingestion,
             table_name,
             source_type,
@@ -2257,7 +2282,7 @@ class DataSourceHandler:
         analyzed_at: Optional[str] = None,
     ) -> Dict[str, Any]:
         """鏇存柊琛ㄥ垎鏋愮姸鎬?(寮傛)銆?"""
-        return await asyncio.to_thread(
+        return await self._run_blocking(
             self.mark_table_analysis_status,
             table_name,
             status,
@@ -2266,30 +2291,45 @@ class DataSourceHandler:
 
     async def ensure_table_registry_async(self, table_name: str, source_type: str) -> Dict[str, Any]:
         """纭繚琛ㄦ敞鍐屽瓨鍦?(寮傛)"""
-        return await asyncio.to_thread(self.ensure_table_registry, table_name, source_type)
+        return await self._run_blocking(self.ensure_table_registry, table_name, source_type)
 
     # ============ 鍚屾鏂规硶鍒悕 (渚涘紓姝ユ柟娉曡皟鐢? ============
     # 杩欎簺鍒悕璁╁紓姝ュ寘瑁呭櫒鍙互璋冪敤鍘熸湁鐨勫悓姝ユ柟娉?
 
+    _DATASOURCE_INSERT_PREFIX = """INSERT INTO `_sys_datasources`
+        (`id`, `name`, `host`, `port`, `user`, `password_encrypted`,
+         `database_name`, `created_at`, `updated_at`)
+        VALUES """
+    _DATASOURCE_VALUES_ROW = "(%s, %s, %s, %s, %s, %s, %s, NOW(), NOW())"
+
     def _save_datasource_sync(self, name, host, port, user, password, database):
         """淇濆瓨鏁版嵁婧愰厤缃?(鍚屾)"""
-        import uuid
-        ds_id = str(uuid.uuid4())[:8]
+        ds_id = _new_record_id()
         encrypted_pwd = self._encrypt_password(password)
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        sql = """
-        INSERT INTO `_sys_datasources`
-        (`id`, `name`, `host`, `port`, `user`, `password_encrypted`,
-         `database_name`, `created_at`, `updated_at`)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        self.db.execute_update(sql, (
-            ds_id, name, host, port, user, encrypted_pwd,
-            database, now, now
+        self.db.execute_update(_multi_row_insert_sql(self._DATASOURCE_INSERT_PREFIX, self._DATASOURCE_VALUES_ROW, 1), (
+            ds_id, name, host, port, user, encrypted_pwd, database
         ))
+        self._invalidate_datasource_cache(ds_id)
         return {'success': True, 'id': ds_id, 'message': f'鏁版嵁婧?"{name}" 淇濆瓨鎴愬姛'}
 
+    def _save_datasources_bulk_sync(self, datasources: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Persist many datasource configs with batched multi-row INSERTs."""
+        if not datasources:
+            return {'success': True, 'count': 0, 'ids': []}
+        ids: List[str] = []
+        rows: List[tuple] = []
+        for item in datasources:
+            ds_id = _new_record_id()
+            ids.append(ds_id)
+            rows.append((
+                ds_id, item['name'], item['host'], item['port'], item['user'],
+                self._encrypt_password(item['password']), item['database'],
+            ))
+        self._insert_rows(self._DATASOURCE_INSERT_PREFIX, self._DATASOURCE_VALUES_ROW, rows)
+        self._invalidate_datasource_cache()
+        return {'success': True, 'count': len(ids), 'ids': ids}
+
     def _list_datasources_sync(self):
         """鑾峰彇鎵€鏈夋暟鎹簮 (鍚屾)"""
         sql = """
@@ -2297,160 +2337,155 @@ class DataSourceHandler:
         FROM `_sys_datasources`
         ORDER BY created_at DESC
         """
-        return self.db.execute_query(sql)
+        with self._ds_cache_lock:
+            rows = self._ds_list_cache.get("rows")
+        if rows is None:
+            rows = self.db.execute_query(sql)
+            with self._ds_cache_lock:
+                self._ds_list_cache["rows"] = rows
+        return [dict(row) for row in rows]
 
     def _get_datasource_sync(self, ds_id):
         """鑾峰彇鍗曚釜鏁版嵁婧愰厤缃?(鍚屾)"""
+        with self._ds_cache_lock:
+            cached = self._ds_cache.get(ds_id)
+        if cached is not None:
+            return dict(cached)
         sql = "SELECT * FROM `_sys_datasources` WHERE id = %s"
         results = self.db.execute_query(sql, (ds_id,))
         if results:
             ds = results[0]
             ds['password'] = self._decrypt_password(ds['password_encrypted'])
             del ds['password_encrypted']
+            with self._ds_cache_lock:
+                self._ds_cache[ds_id] = dict(ds)
             return ds
         return None
 
+    def _invalidate_datasource_cache(self, ds_id=None) -> None:
+        with self._ds_cache_lock:
+            if ds_id is not None:
+                self._ds_cache.pop(ds_id, None)
+            self._ds_names_cache.clear()
+            self._ds_list_cache.clear()
+
+    def _invalidate_ai_tables_cache(self) -> None:
+        with self._ai_tables_cache_lock:
+            self._ai_tables_cache.clear()
+
+    def _get_datasource_names_sync(self) -> Dict[str, Any]:
+        with self._ds_cache_lock:
+            names = self._ds_names_cache.get("names")
+        if names is None:
+            rows = self.db.execute_query("SELECT id, name FROM `_sys_datasources`")
+            names = {row['id']: row.get('name') for row in rows}
+            with self._ds_cache_lock:
+                self._ds_names_cache["names"] = names
+        return names
+
     def _delete_datasource_sync(self, ds_id):
         """鍒犻櫎鏁版嵁婧?(鍚屾)"""
+        self._invalidate_remote_pool(self._get_datasource_sync(ds_id))
         sql = "DELETE FROM `_sys_datasources` WHERE id = %s"
         self.db.execute_update(sql, (ds_id,))
+        self._invalidate_datasource_cache(ds_id)
         return {'success': True, 'message': '鏁版嵁婧愬凡鍒犻櫎'}
 
-    def _get_remote_tables_sync(self, host, port, user, password, database):
+    def _get_remote_tables_sync(self, host, port, user, password, database, offset=0, limit=None):
         """鑾峰彇杩滅▼鏁版嵁搴撶殑琛ㄥ垪琛?(鍚屾)"""
+        offset = max(0, int(offset or 0))
+        limit = int(limit) if limit is not None else None
+        cache_key = (host, int(port), user, password, database, offset, limit)
+        with self._remote_tables_cache_lock:
+            cached = self._remote_tables_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
         try:
-            conn = pymysql.connect(
-                host=host, port=port, user=user,
-                password=password, database=database,
-                connect_timeout=30,
-                read_timeout=60
-            )
-            cursor = conn.cursor(pymysql.cursors.DictCursor)
-            cursor.execute("""
+            sql = """
                 SELECT 
                     TABLE_NAME as name,
                     TABLE_ROWS as row_count,
                     TABLE_COMMENT as comment
                 FROM information_schema.TABLES 
                 WHERE TABLE_SCHEMA = %s AND TABLE_TYPE = 'BASE TABLE'
-            """, (database,))
+                ORDER BY TABLE_NAME
+            """
+            params: List[Any] = [database]
+            if limit is not None:
+                sql += " LIMIT %s OFFSET %s"
+                params.extend([max(0, limit), offset])
+            conn = self._get_remote_connection(host, port, user, password, database)
+            cursor = conn.cursor(pymysql.cursors.DictCursor)
+            cursor.execute(sql, tuple(params))
             tables = cursor.fetchall()
             cursor.close()
             conn.close()
-            return {'success': True, 'tables': tables, 'count': len(tables)}
+            result = {'success': True, 'tables': tables, 'count': len(tables), 'offset': offset, 'limit': limit}
+            with self._remote_tables_cache_lock:
+                self._remote_tables_cache[cache_key] = result
+            return dict(result)
         except Exception as e:
             return {'success': False, 'error': str(e), 'tables': []}
 
-    def _sync_table_sync(self, ds_id, source_table, target_table=None):
-        """鍚屾鍗曚釜琛?(鍚屾) - 浣跨敤 SSCursor 娴佸紡鍒嗘壒璇诲彇锛岄伩鍏嶅ぇ琛?OOM 鍜岃秴鏃?"""
-        ds = self._get_datasource_sync(ds_id)
-        if not ds:
-            return {'success': False, 'error': '鏁版嵁婧愪笉瀛樺湪'}
-
-        if not target_table:
-            target_table = source_table
+    @staticmethod
+    @contextmanager
+    def _text_passthrough(conn, enabled: bool = True):
+        """Leave result cells as undecoded server text for queries executed in the block.
 
+        pymysql picks per-column converters when the result header is read, so the
+        decoders only need swapping around ``execute``; later fetches keep text.
+        """
+        raw = conn if enabled else None
+        while raw is not None and not isinstance(raw, pymysql.connections.Connection):
+            raw = getattr(raw, '_con', None)
+        if raw is None:
+            yield
+            return
+        saved_decoders = raw.decoders
+        raw.decoders = {}
         try:
-            conn = pymysql.connect(
-                host=ds['host'], port=ds['port'],
-                user=ds['user'], password=ds['password'],
-                database=ds['database_name'],
-                connect_timeout=DB_CONNECT_TIMEOUT,
-                read_timeout=DB_READ_TIMEOUT,
-                write_timeout=DB_WRITE_TIMEOUT,
-                cursorclass=pymysql.cursors.SSCursor,
-            )
-
-            chunk_size = 10000
-            total_rows_synced = 0
-            table_created_in_this_process = False
-            last_stream_load_result = None
-
-            try:
-                cursor = conn.cursor()
-                cursor.execute(f"SELECT * FROM `{source_table}`")
-                columns = [col[0] for col in cursor.description]
-
-                batch_count = 0
-                while True:
-                    rows = cursor.fetchmany(chunk_size)
-                    if not rows:
-                        break
-
-                    batch_count += 1
-                    df = pd.DataFrame(rows, columns=columns)
-                    df.columns = [col.replace(' ', '_').replace('-', '_') for col in df.columns]
-
-                    if batch_count == 1:
-                        table_exists = self.db.table_exists(target_table)
-                        if not table_exists:
-                            column_types = {}
-                            for col in df.columns:
-                                dtype = df[col].dtype
-                                if pd.api.types.is_integer_dtype(dtype):
-                                    column_types[col] = 'BIGINT'
-                                elif pd.api.types.is_float_dtype(dtype):
-                                    column_types[col] = 'DECIMAL(18,2)'
-                                elif pd.api.types.is_datetime64_any_dtype(dtype):
-                                    column_types[col] = 'DATETIME'
-                                else:
-                                    column_types[col] = 'VARCHAR(500)'
-                            excel_handler.create_table(target_table, column_types)
-                            table_created_in_this_process = True
-                        else:
-                            safe_target = self.db.validate_identifier(target_table)
-                            try:
-                                self.db.execute_update(f"TRUNCATE TABLE {safe_target}")
-                            except Exception:
-                                self.db.execute_update(f"DELETE FROM {safe_target} WHERE 1=1")
-
-                    print(f"馃攧 Importing batch {batch_count} ({len(df)} rows) into {target_table}...")
-                    last_stream_load_result = excel_handler.stream_load(df, target_table)
-                    total_rows_synced += len(df)
-
-            finally:
-                conn.close()
+            yield
+        finally:
+            raw.decoders = saved_decoders
 
-            table_replaced = not table_created_in_this_process
-            should_finalize = total_rows_synced > 0 or self.db.table_exists(target_table)
-            finalize_result = None
-            if should_finalize:
-                finalize_result = self.finalize_table_ingestion(
-                    target_table,
-                    "database_sync",
-                    replace_existing=table_replaced,
-                    clear_relationships=True,
-                    origin_kind="datasource",
-                    origin_id=ds_id,
-                    origin_label=ds.get("name") or ds_id,
-                    origin_path=f"{ds.get('host')}:{ds.get('port')}/{ds.get('database_name')}",
-                    origin_table=source_table,
-                    ingest_mode="replace",
-                    last_rows=total_rows_synced,
-                )
+    def _pipeline_stream_load(self, frames: Iterable[Any], target_table: str) -> Dict[str, Any]:
+        """Stream Load batches on a worker thread while the caller keeps reading the source.
 
-            if total_rows_synced == 0:
-                return {
-                    'success': True,
-                    'message': '琛ㄤ负绌猴紝鏃犳暟鎹悓姝?',
-                    'source_table': source_table,
-                    'target_table': target_table,
-                    'rows_synced': 0,
-                    'table_created': table_created_in_this_process,
-                    'table_replaced': table_replaced,
-                    'ingestion': finalize_result,
-                }
+        Batches are either DataFrames or lists of raw row tuples; the latter skip pandas.
+        """
+        batches: "queue.Queue[Any]" = queue.Queue(maxsize=2)
+        state: Dict[str, Any] = {"rows": 0, "last_result": None, "error": None}
+
+        def _consume():
+            while True:
+                df = batches.get()
+                if df is None:
+                    return
+                if state["error"] is not None:
+                    continue
+                try:
+                    if isinstance(df, pd.DataFrame):
+                        state["last_result"] = excel_handler.stream_load(df, target_table)
+                    else:
+                        state["last_result"] = excel_handler.stream_load_rows(df, target_table)
+                    state["rows"] += len(df)
+                except Exception as exc:
+                    state["error"] = exc
+
+        worker = threading.Thread(target=_consume, name=f"stream-load-{target_table}", daemon=True)
+        worker.start()
+        try:
+            for df in frames:
+                if state["error"] is not None:
+                    break
+                batches.put(df)
+        finally:
+            batches.put(None)
+            worker.join()
 
-            return {
-                'success': True, 'source_table': source_table, 'target_table': target_table,
-                'rows_synced': total_rows_synced, 'table_created': table_created_in_this_process,
-                'table_replaced': table_replaced,
-                'stream_load_result': last_stream_load_result,
-                'ingestion': finalize_result,
-            }
-        except Exception as e:
-            import traceback
-            return {'success': False, 'error': str(e), 'traceback': traceback.format_exc()}
+        if state["error"] is not None:
+            raise state["error"]
+        return state
 
     def _sync_table_sync_v2(
         self,
@@ -2461,8 +2496,27 @@ class DataSourceHandler:
         incremental_time_field: Optional[str] = None,
         incremental_start: Optional[str] = None,
         incremental_end: Optional[str] = None,
+        conn=None,
+        skip_unchanged: bool = False,
+        defer_registry: bool = False,
+        retry_on_disconnect: bool = True,
     ):
-        """V2 sync implementation with full/incremental strategy support."""
+        """V2 sync implementation with full/incremental strategy support.
+
+        A caller-provided ``conn`` (e.g. one shared across tasks on the same
+        datasource) is used as-is and left open; otherwise one is taken from the
+        datasource pool and closed here.
+
+        With ``skip_unchanged`` the source's UPDATE_TIME is compared with the value
+        seen at the start of the previous successful sync, and an unchanged table
+        is skipped without being scanned.
+
+        With ``defer_registry`` the ``_sys_table_registry`` write is left to the
+        caller, which batches it across tables.
+
+        A sync that fails because the remote connection dropped is retried once
+        on a freshly checked-out connection.
+        """
         ds = self._get_datasource_sync(ds_id)
         if not ds:
             return {'success': False, 'error': 'datasource_not_found'}
@@ -2476,22 +2530,37 @@ class DataSourceHandler:
             return {'success': False, 'error': str(strategy_error)}
 
         try:
-            conn = pymysql.connect(
-                host=ds['host'], port=ds['port'],
-                user=ds['user'], password=ds['password'],
-                database=ds['database_name'],
-                connect_timeout=DB_CONNECT_TIMEOUT,
-                read_timeout=DB_READ_TIMEOUT,
-                write_timeout=DB_WRITE_TIMEOUT,
-                cursorclass=pymysql.cursors.SSCursor,
-            )
+            owns_conn = conn is None
+            if owns_conn:
+                conn = self._get_conn(ds)
 
-            chunk_size = 10000
             total_rows_synced = 0
             table_created_in_this_process = False
             last_stream_load_result = None
             target_table_exists = self.db.table_exists(target_table)
             target_table_preexisting = bool(target_table_exists)
+
+            change_key = (ds_id, source_table, target_table)
+            change_mark = None
+            if skip_unchanged:
+                change_mark = self._remote_table_change_mark(conn, ds['database_name'], source_table)
+                source_updated_at = change_mark[0] if change_mark else None
+                if (
+                    target_table_exists
+                    and source_updated_at is not None
+                    and self._source_change_marks.get(change_key) == source_updated_at
+                ):
+                    if owns_conn:
+                        conn.close()
+                    return {
+                        'success': True,
+                        'skipped': True,
+                        'message': 'source table unchanged since last sync',
+                        'source_table': source_table,
+                        'target_table': target_table,
+                        'rows_synced': 0,
+                    }
+
             source_columns = self._get_remote_source_columns_sync(conn, ds['database_name'], source_table)
             sync_plan = self._resolve_sync_execution_plan(
                 requested_strategy=requested_strategy,
@@ -2571,56 +2640,116 @@ class DataSourceHandler:
                 source_order_sql = f" ORDER BY CAST({safe_source_time_field} AS DATETIME) ASC"
 
             source_where_sql = f" WHERE {' AND '.join(source_where_clauses)}" if source_where_clauses else ""
-            source_sql = f"SELECT * FROM {safe_source_table}{source_where_sql}{source_order_sql}"
-
+            # Name the catalog columns explicitly so the positional Stream Load
+            # mapping does not depend on how the source expands '*'.
+            # The names come from information_schema, so escaping backticks is enough.
+            select_list = ", ".join(
+                "`" + column_name.replace("`", "``") + "`" for column_name in source_columns
+            ) or "*"
+            source_sql = f"SELECT {select_list} FROM {safe_source_table}{source_where_sql}{source_order_sql}"
+
+            cursor = None
+            shadow_table: Optional[str] = None
+            target_lock = self._sync_target_lock(target_table)
+            target_lock.acquire()
             try:
                 if effective_strategy == "full" and target_table_preexisting:
                     safe_target = self.db.validate_identifier(target_table)
-                    try:
-                        self.db.execute_update(f"TRUNCATE TABLE {safe_target}")
-                    except Exception:
-                        self.db.execute_update(f"DELETE FROM {safe_target} WHERE 1=1")
-
-                cursor = conn.cursor()
-                if source_query_params:
-                    cursor.execute(source_sql, tuple(source_query_params))
-                else:
-                    cursor.execute(source_sql)
-                columns = [col[0] for col in cursor.description]
-
-                batch_count = 0
-                while True:
-                    rows = cursor.fetchmany(chunk_size)
-                    if not rows:
-                        break
-
-                    batch_count += 1
-                    df = pd.DataFrame(rows, columns=columns)
-                    df.columns = [col.replace(' ', '_').replace('-', '_') for col in df.columns]
+                    if SYNC_ATOMIC_REPLACE:
+                        # Reload into a copy and swap it in at the end, so readers keep seeing
+                        # the previous contents instead of an empty table during the sync.
+                        # Each run gets its own shadow, so runs from other workers cannot
+                        # drop or load into it.
+                        shadow_table = f"{target_table}{self._SYNC_SHADOW_SUFFIX}_{uuid.uuid4().hex[:8]}"
+                        safe_shadow = self.db.validate_identifier(shadow_table)
+                        self.db.execute_update(f"CREATE TABLE {safe_shadow} LIKE {safe_target}")
+                    else:
+                        self._clear_target_table(target_table, safe_target)
+
+                # DDL types come from the source catalog, so creating the target never
+                # needs a pandas pass over the data. This has to run before the
+                # unbuffered SSCursor query below takes over the connection.
+                remote_column_types: Dict[str, str] = {}
+                if not target_table_exists:
+                    remote_column_types = {
+                        name.translate(self._SYNC_COLUMN_NAME_TRANSLATION): self._remote_column_to_doris_type(
+                            data_type, precision, scale, char_length
+                        )
+                        for name, data_type, precision, scale, char_length in self._fetch_remote_schema(
+                            conn, ds['database_name'], source_table
+                        )
+                    }
 
-                    if batch_count == 1:
+                cursor = conn.cursor(pymysql.cursors.SSCursor)
+                # Once the target's types are known, cells only need to become CSV text,
+                # so skip pymysql's datetime/Decimal conversion and keep the server's text.
+                with self._text_passthrough(conn, enabled=bool(target_table_exists or remote_column_types)):
+                    if source_query_params:
+                        cursor.execute(source_sql, tuple(source_query_params))
+                    else:
+                        cursor.execute(source_sql)
+                target_columns = [
+                    str(col[0]).translate(self._SYNC_COLUMN_NAME_TRANSLATION) for col in cursor.description
+                ]
+
+                def _iter_batches():
+                    nonlocal table_created_in_this_process, target_table_exists
+                    batch_count = 0
+                    while True:
+                        rows = cursor.fetchmany(STREAM_LOAD_BATCH_ROWS)
+                        if not rows:
+                            return
+
+                        batch_count += 1
+                        logger.debug("棣冩敡 Importing batch %s (%s rows) into %s...", batch_count, len(rows), target_table)
                         if not target_table_exists:
-                            column_types = {}
-                            for col in df.columns:
-                                dtype = df[col].dtype
-                                if pd.api.types.is_integer_dtype(dtype):
-                                    column_types[col] = 'BIGINT'
-                                elif pd.api.types.is_float_dtype(dtype):
-                                    column_types[col] = 'DECIMAL(18,2)'
-                                elif pd.api.types.is_datetime64_any_dtype(dtype):
-                                    column_types[col] = 'DATETIME'
-                                else:
-                                    column_types[col] = 'VARCHAR(500)'
+                            if remote_column_types:
+                                column_types = {
+                                    col: remote_column_types.get(col, 'VARCHAR(500)') for col in target_columns
+                                }
+                            else:
+                                # No catalog entry (e.g. no information_schema access): infer
+                                # column types with pandas from a sample of the first batch.
+                                sample = pd.DataFrame(rows[:self._SYNC_DTYPE_SAMPLE_ROWS], columns=target_columns)
+                                kind_to_type = self._SYNC_KIND_TO_DORIS_TYPE
+                                column_types = {
+                                    col: kind_to_type.get(dtype.kind, 'VARCHAR(500)')
+                                    for col, dtype in sample.dtypes.items()
+                                }
                             excel_handler.create_table(target_table, column_types)
                             table_created_in_this_process = True
                             target_table_exists = True
 
-                    print(f"棣冩敡 Importing batch {batch_count} ({len(df)} rows) into {target_table}...")
-                    last_stream_load_result = excel_handler.stream_load(df, target_table)
-                    total_rows_synced += len(df)
+                        # Raw tuples go straight to Stream Load; no DataFrame per batch.
+                        yield rows
+
+                # Reads keep going while the previous batch is Stream Loaded; at most two
+                # batches are buffered, so memory stays O(batch) instead of O(table).
+                load_state = self._pipeline_stream_load(_iter_batches(), shadow_table or target_table)
+                last_stream_load_result = load_state["last_result"]
+                total_rows_synced = load_state["rows"]
+                if shadow_table:
+                    # REPLACE WITH is a single metadata operation: the old data is dropped
+                    # and the shadow takes over the target's name atomically.
+                    self.db.execute_update(
+                        f"ALTER TABLE {safe_target} REPLACE WITH TABLE {safe_shadow} "
+                        "PROPERTIES('swap' = 'false')"
+                    )
+                    shadow_table = None
 
             finally:
-                conn.close()
+                # SSCursor.close() drains any unread rows so the pooled connection
+                # goes back to the pool in a clean protocol state.
+                if cursor is not None:
+                    cursor.close()
+                if owns_conn:
+                    conn.close()
+                if shadow_table:
+                    try:
+                        self.db.execute_update(f"DROP TABLE IF EXISTS {safe_shadow}")
+                    except Exception as drop_error:
+                        logger.warning("Failed to drop shadow table %s: %s", shadow_table, drop_error)
+                target_lock.release()
 
             table_replaced = bool(
                 effective_strategy == "full"
@@ -2642,8 +2771,16 @@ class DataSourceHandler:
                     origin_table=source_table,
                     ingest_mode="incremental" if effective_strategy == "incremental" else "replace",
                     last_rows=total_rows_synced,
+                    ensure_registry=not defer_registry,
                 )
 
+            # UPDATE_TIME has one-second resolution, so a mark taken in the same second
+            # as a write could hide that write; only remember marks from earlier seconds.
+            if change_mark and change_mark[0] is not None and change_mark[0] < change_mark[1]:
+                self._source_change_marks[change_key] = change_mark[0]
+            else:
+                self._source_change_marks.pop(change_key, None)
+
             capability = {
                 "requested_strategy": requested_strategy,
                 "effective_strategy": effective_strategy,
@@ -2684,31 +2821,70 @@ class DataSourceHandler:
                 'ingestion': finalize_result,
             }
         except Exception as e:
-            import traceback
+            if retry_on_disconnect and self._is_connection_lost(e):
+                # The pool pings on checkout, so a second attempt gets a live connection.
+                logger.warning("remote connection lost while syncing %s, retrying once: %s", source_table, e)
+                return self._sync_table_sync_v2(
+                    ds_id, source_table, target_table, sync_strategy, incremental_time_field,
+                    incremental_start, incremental_end,
+                    skip_unchanged=skip_unchanged, defer_registry=defer_registry, retry_on_disconnect=False,
+                )
             return {'success': False, 'error': str(e), 'traceback': traceback.format_exc()}
 
+    _CONNECTION_LOST_ERRNOS = {2006, 2013, 2055}  # server gone away / lost during query / lost at handshake
+
+    @classmethod
+    def _is_connection_lost(cls, exc: BaseException) -> bool:
+        if isinstance(exc, pymysql.err.InterfaceError):
+            return True
+        return (
+            isinstance(exc, pymysql.err.OperationalError)
+            and bool(exc.args)
+            and exc.args[0] in cls._CONNECTION_LOST_ERRNOS
+        )
+
     def _sync_multiple_tables_sync(self, ds_id, tables):
         """鍚屾澶氫釜琛?(鍚屾)"""
-        results = []
-        success_count = 0
-        fail_count = 0
-        for table_config in tables:
+        def _sync_one(table_config):
             source = table_config.get('source_table')
             target = table_config.get('target_table', source)
-            requested_strategy = table_config.get("sync_strategy") or "full"
-            incremental_time_field = table_config.get("incremental_time_field")
-            incremental_start = table_config.get("incremental_start")
-            incremental_end = table_config.get("incremental_end")
-            result = self._sync_table_sync_v2(
-                ds_id,
-                source,
-                target,
-                requested_strategy,
-                incremental_time_field,
-                incremental_start,
-                incremental_end,
-            )
-            results.append({'source_table': source, 'target_table': target, **result})
+            try:
+                result = self._sync_table_sync_v2(
+                    ds_id,
+                    source,
+                    target,
+                    table_config.get("sync_strategy") or "full",
+                    table_config.get("incremental_time_field"),
+                    table_config.get("incremental_start"),
+                    table_config.get("incremental_end"),
+                    defer_registry=True,
+                )
+            except Exception as e:
+                # One table blowing up must not discard the results of the others.
+                result = {'success': False, 'error': str(e)}
+            return {'source_table': source, 'target_table': target, **result}
+
+        # Each table sync is remote-read + Stream Load IO, so threads overlap well;
+        # executor.map keeps results in request order.
+        max_workers = max(1, min(SYNC_PARALLELISM, len(tables)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="table-sync") as executor:
+            results = list(executor.map(_sync_one, tables))
+
+        # Registry rows for every finalized table in one round of writes.
+        finalized = [result for result in results if result.get('success') and result.get('ingestion')]
+        if finalized:
+            try:
+                self.bulk_ensure_table_registry(
+                    [{'table_name': result['target_table'], 'source_type': 'database_sync'} for result in finalized]
+                )
+                for result in finalized:
+                    result['ingestion']['registry_updated'] = True
+            except Exception as e:
+                logger.warning("table registry update failed: %s", e)
+
+        success_count = 0
+        fail_count = 0
+        for result in results:
             if result.get('success'):
                 success_count += 1
             else:
@@ -2718,37 +2894,52 @@ class DataSourceHandler:
 
     def _preview_remote_table_sync(self, host, port, user, password, database, table_name, limit=100):
         """棰勮杩滅▼琛?(鍚屾)"""
+        conn = None
         try:
-            conn = pymysql.connect(host=host, port=port, user=user, password=password, database=database,
-                                   connect_timeout=30, read_timeout=60)
+            conn = self._get_remote_connection(host, port, user, password, database)
             cursor = conn.cursor(pymysql.cursors.DictCursor)
-            cursor.execute("""SELECT COLUMN_NAME as name, DATA_TYPE as type FROM information_schema.COLUMNS
-                              WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION""", (database, table_name))
-            columns = cursor.fetchall()
-            safe_table_name = self.db.validate_identifier(table_name)
-            cursor.execute(f"SELECT * FROM {safe_table_name} LIMIT %s", (limit,))
-            data = cursor.fetchall()
-            cursor.execute(f"SELECT COUNT(*) as total FROM {safe_table_name}")
-            total = cursor.fetchone()['total']
-            cursor.close(); conn.close()
+            try:
+                cursor.execute("""SELECT COLUMN_NAME as name, DATA_TYPE as type FROM information_schema.COLUMNS
+                                  WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION""", (database, table_name))
+                columns = cursor.fetchall()
+                safe_table_name = self.db.validate_identifier(table_name)
+                cursor.execute(f"SELECT * FROM {safe_table_name} LIMIT %s", (limit,))
+                data = cursor.fetchall()
+                # TABLE_ROWS is the engine's row estimate (approximate for InnoDB); an exact
+                # COUNT(*) would scan the whole table just to label a preview.
+                cursor.execute("""SELECT TABLE_ROWS as total FROM information_schema.TABLES
+                                  WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s""", (database, table_name))
+                estimate = (cursor.fetchone() or {}).get('total') or 0
+            finally:
+                cursor.close()
             return {'success': True, 'table_name': table_name, 'columns': columns, 'data': data,
-                    'total_rows': total, 'preview_rows': len(data)}
+                    'total_rows': max(int(estimate), len(data)), 'total_rows_estimated': True,
+                    'preview_rows': len(data)}
         except Exception as e:
             return {'success': False, 'error': str(e)}
+        finally:
+            if conn is not None:
+                conn.close()
 
-    def _save_sync_task_sync(self, ds_id, source_table, target_table, schedule_type,
+    _SYNC_TASK_INSERT_PREFIX = """INSERT INTO `_sys_sync_tasks` (`id`, `datasource_id`, `source_table`, `target_table`,
+                 `schedule_type`, `schedule_minute`, `schedule_hour`, `schedule_day_of_week`,
+                 `schedule_day_of_month`, `schedule_value`, `enabled_for_ai`, `status`, `created_at`,
+                 `next_sync_at`)
+                 VALUES """
+    _SYNC_TASK_VALUES_ROW = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'active', NOW(), %s)"
+
+    def _build_sync_task_row(self, ds_id, source_table, target_table, schedule_type,
                              schedule_minute=0, schedule_hour=0, schedule_day_of_week=1,
                              schedule_day_of_month=1, enabled_for_ai=True,
                              sync_strategy: str = "full",
-                             incremental_time_field: Optional[str] = None):
-        """淇濆瓨鍚屾浠诲姟 (鍚屾)"""
-        import uuid
+                             incremental_time_field: Optional[str] = None,
+                             now: Optional[datetime] = None) -> Tuple[tuple, Dict[str, Any]]:
         normalized_strategy = self._normalize_sync_strategy(sync_strategy)
         normalized_incremental_time_field = str(incremental_time_field or "").strip() or None
         if normalized_strategy == "incremental" and not normalized_incremental_time_field:
             raise ValueError("incremental_time_field is required when sync_strategy=incremental")
-        task_id = str(uuid.uuid4())[:8]
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        task_id = _new_record_id()
+        now = now or datetime.now()
         schedule_value = json.dumps(
             {
                 "sync_strategy": normalized_strategy,
@@ -2756,48 +2947,99 @@ class DataSourceHandler:
             },
             ensure_ascii=False,
         )
-        sql = """INSERT INTO `_sys_sync_tasks` (`id`, `datasource_id`, `source_table`, `target_table`,
-                 `schedule_type`, `schedule_minute`, `schedule_hour`, `schedule_day_of_week`,
-                 `schedule_day_of_month`, `schedule_value`, `enabled_for_ai`, `status`, `created_at`)
-                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'active', %s)"""
-        self.db.execute_update(sql, (task_id, ds_id, source_table, target_table, schedule_type,
-                                      schedule_minute, schedule_hour, schedule_day_of_week,
-                                      schedule_day_of_month, schedule_value, 1 if enabled_for_ai else 0, now))
-        return {
+        next_sync = self._calculate_next_sync_detailed(
+            schedule_type, schedule_minute, schedule_hour,
+            schedule_day_of_week, schedule_day_of_month, now=now,
+        )
+        row = (task_id, ds_id, source_table, target_table, schedule_type,
+               schedule_minute, schedule_hour, schedule_day_of_week,
+               schedule_day_of_month, schedule_value, 1 if enabled_for_ai else 0, next_sync)
+        return row, {
             'success': True,
             'id': task_id,
             'message': 'sync_task_saved',
+            'next_sync_at': next_sync,
             'sync_strategy': normalized_strategy,
             'incremental_time_field': normalized_incremental_time_field,
         }
 
+    def _save_sync_task_sync(self, ds_id, source_table, target_table, schedule_type,
+                             schedule_minute=0, schedule_hour=0, schedule_day_of_week=1,
+                             schedule_day_of_month=1, enabled_for_ai=True,
+                             sync_strategy: str = "full",
+                             incremental_time_field: Optional[str] = None):
+        """淇濆瓨鍚屾浠诲姟 (鍚屾)"""
+        row, result = self._build_sync_task_row(
+            ds_id, source_table, target_table, schedule_type,
+            schedule_minute, schedule_hour, schedule_day_of_week,
+            schedule_day_of_month, enabled_for_ai, sync_strategy, incremental_time_field,
+        )
+        self.db.execute_update(_multi_row_insert_sql(self._SYNC_TASK_INSERT_PREFIX, self._SYNC_TASK_VALUES_ROW, 1), row)
+        self._invalidate_ai_tables_cache()
+        return result
+
+    def _save_sync_tasks_bulk_sync(self, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Persist many sync tasks with batched multi-row INSERTs."""
+        if not tasks:
+            return {'success': True, 'count': 0, 'tasks': []}
+        now = datetime.now()
+        rows: List[tuple] = []
+        results: List[Dict[str, Any]] = []
+        for task in tasks:
+            row, result = self._build_sync_task_row(
+                task['ds_id'],
+                task['source_table'],
+                task.get('target_table') or task['source_table'],
+                task['schedule_type'],
+                task.get('schedule_minute', 0),
+                task.get('schedule_hour', 0),
+                task.get('schedule_day_of_week', 1),
+                task.get('schedule_day_of_month', 1),
+                task.get('enabled_for_ai', True),
+                task.get('sync_strategy') or 'full',
+                task.get('incremental_time_field'),
+                now=now,
+            )
+            rows.append(row)
+            results.append(result)
+        self._insert_rows(self._SYNC_TASK_INSERT_PREFIX, self._SYNC_TASK_VALUES_ROW, rows)
+        self._invalidate_ai_tables_cache()
+        return {'success': True, 'count': len(results), 'tasks': results}
+
+    _UPDATE_SYNC_TASK_SQL = """UPDATE `_sys_sync_tasks` SET schedule_type = %s, schedule_minute = %s,
+                 schedule_hour = %s, schedule_day_of_week = %s, schedule_day_of_month = %s,
+                 enabled_for_ai = %s, next_sync_at = %s WHERE id = %s"""
+
     def _update_sync_task_sync(self, task_id, schedule_type, schedule_minute=0,
                                schedule_hour=0, schedule_day_of_week=1,
                                schedule_day_of_month=1, enabled_for_ai=True):
         """鏇存柊鍚屾浠诲姟 (鍚屾)"""
-        sql = """UPDATE `_sys_sync_tasks` SET schedule_type = %s, schedule_minute = %s,
-                 schedule_hour = %s, schedule_day_of_week = %s, schedule_day_of_month = %s,
-                 enabled_for_ai = %s WHERE id = %s"""
-        self.db.execute_update(sql, (schedule_type, schedule_minute, schedule_hour, schedule_day_of_week,
-                                      schedule_day_of_month, 1 if enabled_for_ai else 0, task_id))
+        next_sync = self._calculate_next_sync_detailed(
+            schedule_type, schedule_minute or 0, schedule_hour or 0,
+            schedule_day_of_week or 1, schedule_day_of_month or 1
+        )
+        self.db.execute_update(self._UPDATE_SYNC_TASK_SQL, (schedule_type, schedule_minute, schedule_hour, schedule_day_of_week,
+                                      schedule_day_of_month, 1 if enabled_for_ai else 0, next_sync, task_id))
+        self._invalidate_ai_tables_cache()
         return {'success': True, 'message': '浠诲姟宸叉洿鏂?'}
 
     def _toggle_ai_enabled_sync(self, task_id, enabled):
         """鍒囨崲AI鍚敤鐘舵€?(鍚屾)"""
         sql = "UPDATE `_sys_sync_tasks` SET enabled_for_ai = %s WHERE id = %s"
         self.db.execute_update(sql, (1 if enabled else 0, task_id))
+        self._invalidate_ai_tables_cache()
         return {'success': True, 'enabled_for_ai': enabled, 'message': ('ai_enabled' if enabled else 'ai_disabled')}
 
 
     def _list_sync_tasks_sync(self):
         """鑾峰彇鎵€鏈夊悓姝ヤ换鍔?(鍚屾)"""
-        sql = """
-        SELECT t.*, d.name as datasource_name
-        FROM `_sys_sync_tasks` t
-        LEFT JOIN `_sys_datasources` d ON t.datasource_id = d.id
-        ORDER BY t.created_at DESC
-        """
-        return self.db.execute_query(sql)
+        # Two single-table reads joined here: the datasource lookup is tiny and
+        # cached, which is far cheaper than having the FE plan a JOIN per call.
+        tasks = self.db.execute_query("SELECT * FROM `_sys_sync_tasks` ORDER BY created_at DESC")
+        names = self._get_datasource_names_sync()
+        for task in tasks:
+            task['datasource_name'] = names.get(task.get('datasource_id'))
+        return tasks
 
     def _get_ai_enabled_tables_sync(self):
         """鑾峰彇鍚敤AI鐨勮〃 (鍚屾)"""
@@ -2806,13 +3048,19 @@ class DataSourceHandler:
         FROM `_sys_sync_tasks`
         WHERE enabled_for_ai = 1
         """
-        results = self.db.execute_query(sql)
-        return [r['target_table'] for r in results]
+        with self._ai_tables_cache_lock:
+            tables = self._ai_tables_cache.get("tables")
+        if tables is None:
+            tables = [r['target_table'] for r in self.db.execute_query(sql)]
+            with self._ai_tables_cache_lock:
+                self._ai_tables_cache["tables"] = tables
+        return list(tables)
 
     def _delete_sync_task_sync(self, task_id):
         """鍒犻櫎鍚屾浠诲姟 (鍚屾)"""
         sql = "DELETE FROM `_sys_sync_tasks` WHERE id = %s"
         self.db.execute_update(sql, (task_id,))
+        self._invalidate_ai_tables_cache()
         return {'success': True, 'message': '鍚屾浠诲姟宸插垹闄?'}
 
     def _query_with_optional_tables(self, sql: str, table_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
@@ -3324,15 +3572,14 @@ class DataSourceHandler:
 
     def _update_table_registry_sync(self, table_name, display_name=None, description=None):
         """鏇存柊琛ㄦ敞鍐屼俊鎭?(鍚屾)"""
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         sql = """
         UPDATE `_sys_table_registry`
         SET display_name = COALESCE(%s, display_name),
             description = COALESCE(%s, description),
-            updated_at = %s
+            updated_at = NOW()
         WHERE table_name = %s
         """
-        self.db.execute_update(sql, (display_name, description, now, table_name))
+        self.db.execute_update(sql, (display_name, description, table_name))
         return {'success': True, 'message': '琛ㄤ俊鎭凡鏇存柊'}
 
     def _reset_table_analysis_assets_sync(self, table_name, clear_relationships=True):
@@ -3367,6 +3614,7 @@ class DataSourceHandler:
         if drop_physical and self._physical_table_exists(safe_table_name):
             validated_table_name = self.db.validate_identifier(safe_table_name)
             self.db.execute_update(f"DROP TABLE {validated_table_name}")
+            self._truncate_unsupported.discard(safe_table_name)
             physical_deleted = True
 
         self._reset_table_analysis_assets_sync(safe_table_name, clear_relationships=True)
@@ -3417,6 +3665,14 @@ class DataSourceHandler:
 datasource_handler = DataSourceHandler()
 
 
+def _task_datasource_key(task: Dict[str, Any]) -> str:
+    return str(task.get('datasource_id') or '')
+
+
+# Floor between the end of a sync tick and the next wakeup.
+_SYNC_WAKEUP_MIN_GAP = timedelta(seconds=30)
+
+
 # ============ 瀹氭椂璋冨害鍣?============
 
 class SyncScheduler:
@@ -3425,12 +3681,19 @@ class SyncScheduler:
     def __init__(self, handler: DataSourceHandler):
         self.handler = handler
         self.scheduler = None
+        self._shared_scheduler = None
+        # The wakeup job, the safety-net interval and endpoint-triggered wakeups can all
+        # fire together; only one tick may run, so a tick never re-runs tasks another still holds.
+        self._tick_lock = threading.Lock()
 
     def register(self, shared_scheduler):
         """鍦ㄥ叡浜皟搴﹀櫒涓婃敞鍐屽悓姝ヤ换鍔°€?"""
+        self._shared_scheduler = shared_scheduler
+        # Due tasks are picked up by a one-shot "sync_wakeup" job placed at the earliest
+        # next_sync_at; this slow interval only backs it up (clock drift, other workers).
         shared_scheduler.register_interval(
             self._check_and_execute_tasks,
-            minutes=1,
+            minutes=SYNC_SAFETY_NET_MINUTES,
             job_id="sync_checker",
         )
         shared_scheduler.register_cron(
@@ -3439,7 +3702,7 @@ class SyncScheduler:
             hour=0,
             minute=0,
         )
-        print("鉁?鍚屾璋冨害鍣ㄥ凡娉ㄥ唽")
+        logger.info("鉁?鍚屾璋冨害鍣ㄥ凡娉ㄥ唽")
 
     def start(self):
         """鍏煎鏃ф祦绋嬬殑鏈湴璋冨害鍣ㄥ惎鍔ㄣ€?"""
@@ -3448,7 +3711,7 @@ class SyncScheduler:
 
             if self.scheduler is not None:
                 return
-            print("鈿狅笍 SyncScheduler.start() is deprecated; use register(app_scheduler) instead.")
+            logger.warning("鈿狅笍 SyncScheduler.start() is deprecated; use register(app_scheduler) instead.")
             self.scheduler = BackgroundScheduler()
             self.scheduler.add_job(
                 self._check_and_execute_tasks,
@@ -3464,29 +3727,106 @@ class SyncScheduler:
                 id='field_catalog_refresh'
             )
             self.scheduler.start()
-            print("鉁?鍚屾璋冨害鍣ㄥ凡鍚姩")
+            logger.info("鉁?鍚屾璋冨害鍣ㄥ凡鍚姩")
         except Exception as e:
-            print(f"鈿狅笍 鍚屾璋冨害鍣ㄥ惎鍔ㄥけ璐? {e}")
+            logger.warning("鈿狅笍 鍚屾璋冨害鍣ㄥ惎鍔ㄥけ璐? %s", e)
 
     def stop(self):
         """鍋滄璋冨害鍣?"""
         if self.scheduler:
             self.scheduler.shutdown()
-            print("馃洃 鍚屾璋冨害鍣ㄥ凡鍋滄")
+            logger.info("馃洃 鍚屾璋冨害鍣ㄥ凡鍋滄")
+
+    def schedule_next_wakeup(self, min_delay: timedelta = timedelta(0)):
+        """Move the one-shot wakeup job to the earliest pending next_sync_at, no sooner than ``min_delay``."""
+        if self._shared_scheduler is None:
+            return None
+        if self._tick_lock.locked():
+            # The running tick reschedules the wakeup when it finishes.
+            return None
+        try:
+            next_at = self.handler.get_next_sync_time()
+        except Exception as e:
+            logger.warning("sync wakeup scheduling failed: %s", e)
+            return None
+        if next_at is None:
+            self._shared_scheduler.remove_job("sync_wakeup")
+            return None
+        run_at = max(next_at, datetime.now() + min_delay)
+        self._shared_scheduler.register_date(self._check_and_execute_tasks, run_date=run_at, job_id="sync_wakeup")
+        return run_at
 
     def _check_and_execute_tasks(self):
         """妫€鏌ュ苟鎵ц寰呭悓姝ヤ换鍔?"""
+        if not self._tick_lock.acquire(blocking=False):
+            logger.info("sync tick already running; skipping")
+            return
         try:
-            tasks = self.handler.get_pending_tasks()
-            for task in tasks:
-                print(f"鈴?鎵ц瀹氭椂鍚屾: {task['source_table']} -> {task['target_table']}")
-                result = self.handler.execute_scheduled_task(task)
-                if result.get('success'):
-                    print(f"sync success: {result.get('rows_synced', 0)} rows")
-                else:
-                    print(f"鉂?鍚屾澶辫触: {result.get('error')}")
+            tasks = sorted(self.handler.claim_due_tasks(), key=_task_datasource_key)
+            groups = [(ds_id, list(group)) for ds_id, group in groupby(tasks, key=_task_datasource_key)]
+            # Datasources sync in parallel, so one slow source no longer holds up the
+            # rest of the tick; tasks within a datasource stay sequential on its connection.
+            max_workers = max(1, min(SYNC_PARALLELISM, len(groups)))
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sync-exec") as executor:
+                batches = list(executor.map(lambda item: self._execute_datasource_tasks(*item), groups))
+            # One write each for the whole tick instead of one UPDATE per task.
+            self.handler.mark_tasks_synced([task for succeeded, _ in batches for task in succeeded])
+            self.handler.defer_failed_tasks([task for _, failed in batches for task in failed])
+        except Exception as e:
+            logger.error("鉂?浠诲姟妫€鏌ュけ璐? %s", e)
+        finally:
+            self._tick_lock.release()
+            # Keeps a failed claim or write from turning into a tight re-fire loop.
+            self.schedule_next_wakeup(min_delay=_SYNC_WAKEUP_MIN_GAP)
+
+    def _execute_datasource_tasks(
+        self, ds_id: str, tasks: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Run one datasource's due tasks over a shared pooled connection; returns (succeeded, failed)."""
+        succeeded: List[Dict[str, Any]] = []
+        # The credential lookup and handshake happen once per source DB.
+        try:
+            conn = self.handler.open_datasource_connection(ds_id)
+            try:
+                for index, task in enumerate(tasks):
+                    if index:
+                        conn = self._revive_connection(conn)
+                    logger.info("鈴?鎵ц瀹氭椂鍚屾: %s -> %s", task['source_table'], task['target_table'])
+                    result = self.handler.execute_scheduled_task(task, conn=conn, record_run=False)
+                    if result.get('success'):
+                        succeeded.append(task)
+                        logger.info("sync success: %s rows", result.get('rows_synced', 0))
+                    else:
+                        logger.warning("鉂?鍚屾澶辫触: %s", result.get('error'))
+                        # The failure may have left the shared connection unusable;
+                        # the rest of the group falls back to their own connections.
+                        if conn is not None:
+                            conn.close()
+                            conn = None
+            finally:
+                if conn is not None:
+                    conn.close()
+        except Exception as e:
+            logger.error("sync tasks for datasource %s failed: %s", ds_id, e)
+        # Failed runs, and tasks the group never reached, are retried after a backoff.
+        done = {id(task) for task in succeeded}
+        return succeeded, [task for task in tasks if id(task) not in done]
+
+    @staticmethod
+    def _revive_connection(conn):
+        """Ping a shared connection between tasks; None falls back to per-task connections."""
+        if conn is None:
+            return None
+        try:
+            conn.ping(reconnect=True)
+            return conn
         except Exception as e:
-            print(f"鉂?浠诲姟妫€鏌ュけ璐? {e}")
+            logger.warning("shared datasource connection is unusable: %s", e)
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return None
 
     def _refresh_agent_catalogs(self):
         try:
@@ -3494,7 +3834,7 @@ class SyncScheduler:
 
             metadata_analyzer.refresh_all_field_catalogs()
         except Exception as e:
-            print(f"鈿狅笍 瀛楁鐩綍鍒锋柊澶辫触: {e}")
+            logger.warning("鈿狅笍 瀛楁鐩綍鍒锋柊澶辫触: %s", e)
 
 
 # 鍏ㄥ眬璋冨害鍣ㄥ疄渚?
@@ -2,10 +2,16 @@
 Doris 数据库连接和查询工具
 """
 import pymysql
+from pymysql.converters import escape_string
 import asyncio
 import re
 import os
-from typing import List, Dict, Any, Union
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import List, Dict, Any, FrozenSet, Iterator, Optional, Tuple, Union
 from config import DORIS_CONFIG
 
 try:
@@ -14,33 +20,117 @@ except Exception:  # pragma: no cover - fallback for minimal envs
     PooledDB = None
 
 
+class _LifoIdleList(list):
+    """
+    PooledDB 用 pop(0) 取空闲连接 (FIFO)；这里把 pop(0) 改为取最近归还的那个，热连接集合保持最小。
+    依赖 DBUtils 内部的 _idle_cache 只用 pop(0)/append，由 test_phase4_production 中的测试守护。
+    """
+
+    def pop(self, index=-1):
+        return super().pop(-1 if index == 0 else index)
+
+
+# 会改变表集合的语句，执行后需要让表名缓存失效
+_DDL_RE = re.compile(r"\s*(CREATE|DROP|ALTER|RENAME)\b", re.IGNORECASE)
+
+# 标识符白名单：常规字符，或放宽到中文表名；用 \Z 拒绝末尾换行
+_IDENT_ASCII_RE = re.compile(r'^[a-zA-Z0-9_\-]+\Z')
+_IDENT_CJK_RE = re.compile(r'^[\w\-\u4e00-\u9fa5]+\Z')
+
+
+# DorisClient.session() 期间固定使用的 (client, 连接)；线程池里的每个任务各有独立上下文
+_session_conn: ContextVar[Optional[Tuple[Any, Any]]] = ContextVar("doris_session_conn", default=None)
+
+
+@lru_cache(maxsize=1024)
+def _quote_identifier(identifier: str) -> str:
+    if _IDENT_ASCII_RE.match(identifier) or _IDENT_CJK_RE.match(identifier):
+        return f"`{identifier}`"
+    raise ValueError(f"Invalid identifier: {identifier}")
+
+
 class DorisClient:
     """Doris 数据库客户端"""
+
+    _TABLES_CACHE_TTL = 5.0
+    # 表结构只会被本进程的 DDL 改变 (执行后整体失效)，可以缓存得更久
+    _SCHEMA_CACHE_TTL = 30.0
     
     def __init__(self):
         self.config = DORIS_CONFIG
         self._pool = None
+        self._pool_lock = threading.Lock()
         self._pool_size = int(os.getenv("DORIS_POOL_SIZE", "10"))
+        # 突发并发可超出常驻连接数，超出部分用完即关 (maxcached 仍为 pool_size)
+        self._max_overflow = max(0, int(os.getenv("DORIS_MAX_OVERFLOW", "0")))
+        self._pool_lifo = os.getenv("DORIS_POOL_LIFO", "true").strip().lower() in ("1", "true", "yes", "on")
         self._use_pool = self._pool_size > 0
+        # (写入时间, 表名列表, 表名集合)；SHOW TABLES 结果在短时间内复用
+        self._tables_cache: Optional[Tuple[float, List[str], FrozenSet[str]]] = None
+        self._tables_cache_lock = threading.Lock()
+        # 表名 -> (写入时间, DESCRIBE 结果)；与表名缓存共用锁和失效时机
+        self._schema_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        # 每次失效 +1；查询开始后发生过失效的结果不再写回缓存，避免旧结构覆盖失效
+        self._tables_cache_generation = 0
     
     def get_connection(self):
         """获取数据库连接"""
         if self._use_pool and PooledDB is not None:
             if self._pool is None:
-                self._pool = PooledDB(
-                    creator=pymysql,
-                    maxconnections=self._pool_size,
-                    blocking=True,
-                    ping=1,
-                    charset=self.config.get("charset", "utf8mb4"),
-                    host=self.config["host"],
-                    port=self.config["port"],
-                    user=self.config["user"],
-                    password=self.config["password"],
-                    database=self.config["database"],
-                )
+                # Request threads can race here on the first queries after startup.
+                with self._pool_lock:
+                    if self._pool is None:
+                        pool = PooledDB(
+                            creator=pymysql,
+                            mincached=min(2, self._pool_size),
+                            maxcached=self._pool_size,
+                            maxconnections=self._pool_size + self._max_overflow,
+                            blocking=True,
+                            ping=1,
+                            charset=self.config.get("charset", "utf8mb4"),
+                            host=self.config["host"],
+                            port=self.config["port"],
+                            user=self.config["user"],
+                            password=self.config["password"],
+                            database=self.config["database"],
+                        )
+                        if self._pool_lifo and isinstance(getattr(pool, "_idle_cache", None), list):
+                            pool._idle_cache = _LifoIdleList(pool._idle_cache)
+                        self._pool = pool
             return self._pool.connection()
         return pymysql.connect(**self.config)
+
+    @contextmanager
+    def session(self):
+        """
+        在当前上下文内固定一个池连接：期间的 execute_* / fetch_column 共用它，退出时归还。
+        用于一次阻塞任务里连续执行多条语句的场景；已在 session 中时直接复用外层连接。
+        """
+        current = _session_conn.get()
+        if current is not None and current[0] is self:
+            yield current[1]
+            return
+        conn = self.get_connection()
+        token = _session_conn.set((self, conn))
+        try:
+            yield conn
+        finally:
+            _session_conn.reset(token)
+            conn.close()
+
+    def _acquire(self):
+        """返回 (连接, 用完是否由调用方关闭)；session 内复用固定连接"""
+        current = _session_conn.get()
+        if current is not None and current[0] is self:
+            return current[1], False
+        return self.get_connection(), True
+
+    def close(self) -> None:
+        """关闭连接池 (应用退出时调用)：断开空闲连接，之后的请求会重新建池"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
     
     def validate_identifier(self, identifier: str) -> str:
         """
@@ -49,16 +139,8 @@ class DorisClient:
         """
         if not identifier:
             raise ValueError("Identifier cannot be empty")
-        
-        # 只允许字母、数字、下划线、中划线
-        if not re.match(r'^[a-zA-Z0-9_\-]+$', identifier):
-            # 如果包含其他字符，尝试用反引号包裹并转义反引号
-            # 但为了安全起见，我们暂时只允许常规字符
-            # 如果是中文表名，需要放宽正则
-             if not re.match(r'^[\w\-\u4e00-\u9fa5]+$', identifier):
-                raise ValueError(f"Invalid identifier: {identifier}")
-        
-        return f"`{identifier}`"
+        # 只允许字母、数字、下划线、中划线 (中文表名放宽)；结果按标识符缓存
+        return _quote_identifier(identifier)
 
     def execute_query(self, sql: str, params: tuple = None) -> List[Dict[str, Any]]:
         """
@@ -71,18 +153,72 @@ class DorisClient:
         Returns:
             查询结果列表
         """
-        conn = self.get_connection()
+        conn, owned = self._acquire()
         try:
             cursor = conn.cursor(pymysql.cursors.DictCursor)
             cursor.execute(sql, params)
             result = cursor.fetchall()
             return result
+        finally:
+            if owned:
+                conn.close()
+
+    @staticmethod
+    async def _run_blocking(func, *args):
+        # run_in_executor 直接派发，省去 to_thread 的 context 拷贝和 partial 包装
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def iter_query(self, sql: str, params: tuple = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        流式执行查询，逐行产出 (服务端游标，客户端只缓存一个批次)
+
+        Args:
+            sql: SQL 语句
+            params: 参数 (可选)
+            batch_size: 每次 fetchmany 的行数
+
+        Yields:
+            每一行的 dict
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+            try:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield from rows
+            finally:
+                # 提前停止迭代时 close() 会读完剩余结果，连接归还连接池时协议状态干净
+                cursor.close()
         finally:
             conn.close()
 
+    def fetch_column(self, sql: str, params: tuple = None) -> List[Any]:
+        """
+        执行查询并只返回第一列 (普通元组游标，不为每行构造 dict)
+
+        Args:
+            sql: SQL 语句
+            params: 参数 (可选)
+
+        Returns:
+            第一列的值列表
+        """
+        conn, owned = self._acquire()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            if owned:
+                conn.close()
+
     async def execute_query_async(self, sql: str, params: tuple = None) -> List[Dict[str, Any]]:
         """异步执行查询"""
-        return await asyncio.to_thread(self.execute_query, sql, params)
+        return await self._run_blocking(self.execute_query, sql, params)
     
     def execute_update(self, sql: str, params: tuple = None) -> int:
         """
@@ -95,49 +231,98 @@ class DorisClient:
         Returns:
             影响的行数
         """
-        conn = self.get_connection()
+        conn, owned = self._acquire()
         try:
             cursor = conn.cursor()
             affected_rows = cursor.execute(sql, params)
             conn.commit()
             return affected_rows
         finally:
-            conn.close()
+            if owned:
+                conn.close()
+            if _DDL_RE.match(sql):
+                self.invalidate_tables_cache()
+
+    def execute_many(self, sql: str, seq_params: List[tuple]) -> int:
+        """
+        用同一连接批量执行一条语句 (INSERT 会被 pymysql 合并为多行 VALUES)
+
+        Args:
+            sql: SQL 语句
+            seq_params: 参数列表
+
+        Returns:
+            影响的行数
+        """
+        conn, owned = self._acquire()
+        try:
+            cursor = conn.cursor()
+            affected_rows = cursor.executemany(sql, seq_params)
+            conn.commit()
+            return affected_rows
+        finally:
+            if owned:
+                conn.close()
 
     async def execute_update_async(self, sql: str, params: tuple = None) -> int:
         """异步执行更新"""
-        return await asyncio.to_thread(self.execute_update, sql, params)
+        return await self._run_blocking(self.execute_update, sql, params)
     
+    def _cached_tables(self) -> Tuple[List[str], FrozenSet[str]]:
+        with self._tables_cache_lock:
+            cached = self._tables_cache
+            generation = self._tables_cache_generation
+        if cached is not None and time.monotonic() - cached[0] < self._TABLES_CACHE_TTL:
+            return cached[1], cached[2]
+        tables = self.fetch_column("SHOW TABLES")
+        names = frozenset(tables)
+        with self._tables_cache_lock:
+            if generation == self._tables_cache_generation:
+                self._tables_cache = (time.monotonic(), tables, names)
+        return tables, names
+
+    def invalidate_tables_cache(self) -> None:
+        """建表/删表/改表后调用，下次读取重新执行 SHOW TABLES / DESCRIBE"""
+        with self._tables_cache_lock:
+            self._tables_cache = None
+            self._schema_cache.clear()
+            self._tables_cache_generation += 1
+
     def get_tables(self) -> List[str]:
         """获取所有表名"""
-        sql = "SHOW TABLES"
-        result = self.execute_query(sql)
-        # 结果格式: [{'Tables_in_default': 'table1'}, ...]
-        key = f"Tables_in_{self.config['database']}"
-        return [row[key] for row in result]
+        return list(self._cached_tables()[0])
     
     async def get_tables_async(self) -> List[str]:
         """异步获取所有表名"""
-        return await asyncio.to_thread(self.get_tables)
+        return await self._run_blocking(self.get_tables)
 
     def get_table_schema(self, table_name: str) -> List[Dict[str, str]]:
         """获取表结构"""
         safe_table_name = self.validate_identifier(table_name)
+        with self._tables_cache_lock:
+            cached = self._schema_cache.get(table_name)
+            generation = self._tables_cache_generation
+        if cached is not None and time.monotonic() - cached[0] < self._SCHEMA_CACHE_TTL:
+            # 按行复制，调用方修改返回结果不会污染缓存
+            return [dict(row) for row in cached[1]]
         sql = f"DESCRIBE {safe_table_name}"
-        return self.execute_query(sql)
+        schema = self.execute_query(sql)
+        with self._tables_cache_lock:
+            if generation == self._tables_cache_generation:
+                self._schema_cache[table_name] = (time.monotonic(), [dict(row) for row in schema])
+        return schema
     
     async def get_table_schema_async(self, table_name: str) -> List[Dict[str, str]]:
         """异步获取表结构"""
-        return await asyncio.to_thread(self.get_table_schema, table_name)
+        return await self._run_blocking(self.get_table_schema, table_name)
     
     def table_exists(self, table_name: str) -> bool:
         """检查表是否存在"""
-        return table_name in self.get_tables()
+        return table_name in self._cached_tables()[1]
     
     async def table_exists_async(self, table_name: str) -> bool:
         """异步检查表是否存在"""
-        tables = await self.get_tables_async()
-        return table_name in tables
+        return await self._run_blocking(self.table_exists, table_name)
 
     def _escape_string(self, text: str) -> str:
         """
@@ -149,13 +334,8 @@ class DorisClient:
         Returns:
             转义后的文本 (带引号)
         """
-        # 使用 pymysql 的转义功能
-        conn = self.get_connection()
-        try:
-            escaped = conn.escape_string(text)
-            return f"'{escaped}'"
-        finally:
-            conn.close()
+        # 纯字符串转义，不需要占用连接
+        return f"'{escape_string(text)}'"
 
 
 # 全局单例
@@ -2,10 +2,104 @@
 API 请求处理器
 """
 import asyncio
+import os
 import re
-from typing import Dict, Any, List, Optional
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from db import doris_client
-from config import DEFAULT_LLM_RESOURCE
+from config import ACTION_CACHE_MAX_ROWS, ACTION_CACHE_TTL, DEFAULT_LLM_RESOURCE
+
+try:
+    import sqlglot
+    from sqlglot import exp as sqlglot_exp
+except Exception:  # pragma: no cover - pinned in requirements; minimal envs fall back to lexical checks
+    sqlglot = None
+    sqlglot_exp = None
+
+try:
+    from cachetools import TTLCache
+except Exception:  # pragma: no cover - fallback for minimal envs
+    class TTLCache(dict):
+        def __init__(self, maxsize: int, ttl: int, getsizeof=None):
+            super().__init__()
+            self.maxsize = maxsize
+            self.ttl = ttl
+
+
+@lru_cache(maxsize=1)
+def _get_action_executor() -> ThreadPoolExecutor:
+    """Action 处理线程池，与 Doris 连接池同等大小：更多线程也只会排队等连接"""
+    workers = max(4, int(os.getenv("DORIS_POOL_SIZE", "10")))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="action")
+
+
+def _coerce_limit(limit: Any, default: int = 100) -> int:
+    """前端传来的 limit 可能是字符串或非法值，统一转成 int"""
+    if isinstance(limit, int):
+        return limit
+    try:
+        return int(limit)
+    except Exception:
+        return default
+
+
+# filter 里不允许出现的语句分隔符、注释和子查询关键字；字符串字面量和反引号标识符先剔除再检查
+_FILTER_LITERAL_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`")
+_FILTER_FORBIDDEN_TOKENS = (';', '--', '/*', '*/', '#')
+_FILTER_FORBIDDEN_KEYWORDS_RE = re.compile(r"\b(SELECT|UNION|INTERSECT|EXCEPT|INTO|OUTFILE)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def _sanitize_filter(filter_clause: str) -> str:
+    """
+    校验前端传入的 WHERE 条件，只允许单个不含子查询的布尔表达式，拒绝多语句、注释截断和 UNION。
+    词法和关键字检查总是执行；有 sqlglot 时再按 Doris 方言解析校验并输出规范形式 (写法不同的相同条件
+    也能命中结果缓存)。sqlglot 不认识的 Doris 专有谓词 (如 MATCH_ANY) 通过词法检查后原样返回。
+    看板会反复使用同一 filter，结果按原文缓存。
+    """
+    stripped = _FILTER_LITERAL_RE.sub("''", filter_clause)
+    if any(token in stripped for token in _FILTER_FORBIDDEN_TOKENS) or _FILTER_FORBIDDEN_KEYWORDS_RE.search(stripped):
+        raise ValueError(f"Invalid filter expression: {filter_clause!r}")
+    if sqlglot is None:
+        return filter_clause
+    try:
+        tree = sqlglot.parse_one(filter_clause, read='doris')
+    except Exception:
+        return filter_clause
+    if not isinstance(tree, sqlglot_exp.Condition) or tree.find(
+        sqlglot_exp.Select, sqlglot_exp.Union, sqlglot_exp.Intersect, sqlglot_exp.Except, sqlglot_exp.Subquery
+    ):
+        raise ValueError(f"Invalid filter expression: {filter_clause!r}")
+    return tree.sql(dialect='doris')
+
+
+def _filter_limit_suffix(filter_clause: str, limit: Any, parameterized: bool = False, order_by: str = "") -> str:
+    """
+    各 action 共用的 WHERE/[ORDER BY]/LIMIT 尾部
+
+    parameterized=True 时 SQL 还会经过驱动的 %s 绑定，filter 里的字面量 % 需要写成 %%。
+    """
+    if filter_clause:
+        filter_clause = _sanitize_filter(filter_clause)
+    if filter_clause and parameterized:
+        filter_clause = filter_clause.replace('%', '%%')
+    where = f" WHERE {filter_clause}" if filter_clause else ""
+    order = f" ORDER BY {order_by}" if order_by else ""
+    return f"{where}{order} LIMIT {_coerce_limit(limit)}"
+
+
+def _cached_rows_size(rows: List[Dict[str, Any]]) -> int:
+    """LLM 结果缓存按行数计容量；空结果也占 1，避免无限堆积"""
+    return max(len(rows), 1)
+
+
+@lru_cache(maxsize=64)
+def _placeholder_array(size: int) -> str:
+    """Doris ARRAY 字面量的绑定参数占位，如 [%s, %s]；标签集合大小有限，按长度缓存"""
+    return "[" + ", ".join(["%s"] * size) + "]"
 
 
 class ActionHandler:
@@ -13,67 +107,176 @@ class ActionHandler:
     
     def __init__(self):
         self.db = doris_client
+        # (表, action, 规范化 SQL, 参数) -> LLM 函数查询结果；看板反复刷新同一查询时不再重复调用模型。
+        # 容量按缓存的总行数计，表被重新导入或同步后由 invalidate_table 清掉该表的结果
+        self._llm_result_cache = TTLCache(
+            maxsize=max(ACTION_CACHE_MAX_ROWS, 1), ttl=max(ACTION_CACHE_TTL, 1), getsizeof=_cached_rows_size
+        )
+        self._llm_result_cache_lock = threading.Lock()
     
+    # action -> 处理方法名；同步 execute 与异步 execute_async 共用
+    _ACTIONS = {
+        'query': 'handle_query',
+        'sentiment': 'handle_sentiment',
+        'classify': 'handle_classify',
+        'extract': 'handle_extract',
+        'stats': 'handle_stats',
+        'similarity': 'handle_similarity',
+        'translate': 'handle_translate',
+        'summarize': 'handle_summarize',
+        'mask': 'handle_mask',
+        'fixgrammar': 'handle_fixgrammar',
+        'generate': 'handle_generate',
+        'filter': 'handle_filter',
+    }
+
+    # 调用 LLM 函数的 action；limit=0 时不必访问 Doris
+    _LLM_ACTIONS = frozenset(_ACTIONS) - {'query', 'stats'}
+
+    def _resolve(self, action: str):
+        method_name = self._ACTIONS.get(action)
+        if method_name is None:
+            raise ValueError(f"Unknown action: {action}")
+        return getattr(self, method_name)
+
+    def _zero_limit_result(self, action: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """LLM action 传 limit=0 (预热/探测) 时直接返回空结果，省去一次 Doris 往返和 LLM 调用"""
+        if action not in self._LLM_ACTIONS or 'limit' not in params or _coerce_limit(params['limit']) != 0:
+            return None
+        result = {'success': True, 'data': [], 'count': 0, 'sql': ''}
+        if action in ('sentiment', 'classify'):
+            result['summary'] = {}
+        return result
+
     async def execute_async(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行指定的 action (异步)
+
+        未知 action 在事件循环里直接报错；处理器本身在专用线程池中执行，
+        每次请求只有一次线程切换，不占用事件循环。
         """
-        handlers = {
-            'query': self.handle_query_async,
-            'sentiment': self.handle_sentiment_async,
-            # 其他暂时先用同步转异步的通用包装，或者逐个实现
-            # 为了快速修复，我们可以让其他 handler 依然是同步的，但在 execute_async 中 run_in_executor
-            # 但 query 和 sentiment 是最常用的，我们先优化它们
-        }
-        
-        handler = handlers.get(action)
-        if handler:
-            return await handler(params)
-        
-        # 对于未显式异步化的 handler，我们暂不支持或抛错，或者 fallback 到同步方法
-        # 但同步方法会阻塞。我们还是尽量全部异步化。
-        # 由于 handler 太多，我们这里只演示 query 和 sentiment。
-        # 对于其他 action，如果 params 中没有特别大的数据，也许暂时可以接受？
-        # 不，还是应该全部异步化。
-        
-        # 简单起见，我们把整个 execute 放到线程池？
-        # 不，execute 只是分发。
-        
-        # 让我们把 execute 改名为 execute_sync，然后 execute_async 调用它
-        return await asyncio.to_thread(self.execute, action, params)
+        handler = self._resolve(action)
+        empty = self._zero_limit_result(action, params)
+        if empty is not None:
+            return empty
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_action_executor(), handler, params)
 
     def execute(self, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行指定的 action (同步)
         """
-        handlers = {
-            'query': self.handle_query,
-            'sentiment': self.handle_sentiment,
-            'classify': self.handle_classify,
-            'extract': self.handle_extract,
-            'stats': self.handle_stats,
-            'similarity': self.handle_similarity,
-            'translate': self.handle_translate,
-            'summarize': self.handle_summarize,
-            'mask': self.handle_mask,
-            'fixgrammar': self.handle_fixgrammar,
-            'generate': self.handle_generate,
-            'filter': self.handle_filter
-        }
-        
-        handler = handlers.get(action)
-        if not handler:
-            raise ValueError(f"Unknown action: {action}")
-        
+        handler = self._resolve(action)
+        empty = self._zero_limit_result(action, params)
+        if empty is not None:
+            return empty
         return handler(params)
 
     async def handle_query_async(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """异步执行普通查询"""
-        return await asyncio.to_thread(self.handle_query, params)
+        return await self.execute_async('query', params)
 
     async def handle_sentiment_async(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """异步执行情感分析"""
-        return await asyncio.to_thread(self.handle_sentiment, params)
+        return await self.execute_async('sentiment', params)
+
+    def _query_llm(self, action: str, table: str, sql: str, args: tuple) -> List[Dict[str, Any]]:
+        """
+        执行含 LLM 函数的查询；资源名、标签等取值通过 args 绑定，不拼进 SQL。
+        相同 action + SQL + 参数在 ACTION_CACHE_TTL 秒内复用结果，超过 ACTION_CACHE_MAX_ROWS 行的结果不缓存。
+        """
+        if ACTION_CACHE_TTL <= 0:
+            return self.db.execute_query(sql, args)
+        key = (table, action, " ".join(sql.split()), args)
+        with self._llm_result_cache_lock:
+            rows = self._llm_result_cache.get(key)
+        if rows is None:
+            rows = self.db.execute_query(sql, args)
+            if _cached_rows_size(rows) <= self._llm_result_cache.maxsize:
+                with self._llm_result_cache_lock:
+                    self._llm_result_cache[key] = rows
+        return list(rows)
+
+    def invalidate_table(self, table: str) -> None:
+        """表数据被上传/同步改写或删除后调用，丢弃该表的 LLM 结果缓存"""
+        with self._llm_result_cache_lock:
+            for key in [key for key in self._llm_result_cache.keys() if key[0] == table]:
+                self._llm_result_cache.pop(key, None)
+
+    def _llm_output_options(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        单列 LLM action 的输出列：默认带上原文列；include_source=false 时只返回模型结果
+        (大文本列会让响应体翻倍)，id_column 指定用于关联回原表的主键列。
+        """
+        id_column = params.get('id_column')
+        return {
+            'include_source': bool(params.get('include_source', True)),
+            'safe_id_column': self.db.validate_identifier(id_column) if id_column else None,
+        }
+
+    @staticmethod
+    def _llm_column_ctes(safe_table: str, src_columns: List[str], safe_column: str, llm_expr: str,
+                         alias: str, filter_clause: str, limit: Any) -> str:
+        """
+        src 按 filter/limit 取行，scored 只对其中的不同取值调用一次 LLM。
+        src 会被读两次，带确定的 ORDER BY 才能保证 CTE 被内联时两次取到同一批行。
+        """
+        columns = ', '.join(src_columns)
+        suffix = _filter_limit_suffix(filter_clause, limit, parameterized=True, order_by=columns)
+        return f"""
+        WITH src AS (
+            SELECT {columns} FROM {safe_table}{suffix}
+        ),
+        scored AS (
+            SELECT {safe_column}, {llm_expr} AS {alias}
+            FROM (SELECT DISTINCT {safe_column} FROM src) uniq
+        )"""
+
+    @classmethod
+    def _build_llm_column_sql(cls, safe_table: str, safe_column: str, llm_expr: str, alias: str,
+                              filter_clause: str, limit: Any, include_source: bool = True,
+                              safe_id_column: Optional[str] = None) -> str:
+        """
+        单列 LLM 函数查询：先按 filter/limit 取行，再只对其中的不同取值调用一次 LLM，
+        结果按值关联回每一行，重复文本不再重复请求模型。
+        """
+        src_columns = [safe_column] if safe_id_column in (None, safe_column) else [safe_id_column, safe_column]
+        output = [f"src.{safe_id_column}"] if safe_id_column else []
+        if include_source and safe_id_column != safe_column:
+            output.append(f"src.{safe_column}")
+        output.append(f"scored.{alias}")
+        ctes = cls._llm_column_ctes(safe_table, src_columns, safe_column, llm_expr, alias, filter_clause, limit)
+        return f"""{ctes}
+        SELECT {', '.join(output)}
+        FROM src LEFT JOIN scored ON src.{safe_column} <=> scored.{safe_column}
+        ORDER BY {', '.join(f'src.{column}' for column in src_columns)}
+        """
+
+    @classmethod
+    def _build_llm_summary_sql(cls, safe_table: str, safe_column: str, llm_expr: str, alias: str,
+                               filter_clause: str, limit: Any) -> str:
+        """
+        与 _build_llm_column_sql 相同的取行和 LLM 调用，但在 Doris 端按结果 GROUP BY，
+        只返回 K 行直方图 (summary_only 场景不再传输明细行)。
+        """
+        ctes = cls._llm_column_ctes(safe_table, [safe_column], safe_column, llm_expr, alias, filter_clause, limit)
+        return f"""{ctes}
+        SELECT scored.{alias} AS {alias}, COUNT(*) AS cnt
+        FROM src LEFT JOIN scored ON src.{safe_column} <=> scored.{safe_column}
+        GROUP BY scored.{alias}
+        """
+
+    def _llm_summary_response(self, action: str, table: str, sql: str, args: tuple, alias: str) -> Dict[str, Any]:
+        """summary_only=true 时的响应：data 为空，count 为参与统计的行数"""
+        rows = self._query_llm(action, table, sql, args)
+        summary = {row.get(alias): int(row.get('cnt') or 0) for row in rows}
+        return {
+            'success': True,
+            'data': [],
+            'count': sum(summary.values()),
+            'summary': summary,
+            'sql': sql
+        }
 
     @staticmethod
     def _sanitize_alias(alias: str, fallback: str) -> str:
@@ -98,6 +301,27 @@ class ActionHandler:
             filter: WHERE 条件 (可选)
             limit: 限制行数 (可选,默认 100)
         """
+        sql = self.build_query_sql(params)
+        result = self.db.execute_query(sql)
+        
+        return {
+            'success': True,
+            'data': result,
+            'count': len(result),
+            'sql': sql
+        }
+
+    def stream_query(self, params: Dict[str, Any]) -> Tuple[str, Iterator[Dict[str, Any]]]:
+        """
+        普通查询的流式版本：返回 SQL 和逐行产出的迭代器，大 limit 时内存只占一个批次
+
+        参数校验在返回前完成，迭代开始后才真正执行查询。
+        """
+        sql = self.build_query_sql(params)
+        return sql, self.db.iter_query(sql)
+
+    def build_query_sql(self, params: Dict[str, Any]) -> str:
+        """按 query action 的参数生成 SELECT 语句"""
         table = params['table']
         columns = params.get('columns', ['*'])
         selected_fields = params.get('selected_fields') or []
@@ -168,32 +392,9 @@ class ActionHandler:
 
         columns_str = ', '.join(select_expressions)
         sql = f"SELECT {columns_str} FROM {from_clause}"
-        if filter_clause:
-            # 过滤条件比较复杂，可能包含运算符和值，很难完全校验。
-            # 这里存在 SQL 注入风险，但在低代码/BI 场景下，filter 通常由前端生成。
-            # 暂时无法通过简单的 validate_identifier 校验。
-            # 建议: 如果 filter 是由前端构造的结构化对象，应该在后端重组 SQL。
-            # 如果是 raw string，则有风险。
-            # 为了 Review 报告，我们标记此风险，但暂时允许通过（因为不知道 filter 的格式）。
-            sql += f" WHERE {filter_clause}"
-            
-        # 校验 limit
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except:
-                limit = 100
-        
-        sql += f" LIMIT {limit}"
-        
-        result = self.db.execute_query(sql)
-        
-        return {
-            'success': True,
-            'data': result,
-            'count': len(result),
-            'sql': sql
-        }
+        # 过滤条件是前端生成的原始表达式，无法用 validate_identifier 校验；
+        # _filter_limit_suffix 内的 _sanitize_filter 拒绝多语句、注释截断和非条件表达式。
+        return sql + _filter_limit_suffix(filter_clause, limit)
     
     def handle_sentiment(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -205,36 +406,34 @@ class ActionHandler:
             filter: WHERE 条件 (可选)
             limit: 限制行数 (可选,默认 100)
             resource: LLM 资源名 (可选,使用默认)
+            summary_only: 只返回各情感数量，统计在 Doris 端完成 (可选)
         """
         safe_table = self.db.validate_identifier(params['table'])
         safe_column = self.db.validate_identifier(params['column'])
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
+        llm_expr = f"LLM_SENTIMENT(%s, {safe_column})"
 
-        sql = f"""
-        SELECT
-            {safe_column},
-            LLM_SENTIMENT('{safe_resource}', {safe_column}) AS sentiment
-        FROM {safe_table}
-        """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        if params.get('summary_only'):
+            sql = self._build_llm_summary_sql(safe_table, safe_column, llm_expr, 'sentiment', filter_clause, limit)
+            return self._llm_summary_response('sentiment', params['table'], sql, (resource,), 'sentiment')
 
-        result = self.db.execute_query(sql)
+        sql = self._build_llm_column_sql(
+            safe_table,
+            safe_column,
+            llm_expr,
+            'sentiment',
+            filter_clause,
+            limit,
+            **self._llm_output_options(params),
+        )
+
+        result = self._query_llm('sentiment', params['table'], sql, (resource,))
 
         # 统计各情感的数量
-        sentiment_counts = {}
-        for row in result:
-            sentiment = row.get('sentiment', 'unknown')
-            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + 1
+        sentiment_counts = dict(Counter(row.get('sentiment', 'unknown') for row in result))
         
         return {
             'success': True,
@@ -255,6 +454,7 @@ class ActionHandler:
             filter: WHERE 条件 (可选)
             limit: 限制行数 (可选,默认 100)
             resource: LLM 资源名 (可选)
+            summary_only: 只返回各分类数量，统计在 Doris 端完成 (可选)
         """
         safe_table = self.db.validate_identifier(params['table'])
         safe_column = self.db.validate_identifier(params['column'])
@@ -262,34 +462,31 @@ class ActionHandler:
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
 
-        # 标签值做单引号转义，防止 SQL 注入
-        escaped_labels = [str(lbl).replace("'", "''") for lbl in labels]
-        labels_str = "['" + "','".join(escaped_labels) + "']"
+        # 标签值作为绑定参数传入，由驱动转义
+        labels_str = _placeholder_array(len(labels))
+        llm_expr = f"LLM_CLASSIFY(%s, {safe_column}, {labels_str})"
+        args = (resource, *[str(label) for label in labels])
 
-        sql = f"""
-        SELECT
-            {safe_column},
-            LLM_CLASSIFY('{safe_resource}', {safe_column}, {labels_str}) AS category
-        FROM {safe_table}
-        """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        if params.get('summary_only'):
+            sql = self._build_llm_summary_sql(safe_table, safe_column, llm_expr, 'category', filter_clause, limit)
+            return self._llm_summary_response('classify', params['table'], sql, args, 'category')
+
+        sql = self._build_llm_column_sql(
+            safe_table,
+            safe_column,
+            llm_expr,
+            'category',
+            filter_clause,
+            limit,
+            **self._llm_output_options(params),
+        )
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('classify', params['table'], sql, args)
         
         # 统计各分类的数量
-        category_counts = {}
-        for row in result:
-            category = row.get('category', 'unknown')
-            category_counts[category] = category_counts.get(category, 0) + 1
+        category_counts = dict(Counter(row.get('category', 'unknown') for row in result))
         
         return {
             'success': True,
@@ -317,27 +514,21 @@ class ActionHandler:
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
 
-        escaped_fields = [str(f).replace("'", "''") for f in fields]
-        fields_str = "['" + "','".join(escaped_fields) + "']"
+        fields_str = _placeholder_array(len(fields))
 
-        sql = f"""
-        SELECT
-            {safe_column},
-            LLM_EXTRACT('{safe_resource}', {safe_column}, {fields_str}) AS extracted
-        FROM {safe_table}
-        """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        sql = self._build_llm_column_sql(
+            safe_table,
+            safe_column,
+            f"LLM_EXTRACT(%s, {safe_column}, {fields_str})",
+            'extracted',
+            filter_clause,
+            limit,
+            **self._llm_output_options(params),
+        )
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('extract', params['table'], sql, (resource, *[str(field) for field in fields]))
         
         return {
             'success': True,
@@ -378,7 +569,7 @@ class ActionHandler:
         FROM {safe_table}
         """
         if filter_clause:
-            sql += f" WHERE {filter_clause}"
+            sql += f" WHERE {_sanitize_filter(filter_clause)}"
         sql += f" GROUP BY {safe_group_by}"
         
         result = self.db.execute_query(sql)
@@ -408,25 +599,18 @@ class ActionHandler:
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
 
         sql = f"""
         SELECT
             {safe_column1},
             {safe_column2},
-            LLM_SIMILARITY('{safe_resource}', {safe_column1}, {safe_column2}) AS similarity_score
+            LLM_SIMILARITY(%s, {safe_column1}, {safe_column2}) AS similarity_score
         FROM {safe_table}
         """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        sql += _filter_limit_suffix(filter_clause, limit, parameterized=True)
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('similarity', params['table'], sql, (resource,))
         
         return {
             'success': True,
@@ -449,28 +633,23 @@ class ActionHandler:
         """
         safe_table = self.db.validate_identifier(params['table'])
         safe_column = self.db.validate_identifier(params['column'])
-        target_language = str(params['target_language']).replace("'", "''")
+        target_language = str(params['target_language'])
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
 
-        sql = f"""
-        SELECT
-            {safe_column},
-            LLM_TRANSLATE('{safe_resource}', {safe_column}, '{target_language}') AS translated
-        FROM {safe_table}
-        """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        sql = self._build_llm_column_sql(
+            safe_table,
+            safe_column,
+            f"LLM_TRANSLATE(%s, {safe_column}, %s)",
+            'translated',
+            filter_clause,
+            limit,
+            **self._llm_output_options(params),
+        )
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('translate', params['table'], sql, (resource, target_language))
         
         return {
             'success': True,
@@ -486,24 +665,19 @@ class ActionHandler:
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
 
-        sql = f"""
-        SELECT
-            {safe_column},
-            LLM_SUMMARIZE('{safe_resource}', {safe_column}) AS summary
-        FROM {safe_table}
-        """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        sql = self._build_llm_column_sql(
+            safe_table,
+            safe_column,
+            f"LLM_SUMMARIZE(%s, {safe_column})",
+            'summary',
+            filter_clause,
+            limit,
+            **self._llm_output_options(params),
+        )
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('summarize', params['table'], sql, (resource,))
         
         return {
             'success': True,
@@ -520,27 +694,21 @@ class ActionHandler:
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
 
-        escaped_labels = [str(lbl).replace("'", "''") for lbl in labels]
-        labels_str = "['" + "','".join(escaped_labels) + "']"
+        labels_str = _placeholder_array(len(labels))
 
-        sql = f"""
-        SELECT
-            {safe_column},
-            LLM_MASK('{safe_resource}', {safe_column}, {labels_str}) AS masked
-        FROM {safe_table}
-        """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        sql = self._build_llm_column_sql(
+            safe_table,
+            safe_column,
+            f"LLM_MASK(%s, {safe_column}, {labels_str})",
+            'masked',
+            filter_clause,
+            limit,
+            **self._llm_output_options(params),
+        )
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('mask', params['table'], sql, (resource, *[str(label) for label in labels]))
         
         return {
             'success': True,
@@ -556,24 +724,19 @@ class ActionHandler:
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
 
-        sql = f"""
-        SELECT
-            {safe_column},
-            LLM_FIXGRAMMAR('{safe_resource}', {safe_column}) AS corrected
-        FROM {safe_table}
-        """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        sql = self._build_llm_column_sql(
+            safe_table,
+            safe_column,
+            f"LLM_FIXGRAMMAR(%s, {safe_column})",
+            'corrected',
+            filter_clause,
+            limit,
+            **self._llm_output_options(params),
+        )
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('fixgrammar', params['table'], sql, (resource,))
         
         return {
             'success': True,
@@ -589,24 +752,19 @@ class ActionHandler:
         filter_clause = params.get('filter', '')
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
+        self.db.validate_identifier(resource)
 
-        sql = f"""
-        SELECT
-            {safe_column},
-            LLM_GENERATE('{safe_resource}', {safe_column}) AS generated
-        FROM {safe_table}
-        """
-        if filter_clause:
-            sql += f" WHERE {filter_clause}"
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
-        sql += f" LIMIT {limit}"
+        sql = self._build_llm_column_sql(
+            safe_table,
+            safe_column,
+            f"LLM_GENERATE(%s, {safe_column})",
+            'generated',
+            filter_clause,
+            limit,
+            **self._llm_output_options(params),
+        )
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('generate', params['table'], sql, (resource,))
         
         return {
             'success': True,
@@ -619,27 +777,27 @@ class ActionHandler:
         """布尔过滤"""
         safe_table = self.db.validate_identifier(params['table'])
         safe_column = self.db.validate_identifier(params['column'])
-        condition = str(params['condition']).replace("'", "''")
+        condition = str(params['condition'])
         limit = params.get('limit', 100)
         resource = params.get('resource', DEFAULT_LLM_RESOURCE)
-        safe_resource = self.db.validate_identifier(resource)
-
-        if not isinstance(limit, int):
-            try:
-                limit = int(limit)
-            except Exception:
-                limit = 100
+        self.db.validate_identifier(resource)
+        limit = _coerce_limit(limit)
 
+        # LLM_FILTER 只在 scored 中计算一次，外层按结果过滤，避免 SELECT/WHERE 各调用一次模型
         sql = f"""
-        SELECT
-            {safe_column},
-            LLM_FILTER('{safe_resource}', CONCAT('{condition}', {safe_column})) AS is_valid
-        FROM {safe_table}
-        WHERE LLM_FILTER('{safe_resource}', CONCAT('{condition}', {safe_column})) = 1
+        WITH scored AS (
+            SELECT
+                {safe_column},
+                LLM_FILTER(%s, CONCAT(%s, {safe_column})) AS is_valid
+            FROM {safe_table}
+        )
+        SELECT {safe_column}, is_valid
+        FROM scored
+        WHERE is_valid = 1
         LIMIT {limit}
         """
         
-        result = self.db.execute_query(sql)
+        result = self._query_llm('filter', params['table'], sql, (resource, condition))
         
         return {
             'success': True,
@@ -6,8 +6,14 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson  # noqa: F401 - ORJSONResponse needs it at render time
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except Exception:  # pragma: no cover - fallback for minimal envs
+    DefaultResponse = JSONResponse
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import uvicorn
 import traceback
 import os
@@ -17,10 +23,23 @@ import asyncio
 import logging
 import inspect
 import uuid
+import copy
+import time
 from urllib.parse import urlsplit, urlunsplit
 from zoneinfo import ZoneInfo
 
-from config import API_HOST, API_PORT, DORIS_CONFIG, ANALYST_DEFAULT_DEPTH
+from config import (
+    API_HOST,
+    API_PORT,
+    DORIS_CONFIG,
+    ANALYST_DEFAULT_DEPTH,
+    THREAD_POOL_SIZE,
+    ANALYZE_WORKERS,
+    ANALYZE_QUEUE_SIZE,
+    API_RELOAD,
+    UVICORN_WORKERS,
+    API_DEBUG,
+)
 from handlers import action_handler
 from db import doris_client
 from upload_handler import excel_handler
@@ -45,6 +64,12 @@ from vanna_native_runtime import (
 @asynccontextmanager
 async def lifespan(application: FastAPI):
     """Application startup/shutdown lifecycle."""
+    # to_thread 走默认线程池；CPython 默认 min(32, cpu+4) 容易被并发同步占满。
+    # 该大小按单个 worker 进程计，多 worker 部署时应相应调小 THREAD_POOL_SIZE。
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREAD_POOL_SIZE, thread_name_prefix="doris-io")
+    )
+
     async def init_in_background():
         global doris_ready
         loop = asyncio.get_running_loop()
@@ -56,14 +81,32 @@ async def lifespan(application: FastAPI):
         if ready:
             doris_ready = True
             sync_scheduler.register(app_scheduler)
+            await asyncio.to_thread(sync_scheduler.schedule_next_wakeup)
             if analysis_scheduler is not None:
                 analysis_scheduler.set_event_loop(loop)
                 analysis_scheduler.register(app_scheduler)
             app_scheduler.start()
 
+    global analyze_queue
+    analyze_queue = asyncio.Queue(maxsize=max(ANALYZE_QUEUE_SIZE, 1))
+    analyze_workers = [
+        asyncio.create_task(_analyze_worker(analyze_queue)) for _ in range(max(ANALYZE_WORKERS, 1))
+    ]
+
     asyncio.create_task(init_in_background())
     yield
     app_scheduler.stop()
+    # 尽量分析完已入队的表，超时后放弃剩余任务
+    try:
+        await asyncio.wait_for(analyze_queue.join(), timeout=_ANALYZE_SHUTDOWN_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"⚠️ 仍有 {analyze_queue.qsize()} 个表未完成元数据分析，已放弃")
+    for worker in analyze_workers:
+        worker.cancel()
+    await asyncio.gather(*analyze_workers, return_exceptions=True)
+    analyze_queue = None
+    datasource_handler.close_remote_pools()
+    doris_client.close()
 
 
 app = FastAPI(
@@ -71,11 +114,16 @@ app = FastAPI(
     description="极简的 HTTP API Gateway for Apache Doris",
     version="1.0.0",
     lifespan=lifespan,
+    # 查询/分析结果动辄上千行，orjson 编码比标准库 json 快数倍；未安装时退回 JSONResponse
+    default_response_class=DefaultResponse,
 )
 
 
 # Global readiness flag for Doris init to avoid 502s after reboot.
 doris_ready = False
+# 元数据分析队列，由 lifespan 创建并启动 ANALYZE_WORKERS 个消费者
+analyze_queue: Optional[asyncio.Queue] = None
+_ANALYZE_SHUTDOWN_TIMEOUT = 30
 analyst_agent: Optional[AnalystAgent] = None
 analysis_scheduler: Optional[AnalysisScheduler] = None
 analysis_dispatcher: Optional[AnalysisDispatcher] = None
@@ -133,7 +181,22 @@ def _normalize_llm_resource(row_group: Dict[str, Any]) -> Dict[str, Any]:
     return normalized
 
 
+# SHOW RESOURCES 的解析结果；LLM 配置读多写少，增删改接口里立即失效
+_LLM_RESOURCES_CACHE_TTL = 60.0
+_llm_resources_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
+
+
+def invalidate_llm_resources_cache() -> None:
+    global _llm_resources_cache
+    _llm_resources_cache = None
+
+
 def load_llm_resources() -> List[Dict[str, Any]]:
+    global _llm_resources_cache
+    cached = _llm_resources_cache
+    if cached is not None and time.monotonic() - cached[0] < _LLM_RESOURCES_CACHE_TTL:
+        return copy.deepcopy(cached[1])
+
     sql = 'SHOW RESOURCES WHERE NAME LIKE "%"'
     all_resources = doris_client.execute_query(sql)
 
@@ -156,7 +219,9 @@ def load_llm_resources() -> List[Dict[str, Any]]:
         if item and value is not None:
             resources_dict[name]['properties'][item] = value
 
-    return [_normalize_llm_resource(resource) for resource in resources_dict.values()]
+    resources = [_normalize_llm_resource(resource) for resource in resources_dict.values()]
+    _llm_resources_cache = (time.monotonic(), copy.deepcopy(resources))
+    return resources
 
 
 def _derive_base_url(endpoint: str) -> str:
@@ -380,6 +445,15 @@ class ExecuteRequest(BaseModel):
         }
     })
 
+    def merged_params(self) -> Dict[str, Any]:
+        """把顶层 table/column 合并进 params (每个请求的 params 都是新 dict，原地补充即可)"""
+        params = self.params if self.params is not None else {}
+        if self.table:
+            params['table'] = self.table
+        if self.column:
+            params['column'] = self.column
+        return params
+
 
 _RESOURCE_NAME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9_\-]{0,127}$')
 
@@ -409,6 +483,15 @@ def _summarize_error(error: Exception) -> str:
     return _redact_sensitive(str(error).splitlines()[0])[:500]
 
 
+def _error_detail(error: Exception) -> Dict[str, Any]:
+    """500 响应体；完整堆栈写日志，只有 API_DEBUG 时才格式化进响应"""
+    logger.exception("Request failed: %s", error)
+    detail: Dict[str, Any] = {"error": str(error)}
+    if API_DEBUG:
+        detail["traceback"] = traceback.format_exc()
+    return detail
+
+
 def _format_sse_event(event: str, data: Dict[str, Any]) -> str:
     payload = json.dumps(data, ensure_ascii=False, default=str)
     return f"event: {event}\ndata: {payload}\n\n"
@@ -1533,15 +1616,8 @@ async def execute_action(req: ExecuteRequest):
     - filter: 布尔过滤
     """
     try:
-        # 合并参数
-        params = req.params or {}
-        if req.table:
-            params['table'] = req.table
-        if req.column:
-            params['column'] = req.column
-        
         # 执行操作
-        result = await action_handler.execute_async(req.action, params)
+        result = await action_handler.execute_async(req.action, req.merged_params())
         return result
         
     except ValueError as e:
@@ -1549,18 +1625,45 @@ async def execute_action(req: ExecuteRequest):
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail={
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
+            detail=_error_detail(e)
         )
 
 
+@app.post("/api/execute/stream")
+async def execute_action_stream(req: ExecuteRequest):
+    """
+    query action 的流式版本，返回 NDJSON：每行一条记录，最后一行为 {"done": true, "count": N, "sql": ...}
+
+    行数较多时不必在内存中攒齐整个结果，首行在查询开始返回数据后即可送达。
+    """
+    if req.action != 'query':
+        raise HTTPException(status_code=400, detail="Only the query action supports streaming")
+    try:
+        sql, rows = action_handler.stream_query(req.merged_params())
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def ndjson_lines():
+        count = 0
+        try:
+            for row in rows:
+                count += 1
+                yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            logger.exception("streamed query failed after %s rows", count)
+            yield json.dumps({"done": True, "success": False, "count": count, "error": str(e)}, ensure_ascii=False) + "\n"
+            return
+        yield json.dumps({"done": True, "success": True, "count": count, "sql": sql}, ensure_ascii=False) + "\n"
+
+    # 同步生成器由 Starlette 放到线程池迭代，阻塞的 fetchmany 不占用事件循环
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 @app.get("/api/tables")
 async def list_tables():
     """获取所有表"""
     try:
-        tables = doris_client.get_tables()
+        tables = await doris_client.get_tables_async()
         return {
             "success": True,
             "tables": tables,
@@ -1588,7 +1691,7 @@ async def get_query_catalog():
 async def get_table_schema(table_name: str):
     """获取表结构"""
     try:
-        schema = doris_client.get_table_schema(table_name)
+        schema = await doris_client.get_table_schema_async(table_name)
         return {
             "success": True,
             "table": table_name,
@@ -1614,6 +1717,7 @@ async def create_llm_config(req: LLMConfigRequest):
         """
 
         doris_client.execute_update(sql)
+        invalidate_llm_resources_cache()
 
         return {
             "success": True,
@@ -1661,6 +1765,7 @@ async def update_llm_config(resource_name: str, req: LLMConfigRequest):
         )
         """
         doris_client.execute_update(sql)
+        invalidate_llm_resources_cache()
 
         return {
             "success": True,
@@ -1733,6 +1838,7 @@ async def delete_llm_config(resource_name: str):
     try:
         sql = f"DROP RESOURCE '{resource_name}'"
         doris_client.execute_update(sql)
+        invalidate_llm_resources_cache()
 
         return {
             "success": True,
@@ -2487,15 +2593,11 @@ async def natural_language_query(request: NLQueryRequest):
             status_code = 400
         raise HTTPException(status_code=status_code, detail=llm_error.to_dict())
     except Exception as e:
-        logger.error(f"=== Error in natural language query: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.error("=== Error in natural language query: %s", e)
 
         raise HTTPException(
             status_code=500,
-            detail={
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
+            detail=_error_detail(e)
         )
 
 
@@ -3069,8 +3171,8 @@ async def list_relationships(tables: Optional[str] = None):
 async def preview_excel_file(file: UploadFile = File(...), rows: int = 10):
     """预览 Excel 文件"""
     try:
-        content = await file.read()
-        result = await excel_handler.preview_excel_async(content, rows)
+        # UploadFile 底层是 SpooledTemporaryFile (超过阈值落盘)，直接交给 pandas 读取，不再整体读成 bytes
+        result = await excel_handler.preview_excel_async(file.file, rows)
 
         return {
             "success": True,
@@ -3080,10 +3182,7 @@ async def preview_excel_file(file: UploadFile = File(...), rows: int = 10):
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail={
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
+            detail=_error_detail(e)
         )
 
 
@@ -3102,6 +3201,24 @@ async def _analyze_table_async(table_name: str, source_type: str):
         print(f"❌ 元数据分析异常: {e}")
 
 
+async def _analyze_worker(queue: asyncio.Queue):
+    """逐个消费待分析的表，限制同时进行的 LLM 调用和 Doris 扫描数量"""
+    while True:
+        table_name, source_type = await queue.get()
+        try:
+            await _analyze_table_async(table_name, source_type)
+        finally:
+            queue.task_done()
+
+
+async def _enqueue_table_analysis(table_name: str, source_type: str):
+    """把表放进元数据分析队列；队列满时等待 (背压)，未经 lifespan 启动时退回直接建任务"""
+    if analyze_queue is None:
+        asyncio.create_task(_analyze_table_async(table_name, source_type))
+        return
+    await analyze_queue.put((table_name, source_type))
+
+
 @app.post("/api/upload")
 async def upload_excel(
     file: UploadFile = File(...),
@@ -3123,8 +3240,6 @@ async def upload_excel(
     try:
         import json
 
-        content = await file.read()
-
         # 解析列映射
         mapping = None
         if column_mapping:
@@ -3134,7 +3249,7 @@ async def upload_excel(
         create_table_bool = create_table.lower() in ('true', '1', 'yes')
 
         result = await excel_handler.import_excel_async(
-            file_content=content,
+            file_content=file.file,
             table_name=table_name,
             column_mapping=mapping,
             create_table_if_not_exists=create_table_bool,
@@ -3156,9 +3271,8 @@ async def upload_excel(
 
         # 自动触发元数据分析（异步，不阻塞返回）
         try:
-            import asyncio
             if result.get('success'):
-                asyncio.create_task(_analyze_table_async(actual_table_name, 'excel'))
+                await _enqueue_table_analysis(actual_table_name, 'excel')
         except Exception as analyze_error:
             print(f"⚠️ 元数据分析触发失败: {analyze_error}")
 
@@ -3167,10 +3281,7 @@ async def upload_excel(
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail={
-                "error": str(e),
-                "traceback": traceback.format_exc()
-            }
+            detail=_error_detail(e)
         )
 
 
@@ -3279,12 +3390,11 @@ async def delete_datasource(ds_id: str):
 
 
 @app.get("/api/datasource/{ds_id}/tables")
-async def get_datasource_tables(ds_id: str):
+async def get_datasource_tables(ds_id: str, offset: int = 0, limit: Optional[int] = None):
     """获取数据源中的表列表"""
     try:
-        print(f"📋 获取数据源表列表: ds_id={ds_id}")
+        logger.debug("📋 获取数据源表列表: ds_id=%s", ds_id)
         ds = await datasource_handler.get_datasource(ds_id)
-        print(f"📋 数据源信息: {ds}")
         if not ds:
             raise HTTPException(status_code=404, detail="数据源不存在")
 
@@ -3293,16 +3403,16 @@ async def get_datasource_tables(ds_id: str):
             port=ds['port'],
             user=ds['user'],
             password=ds['password'],
-            database=ds['database_name']
+            database=ds['database_name'],
+            offset=offset,
+            limit=limit,
         )
-        print(f"📋 获取表列表结果: {result}")
+        logger.debug("📋 获取表列表结果: %s", result)
         return result
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        print(f"❌ 获取表列表异常: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("❌ 获取表列表异常: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -3325,8 +3435,7 @@ async def sync_datasource_table(ds_id: str, req: SyncTableRequest):
         # 自动触发元数据分析
         target = req.target_table or req.source_table
         try:
-            import asyncio
-            asyncio.create_task(_analyze_table_async(target, 'database_sync'))
+            await _enqueue_table_analysis(target, 'database_sync')
         except Exception as analyze_error:
             print(f"⚠️ 元数据分析触发失败: {analyze_error}")
 
@@ -3348,12 +3457,11 @@ async def sync_multiple_tables(ds_id: str, req: SyncMultipleRequest):
 
         # 为每个成功同步的表触发元数据分析
         if result.get('results'):
-            import asyncio
             for table_result in result['results']:
                 if table_result.get('success'):
                     target = table_result.get('target_table')
                     try:
-                        asyncio.create_task(_analyze_table_async(target, 'database_sync'))
+                        await _enqueue_table_analysis(target, 'database_sync')
                     except Exception as e:
                         print(f"⚠️ 元数据分析触发失败: {e}")
 
@@ -3453,6 +3561,7 @@ async def create_sync_schedule(req: ScheduleSyncRequest):
             sync_strategy=req.sync_strategy or "full",
             incremental_time_field=req.incremental_time_field,
         )
+        await asyncio.to_thread(sync_scheduler.schedule_next_wakeup)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -3471,6 +3580,7 @@ async def update_sync_task(task_id: str, req: UpdateSyncTaskRequest):
             schedule_day_of_month=req.schedule_day_of_month,
             enabled_for_ai=req.enabled_for_ai
         )
+        await asyncio.to_thread(sync_scheduler.schedule_next_wakeup)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -3519,6 +3629,7 @@ async def delete_sync_task(task_id: str):
     """删除同步任务"""
     try:
         result = await datasource_handler.delete_sync_task(task_id)
+        await asyncio.to_thread(sync_scheduler.schedule_next_wakeup)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -3843,6 +3954,8 @@ async def delete_table_registry(
             drop_physical=drop_physical,
             cleanup_history=cleanup_history,
         )
+        metadata_analyzer.invalidate_metadata_cache()
+        action_handler.invalidate_table(table_name)
         if not result.get('success'):
             raise HTTPException(status_code=400, detail=result.get('error'))
         return result
@@ -3898,9 +4011,11 @@ async def analysis_websocket(ws: WebSocket):
 
 
 if __name__ == "__main__":
+    # uvicorn[standard] 自带 uvloop/httptools，loop/http 默认 auto 即会选用
     uvicorn.run(
         "main:app",
         host=API_HOST,
         port=API_PORT,
-        reload=True
+        reload=API_RELOAD,
+        workers=1 if API_RELOAD else max(UVICORN_WORKERS, 1),
     )
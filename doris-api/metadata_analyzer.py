@@ -2,14 +2,16 @@
 表格元数据分析器
 使用 LLM 分析表格结构和用途
 """
+import copy
 import os
 import json
 import asyncio
 import hashlib
 import logging
 import re
+import time
 from urllib.parse import urlsplit, urlunsplit
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from db import doris_client
 from llm_executor import LLMExecutionError, LLMExecutor
@@ -27,8 +29,12 @@ _METADATA_RESOURCE_QUERY_TIMEOUT_SECONDS = int(
 class MetadataAnalyzer:
     """表格元数据分析器"""
     
+    # list_all_metadata 结果缓存秒数；本进程写入元数据时立即失效
+    _METADATA_LIST_TTL = 60.0
+
     def __init__(self):
         self.db = doris_client
+        self._metadata_list_cache: Optional[Tuple[float, List[Dict[str, Any]]]] = None
         # DeepSeek API 配置
         self.api_key = os.getenv('DEEPSEEK_API_KEY') or os.getenv('OPENAI_API_KEY')
         self.model = os.getenv('DEEPSEEK_MODEL', 'deepseek-chat')
@@ -658,6 +664,7 @@ sample_rows:
             now,
             source_type
         ))
+        self.invalidate_metadata_cache()
         self._mark_table_analysis_status(table_name, "ready", analyzed_at=now)
 
     def _update_registry_semantics(self, table_name: str, analysis: Dict[str, Any]) -> None:
@@ -861,8 +868,15 @@ sample_rows:
             return meta
         return None
 
+    def invalidate_metadata_cache(self) -> None:
+        """元数据写入/删除后调用，下次 list_all_metadata 重新查询"""
+        self._metadata_list_cache = None
+
     def list_all_metadata(self) -> list:
         """获取所有表格元数据"""
+        cached = self._metadata_list_cache
+        if cached is not None and time.monotonic() - cached[0] < self._METADATA_LIST_TTL:
+            return copy.deepcopy(cached[1])
         sql = "SELECT * FROM `_sys_table_metadata` ORDER BY analyzed_at DESC"
         results = self.db.execute_query(sql)
 
@@ -876,6 +890,8 @@ sample_rows:
             except:
                 meta['sample_queries'] = []
 
+        # 解码后的 columns_info/sample_queries 是可变对象，缓存与调用方各持一份深拷贝
+        self._metadata_list_cache = (time.monotonic(), copy.deepcopy(results))
         return results
 
     def _list_table_registry(self) -> list:
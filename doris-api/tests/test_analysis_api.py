@@ -383,6 +383,61 @@ def test_app_uses_lifespan_context_manager():
     assert main.app.router.lifespan_context is main.lifespan
 
 
+
+def test_lifespan_installs_sized_default_executor(monkeypatch):
+    import asyncio
+    import threading
+
+    main = reload_main()
+    main.doris_ready = True
+    main.analysis_scheduler = None
+    monkeypatch.setattr(main.app_scheduler, "stop", lambda: None)
+    monkeypatch.setattr(main.datasource_handler, "close_remote_pools", lambda: None)
+    closed = []
+    monkeypatch.setattr(main.doris_client, "close", lambda: closed.append(True))
+
+    async def run():
+        async with main.lifespan(main.app):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, lambda: threading.current_thread().name)
+
+    assert asyncio.run(run()).startswith("doris-io")
+    assert closed == [True]
+
+def test_table_analysis_runs_on_bounded_worker_queue(monkeypatch):
+    import asyncio
+
+    main = reload_main()
+    main.doris_ready = True
+    main.analysis_scheduler = None
+    monkeypatch.setattr(main.app_scheduler, "stop", lambda: None)
+    monkeypatch.setattr(main.datasource_handler, "close_remote_pools", lambda: None)
+    monkeypatch.setattr(main.doris_client, "close", lambda: None)
+    monkeypatch.setattr(main, "ANALYZE_WORKERS", 2)
+    running = {"now": 0, "peak": 0}
+    analyzed = []
+
+    async def fake_analyze(table_name, source_type):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        analyzed.append((table_name, source_type))
+
+    monkeypatch.setattr(main, "_analyze_table_async", fake_analyze)
+
+    async def run():
+        async with main.lifespan(main.app):
+            for index in range(5):
+                await main._enqueue_table_analysis(f"t{index}", "database_sync")
+
+    asyncio.run(run())
+
+    assert sorted(analyzed) == [(f"t{index}", "database_sync") for index in range(5)]
+    assert running["peak"] == 2
+    assert main.analyze_queue is None
+
+
 def test_llm_config_request_uses_configdict_for_protected_namespaces():
     main = reload_main()
 
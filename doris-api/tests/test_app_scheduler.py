@@ -45,3 +45,198 @@ def test_sync_scheduler_registers_expected_jobs():
         "field_catalog_refresh",
         "sync_checker",
     ]
+
+
+def test_app_scheduler_register_date_replaces_one_shot_job():
+    from datetime import datetime, timedelta
+
+    scheduler = AppScheduler()
+    first = datetime.now() + timedelta(hours=1)
+    second = datetime.now() + timedelta(minutes=5)
+
+    scheduler.register_date(lambda: None, run_date=first, job_id="wakeup")
+    scheduler.register_date(lambda: None, run_date=second, job_id="wakeup")
+
+    jobs = scheduler._scheduler.get_jobs()
+    assert [job.id for job in jobs] == ["wakeup"]
+    assert scheduler._job_specs["wakeup"]["run_date"] == second
+
+
+def test_sync_scheduler_wakeup_follows_earliest_next_sync():
+    from datetime import datetime, timedelta
+
+    class PendingHandler:
+        def __init__(self):
+            self.next_at = datetime.now() + timedelta(minutes=30)
+
+        def get_next_sync_time(self):
+            return self.next_at
+
+        def claim_due_tasks(self):
+            return []
+
+    shared_scheduler = AppScheduler()
+    handler = PendingHandler()
+    sync_scheduler = SyncScheduler(handler=handler)
+    sync_scheduler.register(shared_scheduler)
+
+    run_at = sync_scheduler.schedule_next_wakeup()
+    assert run_at == handler.next_at
+    assert "sync_wakeup" in {job.id for job in shared_scheduler._scheduler.get_jobs()}
+
+    handler.next_at = None
+    sync_scheduler._check_and_execute_tasks()
+    assert "sync_wakeup" not in {job.id for job in shared_scheduler._scheduler.get_jobs()}
+
+
+def test_sync_scheduler_shares_one_connection_per_datasource():
+    class FakeConn:
+        def __init__(self, ds_id):
+            self.ds_id = ds_id
+            self.closed = False
+            self.pings = 0
+
+        def ping(self, reconnect=True):
+            self.pings += 1
+
+        def close(self):
+            self.closed = True
+
+    class GroupingHandler:
+        def __init__(self):
+            self.opened = []
+            self.calls = []
+            self.marked = []
+            self.deferred = []
+
+        def get_next_sync_time(self):
+            return None
+
+        def claim_due_tasks(self):
+            return [
+                {"id": "t1", "datasource_id": "b", "source_table": "x", "target_table": "x"},
+                {"id": "t2", "datasource_id": "a", "source_table": "y", "target_table": "y"},
+                {"id": "t3", "datasource_id": "b", "source_table": "z", "target_table": "z"},
+                {"id": "t4", "datasource_id": "b", "source_table": "w", "target_table": "w"},
+            ]
+
+        def open_datasource_connection(self, ds_id):
+            conn = FakeConn(ds_id)
+            self.opened.append(conn)
+            return conn
+
+        def execute_scheduled_task(self, task, conn=None, record_run=True):
+            assert record_run is False
+            self.calls.append((task["id"], conn))
+            return {"success": task["id"] != "t3", "error": "boom"}
+
+        def mark_tasks_synced(self, tasks):
+            self.marked.append([task["id"] for task in tasks])
+
+        def defer_failed_tasks(self, tasks):
+            self.deferred.append([task["id"] for task in tasks])
+
+    handler = GroupingHandler()
+    SyncScheduler(handler=handler)._check_and_execute_tasks()
+
+    # Datasource groups run concurrently, so only the set of opened connections is fixed.
+    opened = {conn.ds_id: conn for conn in handler.opened}
+    assert sorted(opened) == ["a", "b"] and len(handler.opened) == 2
+    assert all(conn.closed for conn in handler.opened)
+    calls = dict(handler.calls)
+    assert calls["t2"] is opened["a"]
+    assert calls["t1"] is calls["t3"] is opened["b"]
+    # After t3 fails the shared connection is dropped for the rest of its group.
+    assert calls["t4"] is None
+    # The shared connection is health-checked before it is reused for t3.
+    assert opened["b"].pings == 1
+    # Successful runs are recorded in one batched write; the failed one is retried after a backoff.
+    assert handler.marked == [["t2", "t1", "t4"]]
+    assert handler.deferred == [["t3"]]
+
+
+def test_sync_scheduler_runs_datasources_in_parallel():
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    class ParallelHandler:
+        def __init__(self):
+            self.marked = []
+            self.deferred = []
+
+        def get_next_sync_time(self):
+            return None
+
+        def claim_due_tasks(self):
+            return [
+                {"id": "t1", "datasource_id": "a", "source_table": "x", "target_table": "x"},
+                {"id": "t2", "datasource_id": "b", "source_table": "y", "target_table": "y"},
+            ]
+
+        def open_datasource_connection(self, ds_id):
+            return None
+
+        def execute_scheduled_task(self, task, conn=None, record_run=True):
+            # Both datasources must be in flight at once for the barrier to release.
+            barrier.wait()
+            return {"success": True}
+
+        def mark_tasks_synced(self, tasks):
+            self.marked.append([task["id"] for task in tasks])
+
+        def defer_failed_tasks(self, tasks):
+            self.deferred.append([task["id"] for task in tasks])
+
+    handler = ParallelHandler()
+    SyncScheduler(handler=handler)._check_and_execute_tasks()
+
+    assert handler.marked == [["t1", "t2"]]
+    assert handler.deferred == [[]]
+
+
+def test_sync_scheduler_skips_overlapping_ticks():
+    import threading
+    from datetime import datetime, timedelta
+
+    started = threading.Event()
+    release = threading.Event()
+
+    class SlowHandler:
+        def __init__(self):
+            self.claims = 0
+            self.next_at = datetime.now() - timedelta(minutes=1)
+
+        def get_next_sync_time(self):
+            return self.next_at
+
+        def claim_due_tasks(self):
+            self.claims += 1
+            started.set()
+            release.wait(5)
+            return []
+
+        def mark_tasks_synced(self, tasks):
+            pass
+
+        def defer_failed_tasks(self, tasks):
+            pass
+
+    shared_scheduler = AppScheduler()
+    handler = SlowHandler()
+    sync_scheduler = SyncScheduler(handler=handler)
+    sync_scheduler.register(shared_scheduler)
+
+    worker = threading.Thread(target=sync_scheduler._check_and_execute_tasks)
+    worker.start()
+    assert started.wait(5)
+    # A second tick, or a wakeup requested mid-tick, does not start another run.
+    sync_scheduler._check_and_execute_tasks()
+    assert sync_scheduler.schedule_next_wakeup() is None
+    release.set()
+    worker.join(5)
+
+    assert handler.claims == 1
+    # A task still overdue after the tick is not re-fired immediately.
+    run_at = shared_scheduler._job_specs["sync_wakeup"]["run_date"]
+    assert run_at >= datetime.now() + timedelta(seconds=20)
@@ -10,12 +10,14 @@ from handlers import ActionHandler
 class RecordingQueryDb:
     def __init__(self):
         self.sql = None
+        self.params = None
 
     def validate_identifier(self, identifier):
         return f"`{identifier}`"
 
     def execute_query(self, sql, params=None):
         self.sql = sql
+        self.params = params
         return [{"机构基础表_机构名称": "绿色江南"}]
 
 
@@ -100,3 +102,371 @@ def test_short_field_display_name_strips_data_type_suffix():
         )
         == "是否为枢纽型组织"
     )
+
+
+def test_execute_async_dispatches_every_action_on_action_executor():
+    import asyncio
+    import threading
+
+    import pytest
+
+    handler = ActionHandler()
+    seen = []
+
+    def fake_classify(params):
+        seen.append((threading.current_thread().name, params))
+        return {"success": True}
+
+    handler.handle_classify = fake_classify
+
+    assert asyncio.run(handler.execute_async("classify", {"table": "t"})) == {"success": True}
+    assert seen[0][0].startswith("action")
+    assert seen[0][1] == {"table": "t"}
+    assert handler.execute("classify", {"table": "u"}) == {"success": True}
+
+    with pytest.raises(ValueError):
+        asyncio.run(handler.execute_async("unknown", {}))
+
+
+def test_llm_actions_call_the_model_once_per_distinct_value():
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+    handler.db.execute_query = lambda sql, params=None: setattr(handler.db, "sql", sql) or [
+        {"review": "good", "sentiment": "positive"},
+        {"review": "good", "sentiment": "positive"},
+    ]
+
+    result = handler.handle_sentiment({"table": "reviews", "column": "review", "filter": "id > 3", "limit": "5"})
+
+    sql = " ".join(handler.db.sql.split())
+    assert "SELECT `review` FROM `reviews` WHERE id > 3 ORDER BY `review` LIMIT 5" in sql
+    assert "FROM (SELECT DISTINCT `review` FROM src) uniq" in sql
+    assert sql.count("LLM_SENTIMENT(") == 1
+    assert "src.`review` <=> scored.`review`" in sql
+    assert result["summary"] == {"positive": 2}
+
+
+def test_llm_action_results_are_cached_per_normalized_sql():
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+    calls = []
+    handler.db.execute_query = lambda sql, params=None: calls.append(sql) or [{"review": "ok", "summary": "fine"}]
+
+    params = {"table": "reviews", "column": "review", "limit": 10}
+    first = handler.handle_summarize(params)
+    second = handler.handle_summarize({**params, "limit": "10"})
+    handler.handle_generate(params)
+
+    assert len(calls) == 2
+    assert first["data"] == second["data"]
+    assert first["data"] is not second["data"]
+
+
+def test_filter_action_evaluates_llm_filter_once_per_row():
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+
+    handler.handle_filter({"table": "reviews", "column": "review", "condition": "mentions 'price'", "limit": 20})
+
+    sql = " ".join(handler.db.sql.split())
+    assert sql.count("LLM_FILTER(") == 1
+    assert "CONCAT(%s, `review`)" in sql
+    assert handler.db.params == ("default_llm", "mentions 'price'")
+    assert sql.endswith("FROM scored WHERE is_valid = 1 LIMIT 20")
+
+
+def test_llm_actions_omit_source_column_only_on_request():
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+
+    handler.handle_translate({"table": "reviews", "column": "review", "target_language": "en"})
+    default_sql = " ".join(handler.db.sql.split())
+    assert "SELECT src.`review`, scored.translated FROM src" in default_sql
+
+    handler.handle_translate(
+        {"table": "reviews", "column": "review", "target_language": "en", "include_source": False}
+    )
+    assert "SELECT scored.translated FROM src" in " ".join(handler.db.sql.split())
+
+    handler.handle_translate(
+        {"table": "reviews", "column": "review", "target_language": "en", "include_source": False, "id_column": "id"}
+    )
+    sql = " ".join(handler.db.sql.split())
+    # src is read twice, so it is ordered to pick the same rows each time; output keeps source order.
+    assert "SELECT `id`, `review` FROM `reviews` ORDER BY `id`, `review` LIMIT 100" in sql
+    assert "SELECT src.`id`, scored.translated FROM src" in sql
+    assert sql.endswith("ORDER BY src.`id`, src.`review`")
+
+
+def test_execute_stream_endpoint_emits_ndjson_rows_then_summary(monkeypatch):
+    import json
+
+    main = reload_main()
+    monkeypatch.setenv("SMATRIX_API_KEY", "secret-key")
+    captured = {}
+
+    def fake_stream_query(params):
+        captured.update(params)
+        return "SELECT * FROM `orders` LIMIT 2", iter([{"id": 1}, {"id": 2}])
+
+    monkeypatch.setattr(main.action_handler, "stream_query", fake_stream_query)
+    client = TestClient(main.app)
+
+    response = client.post(
+        "/api/execute/stream",
+        headers={"X-API-Key": "secret-key"},
+        json={"action": "query", "table": "orders", "params": {"limit": 2}},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[:2] == [{"id": 1}, {"id": 2}]
+    assert lines[2] == {"done": True, "success": True, "count": 2, "sql": "SELECT * FROM `orders` LIMIT 2"}
+    assert captured == {"limit": 2, "table": "orders"}
+
+    rejected = client.post(
+        "/api/execute/stream",
+        headers={"X-API-Key": "secret-key"},
+        json={"action": "sentiment", "table": "orders", "column": "note"},
+    )
+    assert rejected.status_code == 400
+
+
+def test_doris_client_iter_query_streams_in_batches(monkeypatch):
+    import db
+
+    events = []
+
+    class StreamingCursor:
+        def __init__(self):
+            self.batches = [[{"id": 1}, {"id": 2}], [{"id": 3}], []]
+
+        def execute(self, sql, params=None):
+            events.append(("execute", sql))
+
+        def fetchmany(self, size):
+            events.append(("fetchmany", size))
+            return self.batches.pop(0)
+
+        def close(self):
+            events.append(("cursor_close", None))
+
+    class StreamingConn:
+        def cursor(self, cursor_class=None):
+            events.append(("cursor", cursor_class))
+            return StreamingCursor()
+
+        def close(self):
+            events.append(("conn_close", None))
+
+    client = db.DorisClient()
+    monkeypatch.setattr(client, "get_connection", lambda: StreamingConn())
+
+    rows = client.iter_query("SELECT id FROM t", batch_size=2)
+    assert events == []
+    assert list(rows) == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert events[0] == ("cursor", db.pymysql.cursors.SSDictCursor)
+    assert events[-2:] == [("cursor_close", None), ("conn_close", None)]
+    assert events.count(("fetchmany", 2)) == 3
+
+
+def test_llm_actions_bind_values_and_escape_percent_in_filter():
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+
+    handler.handle_classify(
+        {
+            "table": "reviews",
+            "column": "review",
+            "labels": ["good", "it's bad"],
+            "filter": "review LIKE '%refund%'",
+            "resource": "my_llm",
+        }
+    )
+
+    sql = " ".join(handler.db.sql.split())
+    assert "LLM_CLASSIFY(%s, `review`, [%s, %s]) AS category" in sql
+    assert "WHERE review LIKE '%%refund%%' ORDER BY `review` LIMIT 100" in sql
+    assert handler.db.params == ("my_llm", "good", "it's bad")
+    # pymysql interpolates %% back to a literal % once the arguments are bound.
+    assert "LIKE '%refund%'" in handler.db.sql % ("'my_llm'", "'good'", "'it''s bad'")
+
+
+def test_api_responses_are_encoded_with_orjson(monkeypatch):
+    import pytest
+
+    pytest.importorskip("orjson")
+    from fastapi.responses import ORJSONResponse
+
+    main = reload_main()
+    monkeypatch.setenv("SMATRIX_API_KEY", "secret-key")
+    main.action_handler.execute_async = AsyncMock(return_value={"success": True, "data": [{"名称": "绿色江南"}], "count": 1})
+
+    response = TestClient(main.app).post(
+        "/api/execute", headers={"X-API-Key": "secret-key"}, json={"action": "query", "table": "orgs"}
+    )
+
+    assert main.DefaultResponse is ORJSONResponse
+    assert response.status_code == 200
+    assert response.json()["data"] == [{"名称": "绿色江南"}]
+
+
+def test_classify_summary_only_groups_in_doris():
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+    handler.db.execute_query = lambda sql, params=None: setattr(handler.db, "sql", sql) or setattr(
+        handler.db, "params", params
+    ) or [{"category": "price", "cnt": 3}, {"category": "service", "cnt": 2}]
+
+    result = handler.handle_classify(
+        {"table": "reviews", "column": "review", "labels": ["price", "service"], "summary_only": True}
+    )
+
+    sql = " ".join(handler.db.sql.split())
+    assert sql.count("LLM_CLASSIFY(") == 1
+    assert sql.endswith("GROUP BY scored.category")
+    assert handler.db.params == ("default_llm", "price", "service")
+    assert result["data"] == []
+    assert result["count"] == 5
+    assert result["summary"] == {"price": 3, "service": 2}
+
+
+def test_llm_actions_with_zero_limit_skip_doris():
+    import asyncio
+
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+
+    assert handler.execute("sentiment", {"table": "reviews", "column": "review", "limit": 0}) == {
+        "success": True, "data": [], "count": 0, "sql": "", "summary": {}
+    }
+    assert asyncio.run(handler.execute_async("translate", {"table": "reviews", "column": "review", "limit": "0"}))[
+        "data"
+    ] == []
+    assert handler.db.sql is None
+
+    handler.execute("query", {"table": "reviews", "limit": 0})
+    assert handler.db.sql is not None
+
+
+def test_filter_clauses_reject_statement_separators_and_comments():
+    import pytest
+
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+
+    handler.handle_query({"table": "reviews", "filter": "note = 'a;b -- c' AND id > 3"})
+    assert handler.db.sql.endswith("WHERE note = 'a;b -- c' AND id > 3 LIMIT 100")
+
+    for bad in ("1=1; DROP TABLE reviews", "id > 3 -- trailing", "id > 3 /* x */", "id > 3 # x"):
+        with pytest.raises(ValueError):
+            handler.handle_query({"table": "reviews", "filter": bad})
+        with pytest.raises(ValueError):
+            handler.handle_sentiment({"table": "reviews", "column": "review", "filter": bad})
+    with pytest.raises(ValueError):
+        handler.handle_stats({"table": "reviews", "group_by": "city", "metrics": ["COUNT(*)"], "filter": "1=1; SELECT 1"})
+
+
+def test_execute_errors_include_traceback_only_in_debug_mode(monkeypatch):
+    main = reload_main()
+    monkeypatch.setenv("SMATRIX_API_KEY", "secret-key")
+    main.action_handler.execute_async = AsyncMock(side_effect=RuntimeError("doris unavailable"))
+    client = TestClient(main.app)
+    request = {"headers": {"X-API-Key": "secret-key"}, "json": {"action": "query", "table": "orgs"}}
+
+    response = client.post("/api/execute", **request)
+    assert response.status_code == 500
+    assert response.json()["detail"] == {"error": "doris unavailable"}
+
+    monkeypatch.setattr(main, "API_DEBUG", True)
+    detail = client.post("/api/execute", **request).json()["detail"]
+    assert "RuntimeError: doris unavailable" in detail["traceback"]
+
+
+def test_execute_request_merges_top_level_table_and_column():
+    main = reload_main()
+
+    merged = main.ExecuteRequest(action="sentiment", table="reviews", column="text", params={"limit": 5}).merged_params()
+    assert merged == {"limit": 5, "table": "reviews", "column": "text"}
+    assert main.ExecuteRequest(action="query", params=None).merged_params() == {}
+
+
+def test_filter_clauses_reject_subqueries_and_unions_with_and_without_sqlglot(monkeypatch):
+    import pytest
+
+    import handlers
+
+    injected = (
+        "1=1 UNION ALL SELECT id, password_encrypted FROM _sys_datasources",
+        "id IN (SELECT password_encrypted FROM _sys_datasources)",
+        "EXISTS (select 1 from _sys_datasources)",
+    )
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+
+    for sqlglot_module in (handlers.sqlglot, None):
+        monkeypatch.setattr(handlers, "sqlglot", sqlglot_module)
+        handlers._sanitize_filter.cache_clear()
+        for bad in injected:
+            with pytest.raises(ValueError):
+                handler.handle_query({"table": "orders", "filter": bad})
+        handler.handle_query({"table": "orders", "filter": "note = 'union select' AND `select` > 1"})
+        assert "WHERE note = 'union select' AND `select` > 1" in handler.db.sql
+
+    handlers._sanitize_filter.cache_clear()
+
+
+def test_filter_clauses_keep_doris_predicates():
+    import pytest
+
+    import handlers
+
+    pytest.importorskip("sqlglot")
+    handlers._sanitize_filter.cache_clear()
+    handler = ActionHandler()
+    handler.db = RecordingQueryDb()
+
+    handler.handle_query({"table": "reviews", "filter": "title REGEXP '^a'"})
+    assert "REGEXP" in handler.db.sql and "REGEXP_LIKE" not in handler.db.sql
+
+    # Inverted-index predicates sqlglot cannot parse pass through once the lexical checks accept them.
+    handler.handle_query({"table": "reviews", "filter": "content MATCH_ANY 'foo'"})
+    assert handler.db.sql.endswith("WHERE content MATCH_ANY 'foo' LIMIT 100")
+    with pytest.raises(ValueError):
+        handler.handle_query({"table": "reviews", "filter": "content MATCH_ANY 'foo' UNION SELECT 1"})
+    handlers._sanitize_filter.cache_clear()
+
+
+def test_llm_result_cache_is_bounded_by_rows_and_dropped_per_table():
+    class CountingDb(RecordingQueryDb):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+            self.rows = [{"translated": "hi"}]
+
+        def execute_query(self, sql, params=None):
+            self.calls += 1
+            return self.rows
+
+    handler = ActionHandler()
+    handler.db = CountingDb()
+    params = {"table": "reviews", "column": "review", "target_language": "en"}
+
+    handler.handle_translate(params)
+    handler.handle_translate(params)
+    assert handler.db.calls == 1
+
+    handler.invalidate_table("other")
+    handler.handle_translate(params)
+    assert handler.db.calls == 1
+
+    handler.invalidate_table("reviews")
+    handler.handle_translate(params)
+    assert handler.db.calls == 2
+
+    # Results larger than the whole row budget are served but never cached.
+    handler.db.rows = [{"translated": "hi"}] * (handler._llm_result_cache.maxsize + 1)
+    handler.handle_translate({**params, "limit": 5})
+    handler.handle_translate({**params, "limit": 5})
+    assert handler.db.calls == 4
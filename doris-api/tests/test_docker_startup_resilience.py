@@ -74,6 +74,34 @@ def test_system_table_ddl_avoids_boolean_default_literals():
     assert all("BOOLEAN DEFAULT TRUE" not in sql for sql in ddl_statements)
 
 
+def test_system_table_init_indexes_sync_task_next_sync_at():
+    handler = DataSourceHandler()
+    handler.db = RecordingInitClient()
+
+    handler._ensure_system_tables()
+
+    ddl_statements = [sql for sql, _ in handler.db.executed_updates]
+    assert (
+        "CREATE INDEX IF NOT EXISTS idx_sync_tasks_next_sync ON `_sys_sync_tasks` (`next_sync_at`) USING INVERTED"
+        in ddl_statements
+    )
+
+
+def test_system_table_ddl_probes_first_then_creates_the_rest(monkeypatch):
+    handler = DataSourceHandler()
+    handler.db = RecordingInitClient(failures=[Exception("available backend num is 0")])
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+    assert handler._ensure_system_tables() is True
+
+    create_statements = [sql for sql, _ in handler.db.executed_updates if "CREATE TABLE" in sql]
+    # The failed probe is the only statement sent on the first attempt.
+    assert "`_sys_datasources`" in create_statements[0]
+    assert "`_sys_datasources`" in create_statements[1]
+    assert len(create_statements) == 11
+    assert len(set(create_statements)) == 10
+
+
 def test_init_doris_sync_waits_until_system_tables_exist(monkeypatch):
     main = reload_main()
 
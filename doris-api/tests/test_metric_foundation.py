@@ -1,3 +1,4 @@
+import re
 from unittest.mock import AsyncMock
 
 from fastapi.testclient import TestClient
@@ -93,13 +94,13 @@ class MetricFoundationDb:
                 "aggregation": params[7],
                 "default_grain": params[8],
                 "dimensions": params[9],
-                "created_at": params[10],
-                "updated_at": params[11],
+                "created_at": "NOW()",
+                "updated_at": "NOW()",
             }
             return 1
 
         if "UPDATE `_sys_metric_definitions`" in normalized_sql:
-            metric_key = params[10]
+            metric_key = params[9]
             existing = self.metrics.get(metric_key, {})
             self.metrics[metric_key] = {
                 "metric_key": metric_key,
@@ -112,8 +113,8 @@ class MetricFoundationDb:
                 "aggregation": params[6],
                 "default_grain": params[7],
                 "dimensions": params[8],
-                "created_at": existing.get("created_at", params[9]),
-                "updated_at": params[9],
+                "created_at": existing.get("created_at", "NOW()"),
+                "updated_at": "NOW()",
             }
             return 1
 
@@ -179,12 +180,15 @@ class EmptySourceCursor:
         self.events.append(("fetchmany", size))
         return []
 
+    def close(self):
+        return None
+
 
 class RemoteConnection:
     def __init__(self, cursor):
         self._cursor = cursor
 
-    def cursor(self):
+    def cursor(self, cursor_class=None):
         return self._cursor
 
     def close(self):
@@ -425,6 +429,7 @@ def test_incremental_sync_plan_fallback_and_acceptance():
 
 
 def test_full_sync_clears_existing_target_before_fetch_when_source_empty(monkeypatch):
+    monkeypatch.setattr(datasource_handler_module, "SYNC_ATOMIC_REPLACE", False)
     events = []
     handler = DataSourceHandler()
     handler.db = SyncFoundationDb(
@@ -474,6 +479,126 @@ def test_full_sync_clears_existing_target_before_fetch_when_source_empty(monkeyp
     assert clear_indices[0] < fetch_indices[0], "full sync should clear target before fetch loop"
 
 
+def test_full_sync_loads_shadow_table_and_swaps_it_in(monkeypatch):
+    monkeypatch.setattr(datasource_handler_module, "SYNC_ATOMIC_REPLACE", True)
+
+    class OneBatchCursor(EmptySourceCursor):
+        def __init__(self, events):
+            super().__init__(events)
+            self._batches = [[(1, "2024-01-01 00:00:00")]]
+
+        def fetchmany(self, size):
+            self.events.append(("fetchmany", size))
+            return self._batches.pop(0) if self._batches else []
+
+    events = []
+    handler = DataSourceHandler()
+    handler.db = SyncFoundationDb(
+        events=events,
+        target_exists=True,
+        target_schema={"orders_target": {"id": "BIGINT", "updated_at": "DATETIME"}},
+    )
+    original_execute_update = handler.db.execute_update
+
+    def record_update(sql, params=None):
+        events.append(("update", " ".join(str(sql).split())))
+        return original_execute_update(sql, params)
+
+    handler.db.execute_update = record_update
+    handler._get_datasource_sync = lambda ds_id: {
+        "host": "127.0.0.1",
+        "port": 9030,
+        "user": "root",
+        "password": "pwd",
+        "database_name": "demo",
+        "name": "demo_source",
+    }
+    handler._get_remote_source_columns_sync = lambda conn, database_name, source_table: {
+        "id": "bigint",
+        "updated_at": "datetime",
+    }
+    handler.finalize_table_ingestion = lambda *args, **kwargs: {"success": True}
+
+    loaded_into = []
+    monkeypatch.setattr(
+        datasource_handler_module.pymysql, "connect", lambda **kwargs: RemoteConnection(OneBatchCursor(events))
+    )
+    monkeypatch.setattr(
+        datasource_handler_module.excel_handler,
+        "stream_load_rows",
+        lambda rows, target_table: loaded_into.append(target_table) or {"Status": "Success"},
+    )
+
+    result = handler._sync_table_sync_v2(
+        ds_id="ds1",
+        source_table="orders_source",
+        target_table="orders_target",
+        sync_strategy="full",
+    )
+
+    assert result["success"] is True
+    assert result["rows_synced"] == 1
+    assert result["table_replaced"] is True
+    (shadow,) = loaded_into
+    assert re.fullmatch(r"orders_target__shadow_[0-9a-f]{8}", shadow)
+    updates = [event[1] for event in events if event[0] == "update"]
+    assert not any(sql.startswith(("TRUNCATE", "DELETE")) for sql in updates)
+    assert updates == [
+        f"CREATE TABLE `{shadow}` LIKE `orders_target`",
+        f"ALTER TABLE `orders_target` REPLACE WITH TABLE `{shadow}` PROPERTIES('swap' = 'false')",
+    ]
+    # Every run loads into a shadow of its own.
+    handler._sync_table_sync_v2(
+        ds_id="ds1", source_table="orders_source", target_table="orders_target", sync_strategy="full",
+    )
+    creates = [event[1] for event in events if event[0] == "update" and event[1].startswith("CREATE TABLE")]
+    assert len(creates) == 2 and creates[1] != creates[0]
+    assert not handler._sync_target_lock("orders_target").locked()
+
+
+def test_scheduled_sync_skips_source_unchanged_since_last_run(monkeypatch):
+    from datetime import datetime as dt
+
+    events = []
+    handler = DataSourceHandler()
+    handler.db = SyncFoundationDb(
+        events=events,
+        target_exists=True,
+        target_schema={"orders_target": {"updated_at": "DATETIME"}},
+    )
+    handler._get_datasource_sync = lambda ds_id: {
+        "host": "127.0.0.1",
+        "port": 9030,
+        "user": "root",
+        "password": "pwd",
+        "database_name": "demo",
+        "name": "demo_source",
+    }
+    handler._get_remote_source_columns_sync = lambda conn, database_name, source_table: {"id": "bigint"}
+    handler.finalize_table_ingestion = lambda *args, **kwargs: {"success": True}
+    marks = [(dt(2024, 1, 1, 8), dt(2024, 1, 1, 9))]
+    handler._remote_table_change_mark = lambda conn, database_name, source_table: marks[-1]
+    monkeypatch.setattr(
+        datasource_handler_module.pymysql, "connect", lambda **kwargs: RemoteConnection(EmptySourceCursor(events))
+    )
+
+    def run():
+        return handler._sync_table_sync_v2(
+            ds_id="ds1", source_table="orders_source", target_table="orders_target", skip_unchanged=True
+        )
+
+    assert run().get("skipped") is None
+    scans = sum(event[0] == "execute_source_sql" for event in events)
+
+    skipped = run()
+    assert skipped["skipped"] is True
+    assert skipped["rows_synced"] == 0
+    assert sum(event[0] == "execute_source_sql" for event in events) == scans
+
+    marks.append((dt(2024, 1, 1, 10), dt(2024, 1, 1, 11)))
+    assert run().get("skipped") is None
+
+
 def test_incremental_anchor_field_unavailable_falls_back_to_full(monkeypatch):
     events = []
     handler = DataSourceHandler()
@@ -723,3 +848,817 @@ def test_foundation_metric_crud_endpoints(monkeypatch):
     )
     assert delete_response.status_code == 200
     assert delete_response.json()["success"] is True
+
+
+def test_pipeline_stream_load_counts_rows_and_propagates_worker_errors(monkeypatch):
+    import pandas as pd
+
+    handler = DataSourceHandler()
+    loaded = []
+
+    def fake_stream_load(df, target_table):
+        loaded.append((target_table, len(df)))
+        return {"Status": "Success", "NumberLoadedRows": len(df)}
+
+    monkeypatch.setattr(datasource_handler_module.excel_handler, "stream_load", fake_stream_load)
+    frames = [pd.DataFrame({"id": range(size)}) for size in (3, 2, 1)]
+
+    state = handler._pipeline_stream_load(iter(frames), "orders_target")
+
+    assert state["rows"] == 6
+    assert state["last_result"]["NumberLoadedRows"] == 1
+    assert loaded == [("orders_target", 3), ("orders_target", 2), ("orders_target", 1)]
+
+    def failing_stream_load(df, target_table):
+        raise RuntimeError("be unavailable")
+
+    monkeypatch.setattr(datasource_handler_module.excel_handler, "stream_load", failing_stream_load)
+    with pytest.raises(RuntimeError, match="be unavailable"):
+        handler._pipeline_stream_load(iter(frames), "orders_target")
+
+
+def test_remote_datasource_connections_are_pooled_per_datasource(monkeypatch):
+    connects = []
+
+    class PooledRemoteConnection(RemoteConnection):
+        def rollback(self):
+            return None
+
+    def fake_connect(**kwargs):
+        connects.append(kwargs["host"])
+        return PooledRemoteConnection(EmptySourceCursor([]))
+
+    monkeypatch.setattr(datasource_handler_module.pymysql, "connect", fake_connect)
+    handler = DataSourceHandler()
+    ds = {"host": "10.0.0.8", "port": 3306, "user": "root", "password": "pwd", "database_name": "demo"}
+
+    for _ in range(3):
+        conn = handler._get_conn(ds)
+        conn.close()
+
+    assert connects == ["10.0.0.8"]
+    assert len(handler._remote_pools) == 1
+
+    handler._invalidate_remote_pool(ds)
+    assert handler._remote_pools == {}
+
+
+def test_remote_pool_cache_evicts_least_recently_used(monkeypatch):
+    closed = []
+
+    class FakePool:
+        def __init__(self, **kwargs):
+            self.host = kwargs["host"]
+
+        def close(self):
+            closed.append(self.host)
+
+    monkeypatch.setattr(datasource_handler_module, "PooledDB", FakePool)
+    handler = DataSourceHandler()
+    handler._REMOTE_POOL_LIMIT = 2
+
+    first = handler._get_remote_pool("a", 3306, "root", "pwd", "demo")
+    handler._get_remote_pool("b", 3306, "root", "pwd", "demo")
+    assert handler._get_remote_pool("a", 3306, "root", "pwd", "demo") is first
+    handler._get_remote_pool("c", 3306, "root", "pwd", "demo")
+
+    assert closed == ["b"]
+    assert [key[0] for key in handler._remote_pools] == ["a", "c"]
+
+    handler.close_remote_pools()
+    assert sorted(closed) == ["a", "b", "c"]
+    assert not handler._remote_pools
+
+
+def test_sync_multiple_tables_runs_concurrently_and_keeps_request_order(monkeypatch):
+    import threading
+    import time
+
+    handler = DataSourceHandler()
+    monkeypatch.setattr(datasource_handler_module, "SYNC_PARALLELISM", 3)
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_sync(ds_id, source, target, *args, **kwargs):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05 if source == "a" else 0.01)
+        with lock:
+            active["now"] -= 1
+        return {"success": source != "c", "rows_synced": 1}
+
+    handler._sync_table_sync_v2 = fake_sync
+    result = handler._sync_multiple_tables_sync(
+        "ds1",
+        [{"source_table": "a"}, {"source_table": "b", "target_table": "b2"}, {"source_table": "c"}],
+    )
+
+    assert [item["source_table"] for item in result["results"]] == ["a", "b", "c"]
+    assert result["results"][1]["target_table"] == "b2"
+    assert result["success_count"] == 2
+    assert result["fail_count"] == 1
+    assert result["success"] is False
+    assert active["peak"] > 1
+
+
+def test_sync_multiple_tables_reports_a_raising_table_as_failed():
+    handler = DataSourceHandler()
+
+    def fake_sync(ds_id, source, target, *args, **kwargs):
+        if source == "broken":
+            raise RuntimeError("source went away")
+        return {"success": True, "rows_synced": 3}
+
+    handler._sync_table_sync_v2 = fake_sync
+    result = handler._sync_multiple_tables_sync("ds1", [{"source_table": "ok"}, {"source_table": "broken"}])
+
+    assert result["success_count"] == 1
+    assert result["results"][1] == {
+        "source_table": "broken",
+        "target_table": "broken",
+        "success": False,
+        "error": "source went away",
+    }
+
+
+def test_sync_multiple_tables_registers_finalized_tables_in_one_batch():
+    statements = []
+
+    class RegistryDb:
+        def execute_query(self, sql, params=None):
+            statements.append(("query", " ".join(sql.split()), params))
+            return [{"table_name": "a"}]
+
+        def execute_many(self, sql, seq_params):
+            statements.append(("many", " ".join(sql.split()), list(seq_params)))
+            return len(seq_params)
+
+        def execute_update(self, sql, params=None):
+            statements.append(("update", " ".join(sql.split()), params))
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = RegistryDb()
+    deferred = []
+
+    def fake_sync(ds_id, source, target, *args, defer_registry=False, **kwargs):
+        deferred.append(defer_registry)
+        return {"success": True, "rows_synced": 1, "ingestion": {"registry_updated": False}}
+
+    handler._sync_table_sync_v2 = fake_sync
+    result = handler._sync_multiple_tables_sync("ds1", [{"source_table": "a"}, {"source_table": "b"}])
+
+    assert deferred == [True, True]
+    assert [kind for kind, _, _ in statements] == ["query", "many", "update"]
+    assert statements[0][2] == ("a", "b")
+    assert statements[1][2] == [("database_sync", None, None, "a")]
+    assert statements[2][1].endswith("VALUES (%s, %s, %s, %s, NOW(), NOW())")
+    assert statements[2][2] == ("b", "", "", "database_sync")
+    assert all(item["ingestion"]["registry_updated"] for item in result["results"])
+
+
+def test_full_sync_creates_target_with_dtype_kind_column_types(monkeypatch):
+    from datetime import datetime as dt
+
+    class OneBatchCursor(EmptySourceCursor):
+        def __init__(self, events):
+            super().__init__(events)
+            self.description = [("order id",), ("amount",), ("created-at",), ("geo.region",), ("is paid",)]
+            self._batches = [
+                [(1, 9.5, dt(2024, 1, 1), "north", True), (2, 3.25, dt(2024, 1, 2), "south", False)]
+            ]
+
+        def fetchmany(self, size):
+            self.events.append(("fetchmany", size))
+            return self._batches.pop(0) if self._batches else []
+
+    events = []
+    handler = DataSourceHandler()
+    handler.db = SyncFoundationDb(events=events, target_exists=False, target_schema={})
+    handler._get_datasource_sync = lambda ds_id: {
+        "host": "127.0.0.1",
+        "port": 9030,
+        "user": "root",
+        "password": "pwd",
+        "database_name": "demo",
+        "name": "demo_source",
+    }
+    handler._get_remote_source_columns_sync = lambda conn, database_name, source_table: {"order id": "bigint"}
+    handler._fetch_remote_schema = lambda conn, database_name, source_table: []
+    handler.finalize_table_ingestion = lambda *args, **kwargs: {"success": True}
+
+    created = {}
+    loaded = []
+    remote_connection = RemoteConnection(OneBatchCursor(events))
+    monkeypatch.setattr(datasource_handler_module.pymysql, "connect", lambda **kwargs: remote_connection)
+    monkeypatch.setattr(
+        datasource_handler_module.excel_handler,
+        "create_table",
+        lambda table_name, column_types: created.update(column_types),
+    )
+    monkeypatch.setattr(
+        datasource_handler_module.excel_handler,
+        "stream_load_rows",
+        lambda rows, target_table: loaded.append(len(rows)) or {"Status": "Success"},
+    )
+
+    result = handler._sync_table_sync_v2(ds_id="ds1", source_table="orders", target_table="orders_copy")
+
+    assert result["success"] is True
+    assert result["rows_synced"] == 2
+    assert result["table_created"] is True
+    assert created == {
+        "order_id": "BIGINT",
+        "amount": "DECIMAL(18,2)",
+        "created_at": "DATETIME",
+        "geo_region": "VARCHAR(500)",
+        "is_paid": "TINYINT",
+    }
+    assert loaded == [2]
+    assert datasource_handler_module.excel_handler._format_stream_load_cell(True) == "1"
+
+
+def test_full_sync_creates_target_from_remote_catalog_without_pandas(monkeypatch):
+    from datetime import datetime as dt
+
+    class OneBatchCursor(EmptySourceCursor):
+        def __init__(self, events):
+            super().__init__(events)
+            self.description = [("order id",), ("amount",), ("created-at",), ("region",), ("note",)]
+            self._batches = [[(1, 9.5, dt(2024, 1, 1), "north", None)]]
+
+        def fetchmany(self, size):
+            return self._batches.pop(0) if self._batches else []
+
+    events = []
+    handler = DataSourceHandler()
+    handler.db = SyncFoundationDb(events=events, target_exists=False, target_schema={})
+    handler._get_datasource_sync = lambda ds_id: {
+        "host": "127.0.0.1",
+        "port": 9030,
+        "user": "root",
+        "password": "pwd",
+        "database_name": "demo",
+        "name": "demo_source",
+    }
+    handler._get_remote_source_columns_sync = lambda conn, database_name, source_table: {"order id": "bigint"}
+    handler._fetch_remote_schema = lambda conn, database_name, source_table: [
+        ("order id", "int", 10, 0, None),
+        ("amount", "decimal", 12, 4, None),
+        ("created-at", "timestamp", None, None, None),
+        ("region", "varchar", None, None, 32),
+        ("note", "geometry", None, None, None),
+    ]
+    handler.finalize_table_ingestion = lambda *args, **kwargs: {"success": True}
+
+    created = {}
+    loaded = []
+    monkeypatch.setattr(
+        datasource_handler_module.pymysql, "connect", lambda **kwargs: RemoteConnection(OneBatchCursor(events))
+    )
+    monkeypatch.setattr(
+        datasource_handler_module.excel_handler,
+        "create_table",
+        lambda table_name, column_types: created.update(column_types),
+    )
+    monkeypatch.setattr(
+        datasource_handler_module.excel_handler,
+        "stream_load",
+        lambda df, target_table: pytest.fail("catalog-typed sync should not build a DataFrame"),
+    )
+    monkeypatch.setattr(
+        datasource_handler_module.excel_handler,
+        "stream_load_rows",
+        lambda rows, target_table: loaded.append(list(rows)) or {"Status": "Success"},
+    )
+
+    result = handler._sync_table_sync_v2(ds_id="ds1", source_table="orders", target_table="orders_copy")
+
+    assert result["success"] is True
+    assert result["rows_synced"] == 1
+    assert created == {
+        "order_id": "BIGINT",
+        "amount": "DECIMAL(12,4)",
+        "created_at": "DATETIME",
+        "region": "VARCHAR(128)",
+        "note": "VARCHAR(500)",
+    }
+    assert loaded == [[(1, 9.5, dt(2024, 1, 1), "north", None)]]
+    assert ("execute_source_sql", "SELECT `order id` FROM `orders`", None) in events
+
+
+def test_text_passthrough_swaps_decoders_on_wrapped_pymysql_connection():
+    raw = datasource_handler_module.pymysql.connections.Connection.__new__(
+        datasource_handler_module.pymysql.connections.Connection
+    )
+    original = {12: "datetime-decoder"}
+    raw.decoders = original
+
+    class Steady:
+        def __init__(self, con):
+            self._con = con
+
+    pooled = Steady(Steady(raw))
+
+    with DataSourceHandler._text_passthrough(pooled):
+        assert raw.decoders == {}
+    assert raw.decoders is original
+
+    with DataSourceHandler._text_passthrough(pooled, enabled=False):
+        assert raw.decoders is original
+    with DataSourceHandler._text_passthrough(RemoteConnection(None)):
+        pass
+
+
+def test_datasource_password_round_trip_and_legacy_fernet_tokens():
+    handler = DataSourceHandler()
+
+    token = handler._encrypt_password("s3cret-密码")
+    assert token != "s3cret-密码"
+    assert handler._decrypt_password(token) == "s3cret-密码"
+
+    legacy_token = handler.cipher.encrypt("legacy-pwd".encode()).decode()
+    assert handler._decrypt_password(legacy_token) == "legacy-pwd"
+
+
+def test_handlers_share_password_ciphers_and_decrypt_each_others_tokens():
+    first = DataSourceHandler()
+    second = DataSourceHandler()
+
+    assert first.cipher is second.cipher
+    assert first._aead is second._aead
+    assert second._decrypt_password(first._encrypt_password("shared")) == "shared"
+
+
+def test_get_datasource_caches_decrypted_record_until_deleted():
+    handler = DataSourceHandler()
+    token = handler._encrypt_password("pwd")
+    queries = []
+
+    class DatasourceDb:
+        def execute_query(self, sql, params=None):
+            queries.append(params)
+            return [{"id": "ds1", "host": "10.0.0.8", "port": 3306, "user": "root",
+                     "password_encrypted": token, "database_name": "demo"}]
+
+        def execute_update(self, sql, params=None):
+            return 1
+
+    handler.db = DatasourceDb()
+
+    first = handler._get_datasource_sync("ds1")
+    first["password"] = "mutated-by-caller"
+    second = handler._get_datasource_sync("ds1")
+
+    assert second["password"] == "pwd"
+    assert len(queries) == 1
+
+    handler._delete_datasource_sync("ds1")
+    handler._get_datasource_sync("ds1")
+    assert len(queries) == 2
+
+
+def test_get_remote_tables_paginates_and_caches_listing(monkeypatch):
+    executed = []
+
+    class ListingCursor:
+        def execute(self, sql, params=None):
+            executed.append((" ".join(sql.split()), params))
+
+        def fetchall(self):
+            return [{"name": "orders", "row_count": 10, "comment": ""}]
+
+        def close(self):
+            return None
+
+    class ListingConnection:
+        def cursor(self, cursor_class=None):
+            return ListingCursor()
+
+        def close(self):
+            return None
+
+    handler = DataSourceHandler()
+    handler._get_remote_connection = lambda *args: ListingConnection()
+
+    first = handler._get_remote_tables_sync("10.0.0.8", 3306, "root", "pwd", "demo", offset=20, limit=10)
+    second = handler._get_remote_tables_sync("10.0.0.8", 3306, "root", "pwd", "demo", offset=20, limit=10)
+
+    assert first == second
+    assert first["count"] == 1
+    assert len(executed) == 1
+    sql, params = executed[0]
+    assert sql.endswith("ORDER BY TABLE_NAME LIMIT %s OFFSET %s")
+    assert params == ("demo", 10, 20)
+
+    handler._get_remote_tables_sync("10.0.0.8", 3306, "root", "pwd", "demo")
+    assert executed[-1][1] == ("demo",)
+
+
+def test_save_sync_tasks_bulk_uses_single_multi_row_insert():
+    updates = []
+
+    class RecordingDb:
+        def execute_update(self, sql, params=None):
+            updates.append((" ".join(sql.split()), params))
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = RecordingDb()
+
+    result = handler._save_sync_tasks_bulk_sync(
+        [
+            {"ds_id": "ds1", "source_table": "orders", "schedule_type": "daily"},
+            {
+                "ds_id": "ds1",
+                "source_table": "events",
+                "target_table": "events_copy",
+                "schedule_type": "hourly",
+                "sync_strategy": "incremental",
+                "incremental_time_field": "updated_at",
+            },
+        ]
+    )
+
+    assert result["count"] == 2
+    assert len(updates) == 1
+    sql, params = updates[0]
+    assert sql.count("'active', NOW()") == 2
+    assert len(params) == 24
+    assert params[1:4] == ("ds1", "orders", "orders")
+    assert params[13:16] == ("ds1", "events", "events_copy")
+    assert params[11] == result["tasks"][0]["next_sync_at"]
+    assert result["tasks"][1]["sync_strategy"] == "incremental"
+
+    with pytest.raises(ValueError):
+        handler._save_sync_tasks_bulk_sync(
+            [{"ds_id": "ds1", "source_table": "t", "schedule_type": "daily", "sync_strategy": "incremental"}]
+        )
+
+
+def test_scheduled_task_queries_bind_the_app_clock():
+    from datetime import datetime as dt
+
+    queries = []
+    updates = []
+
+    class SchedulerDb:
+        def execute_query(self, sql, params=None):
+            queries.append((" ".join(sql.split()), params))
+            return []
+
+        def execute_update(self, sql, params=None):
+            updates.append((" ".join(sql.split()), params))
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = SchedulerDb()
+    handler._sync_table_sync_v2 = lambda **kwargs: {"success": True, "rows_synced": 0}
+
+    assert handler.get_pending_tasks(now=dt(2024, 5, 31, 10, 30, 15)) == []
+    assert queries[0] == (
+        "SELECT * FROM `_sys_sync_tasks` WHERE status = 'active' AND next_sync_at <= %s",
+        ("2024-05-31 10:30:15",),
+    )
+
+    handler.execute_scheduled_task(
+        {
+            "id": "t1", "datasource_id": "ds1", "source_table": "a", "target_table": "a",
+            "schedule_type": "daily", "schedule_hour": 3, "schedule_minute": 20,
+        }
+    )
+    sql, params = updates[0]
+    assert "NOW()" not in sql and "last_sync_at = %s" in sql
+    assert params[1].endswith(" 03:20:00")
+    assert params[2] == "t1"
+
+
+def test_mark_tasks_synced_batches_next_sync_updates():
+    from datetime import datetime as dt
+
+    updates = []
+
+    class SchedulerDb:
+        def execute_update(self, sql, params=None):
+            updates.append((" ".join(sql.split()), params))
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = SchedulerDb()
+    handler.mark_tasks_synced(
+        [
+            {"id": "t1", "schedule_type": "hourly", "schedule_minute": 5},
+            {"id": "t2", "schedule_type": "daily", "schedule_hour": 2, "schedule_minute": 0},
+        ],
+        now=dt(2024, 5, 31, 10, 30),
+    )
+
+    assert len(updates) == 1
+    sql, params = updates[0]
+    assert sql == (
+        "UPDATE `_sys_sync_tasks` SET last_sync_at = %s, "
+        "next_sync_at = CASE id WHEN %s THEN %s WHEN %s THEN %s END WHERE id IN (%s, %s)"
+    )
+    assert params == (
+        "2024-05-31 10:30:00", "t1", "2024-05-31 11:05:00", "t2", "2024-06-01 02:00:00", "t1", "t2",
+    )
+
+
+def test_claim_and_defer_move_next_sync_without_recording_a_run():
+    from datetime import datetime as dt
+
+    updates = []
+    due = [
+        {"id": "t1", "schedule_type": "hourly", "schedule_minute": 5},
+        {"id": "t2", "schedule_type": "daily", "schedule_hour": 2, "schedule_minute": 0},
+    ]
+
+    class SchedulerDb:
+        def execute_query(self, sql, params=None):
+            return due
+
+        def execute_update(self, sql, params=None):
+            updates.append((" ".join(sql.split()), params))
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = SchedulerDb()
+    now = dt(2024, 5, 31, 10, 30)
+
+    assert handler.claim_due_tasks(now=now) == due
+    sql, params = updates[0]
+    assert sql == (
+        "UPDATE `_sys_sync_tasks` SET "
+        "next_sync_at = CASE id WHEN %s THEN %s WHEN %s THEN %s END WHERE id IN (%s, %s)"
+    )
+    assert params == ("t1", "2024-05-31 11:05:00", "t2", "2024-06-01 02:00:00", "t1", "t2")
+
+    # Failures retry after the backoff, unless the next regular run comes first.
+    handler.defer_failed_tasks(
+        [{"id": "t3", "schedule_type": "hourly", "schedule_minute": 32}, due[1]], now=now,
+    )
+    sql, params = updates[1]
+    assert "last_sync_at" not in sql
+    assert params == ("t3", "2024-05-31 10:32:00", "t2", "2024-05-31 10:35:00", "t3", "t2")
+
+
+def test_calculate_next_sync_rolls_over_from_given_now():
+    from datetime import datetime as dt
+
+    handler = DataSourceHandler()
+    now = dt(2024, 5, 31, 10, 30, 15)
+
+    assert handler._calculate_next_sync_detailed("hourly", 15, 0, 1, 1, now=now) == "2024-05-31 11:15:00"
+    assert handler._calculate_next_sync_detailed("hourly", 45, 0, 1, 1, now=now) == "2024-05-31 10:45:00"
+    assert handler._calculate_next_sync_detailed("daily", 0, 9, 1, 1, now=now) == "2024-06-01 09:00:00"
+    assert handler._calculate_next_sync_detailed("weekly", 0, 9, 5, 1, now=now) == "2024-06-07 09:00:00"
+    assert handler._calculate_next_sync("unknown", now=now) == "2024-06-01 10:30:15"
+    assert handler._calculate_next_sync_detailed("monthly", 0, 9, 1, 31, now=now) == "2024-06-30 09:00:00"
+    assert handler._calculate_next_sync_detailed("monthly", 0, 9, 1, 31, now=dt(2024, 4, 1)) == "2024-04-30 09:00:00"
+    assert handler._calculate_next_sync_detailed("monthly", 0, 9, 1, 31, now=dt(2024, 2, 1)) == "2024-02-29 09:00:00"
+    assert handler._calculate_next_sync_detailed("monthly", 0, 9, 1, 5, now=dt(2024, 12, 6)) == "2025-01-05 09:00:00"
+
+
+def test_list_sync_tasks_joins_datasource_names_in_python():
+    queries = []
+
+    class ListingDb:
+        def execute_query(self, sql, params=None):
+            normalized = " ".join(sql.split())
+            queries.append(normalized)
+            if "FROM `_sys_datasources`" in normalized:
+                return [{"id": "ds1", "name": "orders_db"}]
+            return [
+                {"id": "t1", "datasource_id": "ds1", "source_table": "orders"},
+                {"id": "t2", "datasource_id": "gone", "source_table": "users"},
+            ]
+
+    handler = DataSourceHandler()
+    handler.db = ListingDb()
+
+    tasks = handler._list_sync_tasks_sync()
+    handler._list_sync_tasks_sync()
+
+    assert [task["datasource_name"] for task in tasks] == ["orders_db", None]
+    assert all("JOIN" not in sql for sql in queries)
+    assert sum("FROM `_sys_datasources`" in sql for sql in queries) == 1
+
+    handler._invalidate_datasource_cache("ds1")
+    handler._list_sync_tasks_sync()
+    assert sum("FROM `_sys_datasources`" in sql for sql in queries) == 2
+
+
+def test_ai_enabled_tables_are_cached_until_a_sync_task_write():
+    queries = []
+
+    class AiTablesDb:
+        def execute_query(self, sql, params=None):
+            queries.append(" ".join(sql.split()))
+            return [{"target_table": "orders"}]
+
+        def execute_update(self, sql, params=None):
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = AiTablesDb()
+
+    first = handler._get_ai_enabled_tables_sync()
+    first.append("mutated")
+    assert handler._get_ai_enabled_tables_sync() == ["orders"]
+    assert len(queries) == 1
+
+    handler._toggle_ai_enabled_sync("t1", False)
+    handler._get_ai_enabled_tables_sync()
+    assert len(queries) == 2
+
+
+def test_async_wrappers_run_on_the_datasource_executor():
+    import asyncio
+    import threading
+
+    handler = DataSourceHandler()
+    seen = {}
+
+    def fake_list():
+        seen["thread"] = threading.current_thread().name
+        return []
+
+    handler._list_datasources_sync = fake_list
+    assert asyncio.run(handler.list_datasources()) == []
+    assert seen["thread"].startswith("ds-db")
+
+
+def test_saved_records_get_twelve_char_base32_ids():
+    import re
+
+    class InsertDb:
+        def execute_update(self, sql, params=None):
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = InsertDb()
+    ds_id = handler._save_datasource_sync("src", "127.0.0.1", 3306, "root", "pwd", "demo")["id"]
+    task_id = handler._save_sync_task_sync(ds_id, "orders", "orders", "daily")["id"]
+
+    for record_id in (ds_id, task_id):
+        assert re.fullmatch(r"[a-z2-7]{12}", record_id)
+    assert ds_id != task_id
+
+
+def test_sync_retries_once_when_remote_connection_drops(monkeypatch):
+    import pymysql
+
+    events = []
+    handler = DataSourceHandler()
+    handler.db = SyncFoundationDb(events=events, target_exists=True, target_schema={})
+    handler._get_datasource_sync = lambda ds_id: {
+        "host": "127.0.0.1",
+        "port": 9030,
+        "user": "root",
+        "password": "pwd",
+        "database_name": "demo",
+        "name": "demo_source",
+    }
+    handler.finalize_table_ingestion = lambda *args, **kwargs: {"success": True}
+    attempts = []
+
+    def flaky_columns(conn, database_name, source_table):
+        attempts.append(conn)
+        if len(attempts) == 1:
+            raise pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+        return {"id": "bigint"}
+
+    handler._get_remote_source_columns_sync = flaky_columns
+    shared = RemoteConnection(EmptySourceCursor(events))
+    monkeypatch.setattr(
+        datasource_handler_module.pymysql, "connect", lambda **kwargs: RemoteConnection(EmptySourceCursor(events))
+    )
+
+    result = handler._sync_table_sync_v2(ds_id="ds1", source_table="orders", target_table="orders", conn=shared)
+
+    assert result["success"] is True
+    assert len(attempts) == 2
+    assert attempts[0] is shared and attempts[1] is not shared
+
+    handler._get_remote_source_columns_sync = lambda *args: (_ for _ in ()).throw(ValueError("bad column"))
+    assert handler._sync_table_sync_v2(ds_id="ds1", source_table="orders")["success"] is False
+
+
+def test_preview_remote_table_uses_table_rows_estimate_instead_of_count():
+    executed = []
+    closed = []
+
+    class PreviewCursor:
+        def execute(self, sql, params=None):
+            executed.append(" ".join(sql.split()))
+
+        def fetchall(self):
+            if executed[-1].startswith("SELECT COLUMN_NAME"):
+                return [{"name": "id", "type": "bigint"}]
+            return [{"id": 1}, {"id": 2}]
+
+        def fetchone(self):
+            return {"total": 1200}
+
+        def close(self):
+            closed.append("cursor")
+
+    class PreviewConnection:
+        def cursor(self, cursor_class=None):
+            return PreviewCursor()
+
+        def close(self):
+            closed.append("conn")
+
+    handler = DataSourceHandler()
+    handler._get_remote_connection = lambda *args: PreviewConnection()
+
+    result = handler._preview_remote_table_sync("10.0.0.8", 3306, "root", "pwd", "demo", "orders", limit=2)
+
+    assert result["success"] is True
+    assert result["total_rows"] == 1200
+    assert result["total_rows_estimated"] is True
+    assert result["preview_rows"] == 2
+    assert not any("COUNT(" in sql.upper() for sql in executed)
+    assert "information_schema.TABLES" in executed[-1]
+    assert closed == ["cursor", "conn"]
+
+
+def test_bulk_inserts_are_split_into_fixed_size_batches():
+    many_calls = []
+    updates = []
+
+    class RecordingDb:
+        def execute_many(self, sql, seq_params):
+            many_calls.append((sql, list(seq_params)))
+            return len(seq_params)
+
+        def execute_update(self, sql, params=None):
+            updates.append((sql, params))
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = RecordingDb()
+    batch = datasource_handler_module._BULK_INSERT_BATCH_ROWS
+
+    result = handler._save_datasources_bulk_sync(
+        [
+            {"name": f"ds{i}", "host": "h", "port": 3306, "user": "u", "password": "p", "database": "d"}
+            for i in range(batch * 2 + 3)
+        ]
+    )
+
+    assert result["count"] == batch * 2 + 3
+    assert len(many_calls) == 1
+    sql, seq_params = many_calls[0]
+    assert len(seq_params) == 2
+    assert sql.count("NOW()") == batch * 2
+    assert all(len(params) == batch * 7 for params in seq_params)
+    assert len(updates) == 1
+    assert len(updates[0][1]) == 3 * 7
+    assert seq_params[0][0] == result["ids"][0] and updates[0][1][-7] == result["ids"][-1]
+
+
+def test_clear_target_table_remembers_only_unsupported_truncate():
+    import pymysql
+
+    updates = []
+
+    class TruncateRejectingDb:
+        def __init__(self, error):
+            self.error = error
+
+        def execute_update(self, sql, params=None):
+            updates.append(sql)
+            if sql.startswith("TRUNCATE"):
+                raise self.error
+            return 1
+
+    handler = DataSourceHandler()
+    handler.db = TruncateRejectingDb(
+        pymysql.err.OperationalError(1105, "errCode = 2, detailMessage = Not support truncate table orders")
+    )
+
+    handler._clear_target_table("orders", "`orders`")
+    handler._clear_target_table("orders", "`orders`")
+
+    assert updates == [
+        "TRUNCATE TABLE `orders`",
+        "DELETE FROM `orders` WHERE 1=1",
+        "DELETE FROM `orders` WHERE 1=1",
+    ]
+
+    # A transient failure falls back once but TRUNCATE is tried again next time.
+    updates.clear()
+    handler.db = TruncateRejectingDb(pymysql.err.OperationalError(1205, "Lock wait timeout exceeded"))
+
+    handler._clear_target_table("items", "`items`")
+    handler._clear_target_table("items", "`items`")
+
+    assert updates == [
+        "TRUNCATE TABLE `items`",
+        "DELETE FROM `items` WHERE 1=1",
+        "TRUNCATE TABLE `items`",
+        "DELETE FROM `items` WHERE 1=1",
+    ]
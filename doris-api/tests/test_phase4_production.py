@@ -1,7 +1,9 @@
 import importlib
+from types import SimpleNamespace
 from unittest.mock import AsyncMock
 
 from fastapi.testclient import TestClient
+import pytest
 
 from conftest import reload_main
 from vanna_doris import VannaDoris
@@ -171,8 +173,299 @@ def test_doris_client_uses_pooled_connections(monkeypatch):
 
     assert client.get_connection() == "pooled-connection"
     assert pool_config["maxconnections"] == 10
+    assert pool_config["kwargs"]["mincached"] == 2
+    assert pool_config["kwargs"]["maxcached"] == 10
 
 
+def test_doris_client_pool_reuses_most_recent_connection(monkeypatch):
+    import itertools
+    import types
+
+    import db
+
+    db_module = importlib.reload(db)
+    ids = itertools.count()
+
+    class FakeConnection:
+        def __init__(self):
+            self.id = next(ids)
+
+        def close(self):
+            pass
+
+        def rollback(self):
+            pass
+
+        def commit(self):
+            pass
+
+    fake_pymysql = types.SimpleNamespace(
+        connect=lambda **kwargs: FakeConnection(),
+        threadsafety=1,
+        OperationalError=RuntimeError,
+        InterfaceError=RuntimeError,
+        InternalError=RuntimeError,
+    )
+    monkeypatch.setattr(db_module, "pymysql", fake_pymysql)
+    monkeypatch.setenv("DORIS_POOL_SIZE", "3")
+    monkeypatch.setenv("DORIS_MAX_OVERFLOW", "2")
+
+    client = db_module.DorisClient()
+    first, second = client.get_connection(), client.get_connection()
+    second_id = second._con._con.id
+    first.close()
+    second.close()
+
+    assert client._pool._maxconnections == 5
+    assert client.get_connection()._con._con.id == second_id
+
+
+def test_pooled_db_idle_cache_is_only_used_via_pop_zero_and_append():
+    import inspect
+    import re
+
+    pooled_db = pytest.importorskip("dbutils.pooled_db")
+
+    # _LifoIdleList swaps PooledDB's private idle list; if DBUtils changes how it uses
+    # that list, the LIFO override must be revisited.
+    source = inspect.getsource(pooled_db.PooledDB)
+    assert "self._idle_cache = []" in source
+    assert set(re.findall(r"_idle_cache\.(\w+)\(", source)) == {"pop", "append"}
+    assert set(re.findall(r"_idle_cache\.pop\(([^)]*)\)", source)) == {"0"}
+
+
+def test_lifo_idle_list_only_redirects_pop_zero():
+    import db
+
+    idle = db._LifoIdleList(["a", "b", "c"])
+
+    assert idle.pop(0) == "c"
+    assert idle.pop(-2) == "a"
+    assert idle.pop() == "b"
+
+
+def test_doris_client_session_pins_one_connection(monkeypatch):
+    import db
+
+    connections = []
+
+    class FakeCursor:
+        def execute(self, sql, params=None):
+            return 1
+
+        def executemany(self, sql, seq_params):
+            return len(seq_params)
+
+        def fetchall(self):
+            return [{"n": 1}]
+
+    class FakeConnection:
+        def __init__(self):
+            self.closed = 0
+            connections.append(self)
+
+        def cursor(self, *args):
+            return FakeCursor()
+
+        def commit(self):
+            pass
+
+        def close(self):
+            self.closed += 1
+
+    client = db.DorisClient()
+    monkeypatch.setattr(client, "get_connection", FakeConnection)
+
+    with client.session() as conn:
+        client.execute_query("SELECT 1")
+        client.execute_update("UPDATE t SET a = 1")
+        with client.session() as inner:
+            client.execute_many("INSERT INTO t VALUES (%s)", [(1,), (2,)])
+        assert inner is conn
+        assert conn.closed == 0
+
+    assert len(connections) == 1
+    assert connections[0].closed == 1
+
+    client.execute_query("SELECT 1")
+    assert len(connections) == 2
+    assert connections[1].closed == 1
+
+
+def test_doris_client_close_releases_pool(monkeypatch):
+    import db
+
+    db_module = importlib.reload(db)
+    pools = []
+
+    class FakePool:
+        def __init__(self, **kwargs):
+            self.closed = False
+            pools.append(self)
+
+        def connection(self):
+            return "pooled-connection"
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(db_module, "PooledDB", FakePool)
+    client = db_module.DorisClient()
+
+    client.get_connection()
+    client.close()
+    client.close()
+
+    assert pools[0].closed is True
+    assert client._pool is None
+    client.get_connection()
+    assert len(pools) == 2
+
+
+def test_doris_client_escapes_strings_without_a_connection(monkeypatch):
+    import db
+
+    client = db.DorisClient()
+    monkeypatch.setattr(client, "get_connection", lambda: (_ for _ in ()).throw(AssertionError("no connection")))
+
+    assert client._escape_string("it's") == "'it\\'s'"
+
+
+
+def test_doris_client_validate_identifier_rejects_trailing_newline():
+    import db
+
+    client = db.DorisClient()
+
+    assert client.validate_identifier("orders_2024") == "`orders_2024`"
+    assert client.validate_identifier("销售-明细") == "`销售-明细`"
+    for bad in ("orders\n", "orders; DROP", "a`b", ""):
+        with pytest.raises(ValueError):
+            client.validate_identifier(bad)
+
+
+def test_doris_client_fetch_column_uses_tuple_cursor(monkeypatch):
+    import db
+
+    cursor_classes = []
+
+    class TupleCursor:
+        def execute(self, sql, params=None):
+            self.sql = sql
+
+        def fetchall(self):
+            return (("orders",), ("users",))
+
+    class TupleConn:
+        def cursor(self, *args):
+            cursor_classes.append(args)
+            return TupleCursor()
+
+        def close(self):
+            return None
+
+    client = db.DorisClient()
+    monkeypatch.setattr(client, "get_connection", lambda: TupleConn())
+
+    assert client.fetch_column("SHOW TABLES") == ["orders", "users"]
+    assert cursor_classes == [()]
+
+def test_doris_client_caches_table_list_until_ddl(monkeypatch):
+    import db
+
+    client = db.DorisClient()
+    show_calls = []
+    tables = ["orders"]
+
+    def fake_column(sql, params=None):
+        show_calls.append(sql)
+        return list(tables)
+
+    class FakeCursor:
+        def execute(self, sql, params=None):
+            return 0
+
+    class FakeConn:
+        def cursor(self):
+            return FakeCursor()
+
+        def commit(self):
+            return None
+
+        def close(self):
+            return None
+
+    monkeypatch.setattr(client, "fetch_column", fake_column)
+    monkeypatch.setattr(client, "get_connection", lambda: FakeConn())
+
+    assert client.table_exists("orders") is True
+    assert client.get_tables() == ["orders"]
+    assert len(show_calls) == 1
+
+    tables.append("users")
+    client.execute_update("INSERT INTO `orders` VALUES (1)")
+    assert client.table_exists("users") is False
+
+    client.execute_update("  create table `users` (id INT)")
+    assert client.table_exists("users") is True
+    assert len(show_calls) == 2
+
+
+def test_doris_client_caches_table_schema_until_ddl(monkeypatch):
+    import db
+
+    client = db.DorisClient()
+    describe_calls = []
+
+    def fake_query(sql, params=None):
+        describe_calls.append(sql)
+        return [{"Field": "id", "Type": "INT"}]
+
+    class FakeConn:
+        def cursor(self):
+            return SimpleNamespace(execute=lambda sql, params=None: 0)
+
+        def commit(self):
+            return None
+
+        def close(self):
+            return None
+
+    monkeypatch.setattr(client, "execute_query", fake_query)
+    monkeypatch.setattr(client, "get_connection", lambda: FakeConn())
+
+    assert client.get_table_schema("orders") == [{"Field": "id", "Type": "INT"}]
+    client.get_table_schema("orders")
+    assert describe_calls == ["DESCRIBE `orders`"]
+
+    client.execute_update("ALTER TABLE `orders` ADD COLUMN amount INT")
+    client.get_table_schema("orders")
+    assert len(describe_calls) == 2
+
+
+
+def test_async_wrappers_dispatch_without_to_thread(monkeypatch):
+    import asyncio
+    import db
+    from datasource_handler import DataSourceHandler
+
+    monkeypatch.setattr(asyncio, "to_thread", lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("to_thread")))
+    client = db.DorisClient()
+    monkeypatch.setattr(client, "execute_query", lambda sql, params=None: [{"sql": sql, "params": params}])
+    handler = DataSourceHandler()
+
+    async def run():
+        rows = await client.execute_query_async("SELECT 1", (1,))
+        positional = await handler._run_blocking(lambda a, b: (a, b), 1, 2)
+        keyword = await handler._run_blocking(lambda a, b=0: (a, b), 1, b=3)
+        return rows, positional, keyword
+
+    rows, positional, keyword = asyncio.run(run())
+
+    assert rows == [{"sql": "SELECT 1", "params": (1,)}]
+    assert positional == (1, 2)
+    assert keyword == (1, 3)
+
 def test_mcp_server_dispatches_query_tool(monkeypatch):
     import mcp_server
 
@@ -232,3 +525,80 @@ def test_mcp_server_legacy_tools_list_does_not_pollute_runtime_tools():
     )
     runtime_tool_names = {tool["name"] for tool in runtime_response["result"]["tools"]}
     assert "query_natural" not in runtime_tool_names
+
+
+def test_llm_resources_are_cached_until_config_changes(monkeypatch):
+    main = reload_main()
+    monkeypatch.setenv("SMATRIX_API_KEY", "secret-key")
+    queries = []
+
+    def fake_query(sql, params=None):
+        queries.append(sql)
+        return [{"Name": "deepseek", "ResourceType": "ai", "Item": "ai.provider_type", "Value": "deepseek"}]
+
+    monkeypatch.setattr(main.doris_client, "execute_query", fake_query)
+    monkeypatch.setattr(main.doris_client, "execute_update", lambda sql, params=None: 0)
+    client = TestClient(main.app)
+    headers = {"X-API-Key": "secret-key"}
+
+    first = client.get("/api/llm/config", headers=headers).json()
+    second = client.get("/api/llm/config", headers=headers).json()
+    assert first == second
+    assert len(queries) == 1
+
+    assert client.delete("/api/llm/config/deepseek", headers=headers).status_code == 200
+    client.get("/api/llm/config", headers=headers)
+    assert len(queries) == 2
+
+
+def test_metadata_list_is_cached_until_metadata_is_saved(monkeypatch):
+    from metadata_analyzer import MetadataAnalyzer
+
+    analyzer = MetadataAnalyzer()
+    queries = []
+
+    def fake_query(sql, params=None):
+        queries.append(sql)
+        return [{"table_name": "orders", "columns_info": '{"id": "编号"}', "sample_queries": '["SELECT 1"]'}]
+
+    analyzer.db = SimpleNamespace(execute_query=fake_query, execute_update=lambda sql, params=None: 0)
+    monkeypatch.setattr(analyzer, "_mark_table_analysis_status", lambda *args, **kwargs: None)
+
+    first = analyzer.list_all_metadata()
+    first[0]["description"] = "mutated by caller"
+    first[0]["columns_info"]["id"] = "mutated"
+    first[0]["sample_queries"].append("SELECT 2")
+    second = analyzer.list_all_metadata()
+    assert second[0]["columns_info"] == {"id": "编号"}
+    assert second[0]["sample_queries"] == ["SELECT 1"]
+    assert "description" not in second[0]
+    assert len(queries) == 1
+
+    analyzer._save_metadata("orders", {"description": "订单"}, "excel")
+    analyzer.list_all_metadata()
+    assert len(queries) == 2
+
+
+def test_doris_client_schema_cache_copies_rows_and_skips_stale_writes(monkeypatch):
+    import db
+
+    client = db.DorisClient()
+    describes = []
+
+    def fake_query(sql, params=None):
+        describes.append(sql)
+        if len(describes) == 1:
+            # An ALTER lands while this DESCRIBE is in flight.
+            client.invalidate_tables_cache()
+        return [{"Field": "id", "Type": "INT"}]
+
+    monkeypatch.setattr(client, "execute_query", fake_query)
+
+    client.get_table_schema("orders")
+    client.get_table_schema("orders")
+    assert len(describes) == 2
+
+    first = client.get_table_schema("orders")
+    first[0]["Type"] = "BIGINT"
+    assert client.get_table_schema("orders") == [{"Field": "id", "Type": "INT"}]
+    assert len(describes) == 2
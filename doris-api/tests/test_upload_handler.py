@@ -140,3 +140,110 @@ def test_build_agent_prompt_serializes_datetime_values():
     )
 
     assert "2026-03-29 12:34:56" in prompt
+
+
+def test_stream_load_rows_encodes_tuples_and_splits_by_max_bytes(monkeypatch):
+    import upload_handler as upload_handler_module
+
+    handler = ExcelUploadHandler()
+    bodies = []
+    monkeypatch.setattr(upload_handler_module, "STREAM_LOAD_MAX_BYTES", 40)
+    monkeypatch.setattr(
+        handler,
+        "_send_stream_load",
+        lambda body, table_name: bodies.append(body) or {"Status": "Success", "NumberLoadedRows": body.count(b"\n")},
+    )
+
+    rows = [
+        (1, "north\tregion", datetime(2024, 1, 2, 3, 4, 5), None),
+        (2, "line\nbreak", None, float("nan")),
+        (3, b"bytes", 1.5, "odd\x01tail"),
+    ]
+    result = handler.stream_load_rows(rows, "orders")
+
+    decoded = b"".join(bodies).decode("utf-8").split("\n")
+    assert decoded == [
+        "1\x01north\tregion\x012024-01-02 03:04:05\x01",
+        "2\x01line break\x01\x01",
+        "3\x01bytes\x011.5\x01odd tail",
+        "",
+    ]
+    assert len(bodies) > 1
+    assert all(len(body) <= 40 for body in bodies)
+    assert result["NumberLoadedRows"] == 3
+
+
+def test_dataframe_stream_load_body_uses_control_char_separator():
+    handler = ExcelUploadHandler()
+    frame = handler._sanitize_for_stream_load(
+        pd.DataFrame({"name": ["a\tb", "c\r\nd"], "amount": [1.5, None]})
+    )
+
+    body = handler._dataframe_to_csv_bytes(frame).decode("utf-8")
+
+    assert body == "a\tb\x011.5\nc d\x01\n"
+
+
+def test_send_stream_load_reuses_keep_alive_session(monkeypatch):
+    handler = ExcelUploadHandler()
+    calls = []
+
+    class FakeResponse:
+        status_code = 200
+
+        def json(self):
+            return {"Status": "Success", "NumberLoadedRows": 1}
+
+    monkeypatch.setattr(handler.session, "put", lambda url, **kwargs: calls.append((url, kwargs)) or FakeResponse())
+
+    handler._send_stream_load(b"1\x01a\n", "orders")
+    handler._send_stream_load(b"2\x01b\n", "orders")
+
+    assert len(calls) == 2
+    url, kwargs = calls[0]
+    assert url.endswith("/orders/_stream_load")
+    assert kwargs["headers"]["Connection"] == "keep-alive"
+    assert kwargs["headers"]["column_separator"] == "\\x01"
+    adapter = handler.session.get_adapter("http://doris-be:8040")
+    assert adapter.max_retries.read == 0
+
+
+def test_send_stream_load_gzips_body_when_enabled(monkeypatch):
+    import gzip
+
+    import upload_handler
+
+    handler = ExcelUploadHandler()
+    calls = []
+
+    class FakeResponse:
+        status_code = 200
+
+        def json(self):
+            return {"Status": "Success", "NumberLoadedRows": 1}
+
+    monkeypatch.setattr(upload_handler, "STREAM_LOAD_GZIP", True)
+    monkeypatch.setattr(handler.session, "put", lambda url, **kwargs: calls.append(kwargs) or FakeResponse())
+
+    handler._send_stream_load(b"1\x01a\n", "orders")
+
+    assert calls[0]["headers"]["compress_type"] == "gz"
+    assert gzip.decompress(calls[0]["data"]) == b"1\x01a\n"
+
+
+def test_preview_and_import_accept_spooled_file_objects(monkeypatch):
+    import tempfile
+
+    handler = ExcelUploadHandler()
+    handler.db = RecordingUploadDb()
+    monkeypatch.setattr(handler, "stream_load", lambda df, table_name: {"Status": "Success", "table_name": table_name})
+
+    spooled = tempfile.SpooledTemporaryFile(max_size=16)
+    pd.DataFrame([{"城市": "广州", "数量": 3}, {"城市": "深圳", "数量": 5}]).to_excel(spooled, index=False)
+
+    preview = handler.preview_excel(spooled, rows=1)
+    result = handler.import_excel(file_content=spooled, table_name="cities")
+
+    assert preview["columns"] == ["城市", "数量"]
+    assert preview["row_count"] == 1
+    assert result["success"] is True